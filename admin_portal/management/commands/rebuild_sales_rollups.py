@@ -0,0 +1,26 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from admin_portal.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = (
+        "Backfills or rebuilds the DailyProductSales / DailyCategorySales rollups "
+        "from order items. Without --from/--to every day is rebuilt."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--from", dest="date_from", help="First day to rebuild, YYYY-MM-DD.")
+        parser.add_argument("--to", dest="date_to", help="Last day to rebuild, YYYY-MM-DD.")
+
+    def handle(self, *args, **options):
+        try:
+            date_from = date.fromisoformat(options["date_from"]) if options["date_from"] else None
+            date_to = date.fromisoformat(options["date_to"]) if options["date_to"] else None
+        except ValueError as e:
+            raise CommandError(f"Invalid date: {e}")
+
+        products, categories = rebuild_rollups(date_from, date_to)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {products} product rows and {categories} category rows."))
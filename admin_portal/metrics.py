@@ -0,0 +1,113 @@
+import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, DecimalField, Q, Sum, Value
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from cart.models import Order
+from store.models import Product
+
+CACHE_KEY = 'admin_portal:dashboard_metrics'
+SERIES_DAYS = 30
+NEW_PRODUCT_DAYS = 30
+# Orders in these states don't count towards revenue
+UNPAID_STATUSES = ('Cancelled', 'Refunded')
+
+
+class DashboardMetrics:
+    """
+    Snapshot of the counters shown on every admin portal page.
+
+    Built with one aggregate query per table plus one grouped query for the
+    daily series, and cached. Product/Order signals drop the cached copy; it
+    also expires after settings.DASHBOARD_METRICS_TTL seconds, which covers
+    queryset.update() calls and other cache processes.
+    """
+
+    def __init__(self, products, orders, series):
+        self.products_count = products['total']
+        self.new_products_count = products['new']
+        self.out_of_stock_count = products['out_of_stock']
+        self.is_listed_count = products['listed']
+
+        self.orders_count = orders['total']
+        self.new_orders_count = orders['new']
+        self.shipped_orders_count = orders['shipped']
+        self.pending_orders_count = orders['pending']
+        self.cancelled_orders_count = orders['cancelled']
+        self.revenue = orders['revenue']
+
+        # [(date, orders, revenue)], oldest first, one entry per day
+        self.daily = series
+        self.computed_at = timezone.now()
+
+    @classmethod
+    def compute(cls):
+        now = timezone.now()
+        products = Product.objects.aggregate(
+            total=Count('id'),
+            new=Count('id', filter=Q(created_at__gte=now - datetime.timedelta(days=NEW_PRODUCT_DAYS))),
+            out_of_stock=Count('id', filter=Q(stock_quantity__lte=0)),
+            listed=Count('id', filter=Q(is_listed=True)),
+        )
+        paid = ~Q(status__in=UNPAID_STATUSES)
+        orders = Order.objects.aggregate(
+            total=Count('id'),
+            new=Count('id', filter=Q(status='Pending')),
+            shipped=Count('id', filter=Q(is_shipped=True)),
+            pending=Count('id', filter=Q(is_shipped=False)),
+            cancelled=Count('id', filter=Q(status='Cancelled')),
+            revenue=Coalesce(Sum('amount_paid', filter=paid), Value(0), output_field=DecimalField()),
+        )
+        return cls(products, orders, cls.daily_series(now, paid))
+
+    @staticmethod
+    def daily_series(now, paid):
+        today = timezone.localdate(now)
+        start = today - datetime.timedelta(days=SERIES_DAYS - 1)
+        rows = (
+            Order.objects.filter(date_ordered__date__gte=start)
+            .annotate(day=TruncDate('date_ordered'))
+            .values('day')
+            .annotate(
+                orders=Count('id'),
+                revenue=Coalesce(Sum('amount_paid', filter=paid), Value(0), output_field=DecimalField()),
+            )
+        )
+        by_day = {row['day']: (row['orders'], row['revenue']) for row in rows}
+        series = []
+        for offset in range(SERIES_DAYS):
+            day = start + datetime.timedelta(days=offset)
+            orders, revenue = by_day.get(day, (0, 0))
+            series.append((day, orders, revenue))
+        return series
+
+    @classmethod
+    def get(cls):
+        """Cached snapshot; recomputed when missing or expired."""
+        metrics = cache.get(CACHE_KEY)
+        if metrics is None:
+            metrics = cls.refresh()
+        return metrics
+
+    @classmethod
+    def refresh(cls):
+        metrics = cls.compute()
+        cache.set(CACHE_KEY, metrics, settings.DASHBOARD_METRICS_TTL)
+        return metrics
+
+    @classmethod
+    def invalidate(cls):
+        cache.delete(CACHE_KEY)
+
+    def as_context(self):
+        """Template variables used by the admin portal pages."""
+        return {
+            'metrics': self,
+            'products_count': self.products_count,
+            'new_products_count': self.new_products_count,
+            'out_of_stock_count': self.out_of_stock_count,
+            'is_listed_count': self.is_listed_count,
+        }
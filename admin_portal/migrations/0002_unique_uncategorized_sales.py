@@ -0,0 +1,37 @@
+# Generated by Django 4.2.18 on 2026-10-19 16:44
+
+from django.db import migrations, models
+from django.db.models import Count, Min, Sum
+
+
+def merge_uncategorized_duplicates(apps, schema_editor):
+    # Concurrent first sales could each insert a NULL-category row for the same day
+    DailyCategorySales = apps.get_model('admin_portal', 'DailyCategorySales')
+    uncategorized = DailyCategorySales.objects.filter(category__isnull=True)
+    duplicated = (
+        uncategorized.values('day')
+        .annotate(rows=Count('id'), keep=Min('id'), quantity=Sum('quantity'),
+                  revenue=Sum('revenue'), order_lines=Sum('order_lines'))
+        .filter(rows__gt=1)
+        .order_by()
+    )
+    for group in list(duplicated):
+        uncategorized.filter(pk=group['keep']).update(
+            quantity=group['quantity'], revenue=group['revenue'], order_lines=group['order_lines'],
+        )
+        uncategorized.filter(day=group['day']).exclude(pk=group['keep']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_portal', '0001_daily_sales_rollups'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_uncategorized_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='dailycategorysales',
+            constraint=models.UniqueConstraint(condition=models.Q(('category__isnull', True)), fields=('day',), name='daily_category_sales_unique_uncategorized'),
+        ),
+    ]
@@ -1,3 +1,48 @@
 from django.db import models
 
-# Create your models here.
+from store.models import Category, Product
+
+
+class DailyProductSales(models.Model):
+    """Units and revenue per product per day, kept up to date as order items are created."""
+    day = models.DateField()
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='daily_sales')
+    quantity = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    order_lines = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'product'], name='daily_product_sales_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['product', 'day'], name='daily_product_sales_product'),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.product_id}: {self.quantity} / {self.revenue}"
+
+
+class DailyCategorySales(models.Model):
+    """Same as DailyProductSales, rolled up by product category (NULL for uncategorized)."""
+    day = models.DateField()
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='daily_sales', null=True, blank=True)
+    quantity = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    order_lines = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'category'], name='daily_category_sales_unique'),
+            # NULLs never collide in the constraint above, so uncategorized sales need their own
+            models.UniqueConstraint(
+                fields=['day'], condition=models.Q(category__isnull=True),
+                name='daily_category_sales_unique_uncategorized',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['category', 'day'], name='daily_category_sales_category'),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.category_id}: {self.quantity} / {self.revenue}"
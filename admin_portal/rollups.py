@@ -0,0 +1,122 @@
+import datetime
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from cart.models import OrderItem
+from .models import DailyCategorySales, DailyProductSales
+
+LINE_TOTAL = ExpressionWrapper(F('price') * F('quantity'), output_field=DecimalField(max_digits=14, decimal_places=2))
+
+
+def _bump(model, keys, quantity, revenue):
+    """Adds one order line to the rollup row for ``keys``, creating it if needed."""
+    increments = {
+        'quantity': F('quantity') + quantity,
+        'revenue': F('revenue') + revenue,
+        'order_lines': F('order_lines') + 1,
+    }
+    if model.objects.filter(**keys).update(**increments):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**keys, quantity=quantity, revenue=revenue, order_lines=1)
+    except IntegrityError:
+        # Another request created the row first
+        model.objects.filter(**keys).update(**increments)
+
+
+def record_order_item(item):
+    """
+    Adds a new order item to the daily rollups. Called from the OrderItem
+    post_save signal, inside the same transaction as the item itself.
+    Deleted or edited items are only corrected by ``rebuild_rollups``.
+    """
+    day = timezone.localdate(item.order.date_ordered)
+    revenue = item.price * item.quantity
+    _bump(DailyProductSales, {'day': day, 'product_id': item.product_id}, item.quantity, revenue)
+    _bump(DailyCategorySales, {'day': day, 'category_id': item.product.category_id}, item.quantity, revenue)
+
+
+def rebuild_rollups(date_from=None, date_to=None):
+    """
+    Recomputes both rollup tables from cart.OrderItem for the given day range
+    (inclusive, None for open-ended). Returns (product rows, category rows).
+    """
+    items = OrderItem.objects.all()
+    product_rows = DailyProductSales.objects.all()
+    category_rows = DailyCategorySales.objects.all()
+    if date_from:
+        items = items.filter(order__date_ordered__date__gte=date_from)
+        product_rows = product_rows.filter(day__gte=date_from)
+        category_rows = category_rows.filter(day__gte=date_from)
+    if date_to:
+        items = items.filter(order__date_ordered__date__lte=date_to)
+        product_rows = product_rows.filter(day__lte=date_to)
+        category_rows = category_rows.filter(day__lte=date_to)
+
+    items = items.annotate(day=TruncDate('order__date_ordered'))
+    # revenue first: once 'quantity' is annotated, F('quantity') would refer to the sum
+    totals = dict(revenue=Sum(LINE_TOTAL), quantity=Sum('quantity'), order_lines=Count('id'))
+
+    with transaction.atomic():
+        product_rows.delete()
+        category_rows.delete()
+        products = DailyProductSales.objects.bulk_create(
+            [DailyProductSales(**row) for row in items.values('day', 'product_id').annotate(**totals).order_by()],
+            batch_size=2000,
+        )
+        categories = DailyCategorySales.objects.bulk_create(
+            [
+                DailyCategorySales(category_id=row.pop('product__category_id'), **row)
+                for row in items.values('day', 'product__category_id').annotate(**totals).order_by()
+            ],
+            batch_size=2000,
+        )
+    return len(products), len(categories)
+
+
+def report_range(params, default_days=30):
+    """(start, end) dates from ?date_from/?date_to, defaulting to the last ``default_days`` days."""
+    end = start = None
+    try:
+        if params.get('date_to'):
+            end = datetime.date.fromisoformat(params['date_to'])
+        if params.get('date_from'):
+            start = datetime.date.fromisoformat(params['date_from'])
+    except ValueError:
+        pass
+    end = end or timezone.localdate()
+    start = start or end - datetime.timedelta(days=default_days - 1)
+    return start, end
+
+
+def product_sales(start, end, limit=None):
+    rows = (
+        DailyProductSales.objects.filter(day__range=(start, end))
+        .values('product_id', 'product__name')
+        .annotate(quantity=Sum('quantity'), revenue=Sum('revenue'), order_lines=Sum('order_lines'))
+        .order_by('-revenue', 'product_id')
+    )
+    return rows[:limit] if limit else rows
+
+
+def category_sales(start, end):
+    return (
+        DailyCategorySales.objects.filter(day__range=(start, end))
+        .values('category_id', 'category__name')
+        .annotate(quantity=Sum('quantity'), revenue=Sum('revenue'), order_lines=Sum('order_lines'))
+        .order_by('-revenue', 'category_id')
+    )
+
+
+def daily_sales(start, end):
+    """Per-day totals; the category table has fewer rows than the product table and the same sums."""
+    return (
+        DailyCategorySales.objects.filter(day__range=(start, end))
+        .values('day')
+        .annotate(quantity=Sum('quantity'), revenue=Sum('revenue'), order_lines=Sum('order_lines'))
+        .order_by('day')
+    )
@@ -0,0 +1,21 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from cart.models import Order, OrderItem
+from store.models import Product
+from .metrics import DashboardMetrics
+from .rollups import record_order_item
+
+
+@receiver([post_save, post_delete], sender=Product)
+@receiver([post_save, post_delete], sender=Order)
+def invalidate_dashboard_metrics(sender, **kwargs):
+    # After commit, so a concurrent page load can't re-cache the old numbers
+    transaction.on_commit(DashboardMetrics.invalidate)
+
+
+@receiver(post_save, sender=OrderItem)
+def add_order_item_to_rollups(sender, instance, created, **kwargs):
+    if created and not kwargs.get('raw'):
+        record_order_item(instance)
@@ -8,4 +8,6 @@ urlpatterns = [
     path('inventory', views.inventory, name='inventory'),
     path('product_inventory/<str:slug>', views.product_inventory, name='product_inventory'),
     path('orders', views.orders, name='orders'),
+    path('orders/export', views.export_orders, name='export_orders'),
+    path('sales_report', views.sales_report, name='sales_report'),
 ]
\ No newline at end of file
@@ -0,0 +1,197 @@
+import csv
+import tempfile
+from datetime import date
+
+from django.db.models import Prefetch
+
+from cart.models import Order, OrderItem
+from store.models import Product
+
+EXPORT_CHUNK_SIZE = 2000
+LOW_STOCK_THRESHOLD = 5
+
+ORDER_FILTERS = ('date_from', 'date_to', 'status', 'payment_status', 'payment_method')
+
+ORDER_COLUMNS = [
+    'order_id', 'date_ordered', 'customer', 'email', 'status', 'payment_method',
+    'payment_status', 'transaction_id', 'amount_paid', 'items', 'shipped', 'delivered',
+]
+ITEM_COLUMNS = [
+    'order_id', 'date_ordered', 'customer', 'email', 'status', 'payment_status',
+    'product_id', 'product', 'quantity', 'price', 'line_total',
+]
+
+
+def _parse_date(value):
+    try:
+        return date.fromisoformat(value) if value else None
+    except ValueError:
+        return None
+
+
+def order_filters(params):
+    """Cleaned filter values from a GET QueryDict; invalid or empty values are dropped."""
+    filters = {}
+    for key in ORDER_FILTERS:
+        value = (params.get(key) or '').strip()
+        if key.startswith('date_'):
+            value = _parse_date(value)
+        if value:
+            filters[key] = value
+    return filters
+
+
+def filter_orders(queryset, filters):
+    if 'date_from' in filters:
+        queryset = queryset.filter(date_ordered__date__gte=filters['date_from'])
+    if 'date_to' in filters:
+        queryset = queryset.filter(date_ordered__date__lte=filters['date_to'])
+    if 'status' in filters:
+        queryset = queryset.filter(status=filters['status'])
+    if 'payment_status' in filters:
+        queryset = queryset.filter(payment_status__iexact=filters['payment_status'])
+    if 'payment_method' in filters:
+        queryset = queryset.filter(payment_method__iexact=filters['payment_method'])
+    return queryset
+
+
+def _customer(order):
+    return order.full_name or order.user.get_full_name()
+
+
+def order_rows(filters):
+    """One row per order. Streams from the DB in chunks; items are prefetched per chunk."""
+    orders = (
+        filter_orders(Order.objects.all(), filters)
+        .select_related('user')
+        .prefetch_related(Prefetch('items', queryset=OrderItem.objects.select_related('product').order_by('id')))
+        .order_by('id')
+    )
+    for order in orders.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield [
+            order.id,
+            order.date_ordered.isoformat(),
+            _customer(order),
+            order.email or order.user.email,
+            order.status,
+            order.payment_method,
+            order.payment_status,
+            order.transaction_id or '',
+            order.amount_paid,
+            '; '.join(f"{item.product.name} x{item.quantity}" for item in order.items.all()),
+            'yes' if order.is_shipped else 'no',
+            'yes' if order.is_delivered else 'no',
+        ]
+
+
+def item_rows(filters):
+    """One row per order item, joined with its order, customer and product."""
+    items = (
+        OrderItem.objects.filter(order__in=filter_orders(Order.objects.all(), filters))
+        .select_related('order__user', 'product')
+        .order_by('order_id', 'id')
+    )
+    for item in items.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        order = item.order
+        yield [
+            order.id,
+            order.date_ordered.isoformat(),
+            _customer(order),
+            order.email or order.user.email,
+            order.status,
+            order.payment_status,
+            item.product_id,
+            item.product.name,
+            item.quantity,
+            item.price,
+            item.price * item.quantity,
+        ]
+
+
+class Echo:
+    """File-like object whose write() just returns the line, for csv.writer + StreamingHttpResponse."""
+    def write(self, value):
+        return value
+
+
+def stream_csv(columns, rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(columns)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def build_xlsx(columns, rows):
+    """
+    Writes the rows with openpyxl's write-only workbook (rows go straight to
+    disk) and returns the open temporary file, rewound.
+    """
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Export')
+    sheet.append(columns)
+    for row in rows:
+        sheet.append(row)
+    output = tempfile.TemporaryFile()
+    workbook.save(output)
+    output.seek(0)
+    return output
+
+
+# ?sort= values for the inventory grid; id breaks ties so pages are stable
+INVENTORY_SORTS = {
+    'newest': ('-created_at', '-id'),
+    'oldest': ('created_at', 'id'),
+    'name': ('name', 'id'),
+    '-name': ('-name', '-id'),
+    'price': ('price', 'id'),
+    '-price': ('-price', '-id'),
+    'stock': ('stock_quantity', 'id'),
+    '-stock': ('-stock_quantity', '-id'),
+}
+INVENTORY_FLAGS = ('is_listed', 'is_featured', 'is_sale')
+INVENTORY_FIELDS = (
+    'id', 'name', 'slug', 'price', 'sale_price', 'stock_quantity', 'is_listed',
+    'is_featured', 'is_sale', 'created_at', 'profile_image', 'category__name',
+)
+
+
+def inventory_filters(params):
+    """Cleaned inventory filters from a GET QueryDict; unknown values are dropped."""
+    filters = {}
+    q = (params.get('q') or '').strip()
+    if q:
+        filters['q'] = q
+    category = params.get('category')
+    if category and category.isdigit():
+        filters['category'] = int(category)
+    if params.get('stock') in ('out', 'low', 'in'):
+        filters['stock'] = params['stock']
+    for flag in INVENTORY_FLAGS:
+        value = (params.get(flag) or '').lower()
+        if value in ('1', 'true', 'yes'):
+            filters[flag] = True
+        elif value in ('0', 'false', 'no'):
+            filters[flag] = False
+    filters['sort'] = params.get('sort') if params.get('sort') in INVENTORY_SORTS else 'newest'
+    return filters
+
+
+def filter_products(filters):
+    products = Product.objects.select_related('category').only(*INVENTORY_FIELDS)
+    if 'q' in filters:
+        products = products.filter(name__icontains=filters['q'])
+    if 'category' in filters:
+        products = products.filter(category_id=filters['category'])
+    stock = filters.get('stock')
+    if stock == 'out':
+        products = products.filter(stock_quantity__lte=0)
+    elif stock == 'low':
+        products = products.filter(stock_quantity__gt=0, stock_quantity__lte=LOW_STOCK_THRESHOLD)
+    elif stock == 'in':
+        products = products.filter(stock_quantity__gt=0)
+    for flag in INVENTORY_FLAGS:
+        if flag in filters:
+            products = products.filter(**{flag: filters[flag]})
+    return products.order_by(*INVENTORY_SORTS[filters.get('sort', 'newest')])
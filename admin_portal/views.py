@@ -1,13 +1,20 @@
-import datetime
 from django.forms import modelformset_factory
 from django.shortcuts import render, redirect, get_object_or_404
-from store.models import Product, ProductImage
+from store.models import Category, Product, ProductImage
 from cart.models import Order, OrderItem
 from .forms import CategoryForm, ProductImageForm, ProductModelForm
 
 from django.contrib.auth.decorators import user_passes_test
-from django.http import HttpResponse
+from django.core.paginator import Paginator
+from django.db.models import Count, Q
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
 from django.utils import timezone
+from .metrics import DashboardMetrics
+from .rollups import category_sales, daily_sales, product_sales, report_range
+from .utils import (
+    INVENTORY_SORTS, ITEM_COLUMNS, ORDER_COLUMNS, build_xlsx, filter_orders, filter_products, inventory_filters,
+    item_rows, order_filters, order_rows, stream_csv,
+)
 # from users.decorators import group_required
 
 
@@ -25,23 +32,16 @@ def admin_or_staff_required(view_func):
 
 # @group_required('Admin')
 def admin_portal(request):
-    products = Product.objects.all()
-    latest_products = products.order_by('-created_at')[:10]
-    orders = Order.objects.all()
+    latest_products = Product.objects.order_by('-created_at')[:10]
+    recent_orders = Order.objects.select_related('user').order_by('-date_ordered')[:10]
     context = {
-        'products':products,
         'latest_products': latest_products,
-        'orders': orders
+        'orders': recent_orders,
+        **DashboardMetrics.get().as_context(),
     }
     return render(request, 'admin_portal/admin_portal.html', context)
 
 def add_category(request):
-    products = Product.objects.all()
-    products_count = products.count()
-    now = timezone.now()
-    new_products_count = products.filter(created_at__gte=now - datetime.timedelta(days=30)).count()
-    out_of_stock_count = products.filter(stock_quantity__lte=0).count()
-    is_listed_count = products.filter(is_listed=True).count()
     
     if request.method == 'POST':
         category_form = CategoryForm(request.POST, request.FILES)
@@ -56,23 +56,13 @@ def add_category(request):
         
     context = {
         'category_form': category_form,
-        'products': products,
-        'products_count': products_count,
-        'new_products_count': new_products_count,
-        'out_of_stock_count': out_of_stock_count,
-        'is_listed_count': is_listed_count,
+        **DashboardMetrics.get().as_context(),
     }
     return render(request, 'admin_portal/add_category.html', context)
 
 
 
 def add_product(request):
-    products = Product.objects.all()
-    products_count = products.count()
-    now = timezone.now()
-    new_products_count = products.filter(created_at__gte=now - datetime.timedelta(days=30)).count()
-    out_of_stock_count = products.filter(stock_quantity__lte=0).count()
-    is_listed_count = products.filter(is_listed=True).count()
 
     if request.method == 'POST':
         product_form = ProductModelForm(request.POST, request.FILES)
@@ -98,36 +88,40 @@ def add_product(request):
         'product_form': product_form,
         'product_image_form': product_image_form,
         'category_form': category_form,
-        'products': products,
-        'products_count': products_count,
-        'new_products_count': new_products_count,
-        'out_of_stock_count': out_of_stock_count,
-        'is_listed_count': is_listed_count,
+        **DashboardMetrics.get().as_context(),
     }
 
     return render(request, 'admin_portal/add_product.html', context)
 
+INVENTORY_PER_PAGE = 50
+
+
 def inventory(request):
-    products = Product.objects.all()
-    products_count = products.count()
-    out_of_stock_count = products.filter(stock_quantity__lte=0).count() 
-    is_listed_count = products.filter(is_listed=True).count()  
+    metrics = DashboardMetrics.get()
+    filters = inventory_filters(request.GET)
+    paginator = Paginator(filter_products(filters), INVENTORY_PER_PAGE)
+    if filters.keys() == {'sort'}:
+        # Unfiltered: the cached product count saves a COUNT(*)
+        paginator.count = metrics.products_count
+    page = paginator.get_page(request.GET.get('page'))
+
+    query = request.GET.copy()
+    query.pop('page', None)
     context = {
-        'products': products,
-        'products_count': products_count,
-        'out_of_stock_count': out_of_stock_count,
-        'is_listed_count': is_listed_count,
+        'products': page,
+        'page_obj': page,
+        'filters': filters,
+        'categories': Category.objects.order_by('name').values_list('id', 'name'),
+        'sorts': INVENTORY_SORTS,
+        'querystring': query.urlencode(),
+        **metrics.as_context(),
     }
     return render(request, 'admin_portal/inventory.html', context)
 
 
 def product_inventory(request, slug):
     product = get_object_or_404(Product, slug=slug)
-    products = Product.objects.all()
     product_images = ProductImage.objects.filter(product=product)  
-    products_count = products.count()
-    out_of_stock_count = products.filter(stock_quantity__lte=0).count()
-    is_listed_count = products.filter(is_listed=True).count()
 
     if request.method == 'POST':
         if 'product_form' in request.POST:
@@ -158,23 +152,86 @@ def product_inventory(request, slug):
         'product_images': product_images,
         'product_form': product_form,
         'product_image_form': product_image_form,
-        'products_count': products_count,
-        'out_of_stock_count': out_of_stock_count,
-        'is_listed_count': is_listed_count
+        **DashboardMetrics.get().as_context(),
     }
     return render(request, 'admin_portal/product_inventory.html', context)
 
 
+ORDERS_PER_PAGE = 50
+
+
 def orders(request):
-    orders = Order.objects.all()
-    shipped = orders.filter(is_shipped=True)
-    pending = orders.filter(is_shipped=False)
-    products = Product.objects.all()
+    filters = order_filters(request.GET)
+    filtered = filter_orders(Order.objects.all(), filters)
+    # All the header counts in one query instead of loading every order
+    counts = filtered.aggregate(
+        total=Count('id'),
+        new=Count('id', filter=Q(status='Pending')),
+        shipped=Count('id', filter=Q(is_shipped=True)),
+        pending=Count('id', filter=Q(is_shipped=False)),
+        cancelled=Count('id', filter=Q(status='Cancelled')),
+    )
+    paginator = Paginator(filtered.select_related('user').order_by('-date_ordered', '-id'), ORDERS_PER_PAGE)
+    # Total already counted above; saves the paginator's own COUNT(*)
+    paginator.count = counts['total']
+    page = paginator.get_page(request.GET.get('page'))
+
+    query = request.GET.copy()
+    query.pop('page', None)
     context = {
-        'orders': orders,
-        'shipped': shipped,
-        'products': products,
-        'pending': pending,
+        'orders': page,
+        'page_obj': page,
+        'counts': counts,
+        'filters': filters,
+        'status_choices': Order._meta.get_field('status').choices,
+        'querystring': query.urlencode(),
     }
     return render(request, 'admin_portal/orders.html', context)
-     
+
+
+@admin_or_staff_required
+def export_orders(request):
+    """
+    Streams the filtered orders as CSV (default) or XLSX. ``?rows=items`` gives
+    one line per order item instead of one per order.
+    """
+    filters = order_filters(request.GET)
+    by_items = request.GET.get('rows') == 'items'
+    columns, rows = (ITEM_COLUMNS, item_rows(filters)) if by_items else (ORDER_COLUMNS, order_rows(filters))
+    filename = f"{'order-items' if by_items else 'orders'}-{timezone.now():%Y%m%d-%H%M}"
+
+    if request.GET.get('format') == 'xlsx':
+        try:
+            output = build_xlsx(columns, rows)
+        except ImportError:
+            return HttpResponse("XLSX export needs openpyxl installed.", status=501)
+        return FileResponse(
+            output,
+            as_attachment=True,
+            filename=f"{filename}.xlsx",
+            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        )
+
+    response = StreamingHttpResponse(stream_csv(columns, rows), content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="{filename}.csv"'
+    return response
+
+
+@admin_or_staff_required
+def sales_report(request):
+    """Sales by product, category and day; reads only the daily rollup tables."""
+    start, end = report_range(request.GET)
+    categories = list(category_sales(start, end))
+    totals = {
+        key: sum(row[key] for row in categories)
+        for key in ('quantity', 'revenue', 'order_lines')
+    }
+    context = {
+        'start': start,
+        'end': end,
+        'products': product_sales(start, end, limit=50),
+        'categories': categories,
+        'days': daily_sales(start, end),
+        'totals': totals,
+    }
+    return render(request, 'admin_portal/sales_report.html', context)
@@ -97,3 +97,14 @@ class ReferredUserSerializer(serializers.ModelSerializer):
 
     def get_full_name(self, obj):
         return f"{obj.first_name} {obj.last_name}"
+
+
+class InventoryProductSerializer(serializers.ModelSerializer):
+    category = serializers.CharField(source='category.name', default=None, read_only=True)
+
+    class Meta:
+        model = Product
+        fields = [
+            'id', 'name', 'slug', 'category', 'price', 'sale_price', 'stock_quantity',
+            'is_listed', 'is_featured', 'is_sale', 'created_at', 'profile_image',
+        ]
@@ -3,7 +3,7 @@ from rest_framework.routers import DefaultRouter
 from .views import CategoryViewSet, ProductViewSet, ProductImageViewSet, ProfileViewSet, MobileBannerViewSet, ShippingAddressViewSet, create_order, user_order_history_api 
 from . import views
 from cart.api_views import CartView, AddToCartView, UpdateCartView, DeleteFromCartView, CartTotalView
-from wallet.api_views import get_wallet_balance,get_wallet_transactions ,withdraw_from_wallet
+from wallet.api_views import get_wallet_balance,get_wallet_transactions ,withdraw_from_wallet, get_wallet_statement, download_wallet_statement
 from payment.api_views import PaymentViewSet
 from users.api_views import add_bank_details_api, get_bank_details_api
 
@@ -23,6 +23,14 @@ urlpatterns = [
    
     path('orders/history/', user_order_history_api, name='user_order_history'),
     path('user/referrals/', views.referred_users_view, name='user-referrals'),
+    path('user/downline/', views.downline_view, name='user-downline'),
+    # admin
+    path('inventory/', views.inventory_view, name='inventory-grid'),
+    path('inventory/adjust/', views.inventory_adjust_view, name='inventory-adjust'),
+    # reports
+    path('reports/sales/products/', views.sales_by_product_view, name='sales-by-product'),
+    path('reports/sales/categories/', views.sales_by_category_view, name='sales-by-category'),
+    path('reports/sales/days/', views.sales_by_day_view, name='sales-by-day'),
     # cart
     path('cart/', CartView.as_view(), name='api_cart'),
     path('cart/add/', AddToCartView.as_view(), name='api_cart_add'),
@@ -32,6 +40,8 @@ urlpatterns = [
     # Wallet
     path('wallet/balance/', get_wallet_balance, name='wallet-balance'),
     path('wallet/transactions/', get_wallet_transactions, name='wallet-transactions'),
+    path('wallet/statement/', get_wallet_statement, name='wallet-statement'),
+    path('wallet/statement/download/', download_wallet_statement, name='wallet-statement-download'),
 	path('wallet/withdraw/', withdraw_from_wallet, name='wallet-withdraw'),
     # bank_details
     path('users/bank-details/', add_bank_details_api, name='add_bank_details_api'),
@@ -21,7 +21,16 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
 import json
+from rest_framework.pagination import PageNumberPagination
 from .serializers import ReferredUserSerializer
+from mlmtree.hierarchy import downline
+from rest_framework.permissions import IsAdminUser
+from admin_portal.rollups import category_sales, daily_sales, product_sales, report_range
+from admin_portal.utils import filter_products, inventory_filters
+from .serializers import InventoryProductSerializer
+from store.inventory import apply_stock_adjustments
+from store.utils import apply_price_params
+from admin_portal.metrics import DashboardMetrics
 
 @ensure_csrf_cookie
 def get_csrf_token(request):
@@ -78,6 +87,9 @@ class ProductViewSet(viewsets.GenericViewSet, mixins.ListModelMixin):
         # Apply the dynamic query filters to the queryset
         queryset = queryset.filter(query)
 
+        # ?min_price / ?max_price / ?sort=price|-price|newest on the stored effective price
+        queryset = apply_price_params(queryset, self.request.query_params)
+
         # Debug: Log the constructed query (for development purposes only)
         #print(queryset.query)
 
@@ -210,16 +222,12 @@ def create_order(request):
                 if not product_id:
                     continue  # or handle the error appropriately
 
-                # Use select_for_update to prevent race conditions
-                product = Product.objects.select_for_update().get(id=product_id)
-                
-                # Check if enough quantity is available
-                if product.stock_quantity < item.get('quantity', 1):
-                    return Response({'error': f'Insufficient stock for product {product.name}'}, status=status.HTTP_400_BAD_REQUEST)
+                product = Product.objects.get(id=product_id)
 
-                # Reduce the quantity
-                product.stock_quantity -= item.get('quantity', 1)
-                product.save()
+                # Check and reduce the quantity in one conditional UPDATE
+                if not Product.objects.decrement_stock(product.id, item.get('quantity', 1)):
+                    transaction.set_rollback(True)
+                    return Response({'error': f'Insufficient stock for product {product.name}'}, status=status.HTTP_400_BAD_REQUEST)
                 
                 OrderItem.objects.create(
                     order=order,
@@ -256,4 +264,85 @@ def referred_users_view(request):
     user = request.user
     referred_users = user.sponsored_users.all()
     serializer = ReferredUserSerializer(referred_users, many=True)
-    return Response(serializer.data)
\ No newline at end of file
+    return Response(serializer.data)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def downline_view(request):
+    """Paginated placement downline of the current user, ?depth=N levels (default 10, max 50)."""
+    try:
+        depth = min(max(int(request.query_params.get('depth', 10)), 1), 50)
+    except ValueError:
+        return Response({'error': 'depth must be a number'}, status=status.HTTP_400_BAD_REQUEST)
+
+    users = downline(request.user, max_depth=depth).order_by('id')
+    paginator = PageNumberPagination()
+    paginator.page_size = 50
+    page = paginator.paginate_queryset(users, request)
+    serializer = ReferredUserSerializer(page, many=True)
+    return paginator.get_paginated_response(serializer.data)
+
+
+def _sales_response(request, rows):
+    start, end = report_range(request.query_params)
+    return Response({
+        'date_from': start,
+        'date_to': end,
+        'results': list(rows(start, end)),
+    })
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def sales_by_product_view(request):
+    """Units/revenue per product for ?date_from..?date_to (default last 30 days), from the daily rollups."""
+    return _sales_response(request, product_sales)
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def sales_by_category_view(request):
+    return _sales_response(request, category_sales)
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def sales_by_day_view(request):
+    return _sales_response(request, daily_sales)
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def inventory_view(request):
+    """
+    Paginated inventory grid for staff. Filters: q, category, stock=in|low|out,
+    is_listed/is_featured/is_sale=yes|no; sort=newest|oldest|name|-name|price|-price|stock|-stock.
+    """
+    products = filter_products(inventory_filters(request.query_params))
+    paginator = PageNumberPagination()
+    paginator.page_size = 50
+    page = paginator.paginate_queryset(products, request)
+    serializer = InventoryProductSerializer(page, many=True, context={'request': request})
+    return paginator.get_paginated_response(serializer.data)
+
+
+@api_view(['POST'])
+@permission_classes([IsAdminUser])
+def inventory_adjust_view(request):
+    """
+    Bulk stock changes for warehouse syncs. Body: a list of
+    {"sku" | "id", "delta" | "absolute"}, or {"adjustments": [...], "reason": "..."}.
+    Valid entries are applied even if others fail; failures come back in "errors".
+    """
+    data = request.data
+    reason = ''
+    if isinstance(data, dict):
+        reason = str(data.get('reason') or '')[:255]
+        data = data.get('adjustments')
+
+    result = apply_stock_adjustments(data, user=request.user, reason=reason)
+    if result['applied']:
+        DashboardMetrics.invalidate()
+    code = status.HTTP_200_OK if result['applied'] or not result['errors'] else status.HTTP_400_BAD_REQUEST
+    return Response(result, status=code)
@@ -100,7 +100,6 @@ class CartTotalView(APIView):
     def get(self, request):
         cart = get_object_or_404(Cart, user=request.user)
         total = 0
-        for item in cart.items.all():
-            price = item.product.sale_price if item.product.is_sale else item.product.price
-            total += price * item.quantity
+        for item in cart.items.select_related('product'):
+            total += item.product.effective_price * item.quantity
         return Response({'total': total})
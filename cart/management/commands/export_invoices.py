@@ -0,0 +1,130 @@
+import csv
+import os
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Prefetch
+
+from cart.models import Order, OrderItem
+from cart.utils import invoice_fingerprint, render_invoice
+
+MANIFEST_FIELDS = ["order_id", "date_ordered", "customer", "email", "amount_paid", "payment_status", "file", "sha256", "source"]
+
+
+def _init_worker():
+    # Needed under the "spawn" start method; forked workers already have the app registry
+    import django
+    from django.apps import apps
+    if not apps.ready:
+        django.setup()
+
+
+def _render(job):
+    """Pool task: renders one invoice from pickled, fully prefetched instances (no queries)."""
+    order, items = job
+    return render_invoice(order, items)
+
+
+class Command(BaseCommand):
+    help = (
+        "Writes the invoices of all orders placed between --from and --to (inclusive) "
+        "into a ZIP, rendering PDFs in a process pool, plus a CSV manifest. Orders are "
+        "read in chunks and at most a few chunks of PDFs are held in memory at a time."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--from", dest="date_from", required=True, help="First order date, YYYY-MM-DD.")
+        parser.add_argument("--to", dest="date_to", required=True, help="Last order date, YYYY-MM-DD.")
+        parser.add_argument("--output", help="ZIP path (default invoices-<from>-<to>.zip).")
+        parser.add_argument("--manifest", help="Manifest CSV path (default: ZIP path with .csv).")
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+        parser.add_argument("--chunk-size", type=int, default=500, help="Orders fetched per query.")
+        parser.add_argument("--status", help="Only orders with this payment_status, e.g. Paid.")
+
+    def handle(self, *args, **options):
+        try:
+            date_from = date.fromisoformat(options["date_from"])
+            date_to = date.fromisoformat(options["date_to"])
+        except ValueError as e:
+            raise CommandError(f"Invalid date: {e}")
+        if date_from > date_to:
+            raise CommandError("--from must not be after --to")
+
+        output = options["output"] or f"invoices-{date_from}-{date_to}.zip"
+        manifest = options["manifest"] or os.path.splitext(output)[0] + ".csv"
+        chunk_size = options["chunk_size"]
+        workers = max(1, options["workers"])
+
+        orders = (
+            Order.objects.filter(date_ordered__date__gte=date_from, date_ordered__date__lte=date_to)
+            .select_related("user")
+            .prefetch_related(
+                Prefetch("items", queryset=OrderItem.objects.select_related("product").order_by("id"), to_attr="invoice_lines")
+            )
+            .order_by("id")
+        )
+        if options["status"]:
+            orders = orders.filter(payment_status=options["status"])
+
+        written = rendered = 0
+        with zipfile.ZipFile(output, "w", compression=zipfile.ZIP_DEFLATED) as bundle, \
+                open(manifest, "w", newline="", encoding="utf-8") as manifest_file, \
+                ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            writer = csv.writer(manifest_file)
+            writer.writerow(MANIFEST_FIELDS)
+
+            # Bounded window of in-flight work, written back in order as it completes
+            pending = deque()
+            max_pending = workers * 4
+
+            def flush(limit):
+                nonlocal written
+                while len(pending) > limit:
+                    order, fingerprint, result, source = pending.popleft()
+                    pdf = result.result() if source == "rendered" else result
+                    name = f"invoice-{order.id}.pdf"
+                    bundle.writestr(name, pdf)
+                    writer.writerow([
+                        order.id,
+                        order.date_ordered.isoformat(),
+                        order.full_name or order.user.get_full_name(),
+                        order.email or order.user.email,
+                        order.amount_paid,
+                        order.payment_status,
+                        name,
+                        fingerprint,
+                        source,
+                    ])
+                    written += 1
+                    if written % 1000 == 0:
+                        self.stdout.write(f"  {written} invoices written")
+
+            for order in orders.iterator(chunk_size=chunk_size):
+                items = order.invoice_lines
+                del order.invoice_lines  # don't pickle the items twice
+                fingerprint = invoice_fingerprint(order, items)
+                cached = self.read_cached(order, fingerprint)
+                if cached is not None:
+                    pending.append((order, fingerprint, cached, "cached"))
+                else:
+                    pending.append((order, fingerprint, pool.submit(_render, (order, items)), "rendered"))
+                    rendered += 1
+                flush(max_pending)
+            flush(0)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {written} invoices ({rendered} rendered, {written - rendered} from cache) to {output}; manifest {manifest}"
+        ))
+
+    def read_cached(self, order, fingerprint):
+        """Bytes of the invoice already stored by view_invoice, if it is still current."""
+        if not order.invoice_file or order.invoice_hash != fingerprint:
+            return None
+        try:
+            with order.invoice_file.open("rb") as f:
+                return f.read()
+        except OSError:
+            return None
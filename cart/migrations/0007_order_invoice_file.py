@@ -0,0 +1,23 @@
+# Generated by Django 4.2.18 on 2026-10-19 16:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cart', '0006_order_courier_service_order_payment_method_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='invoice_file',
+            field=models.FileField(blank=True, null=True, upload_to='invoices/'),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='invoice_hash',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+    ]
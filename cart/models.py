@@ -30,6 +30,9 @@ class Order(models.Model):
     shipped_at = models.DateTimeField(null=True, blank=True)
     is_delivered = models.BooleanField(default=False)
     delivered_at = models.DateTimeField(null=True, blank=True)
+    # Rendered PDF invoice (media storage) and the content hash it was rendered from
+    invoice_file = models.FileField(upload_to='invoices/', null=True, blank=True)
+    invoice_hash = models.CharField(max_length=64, blank=True, default='')
 
     def __str__(self):
         return f"Order {self.id}"
@@ -83,9 +86,7 @@ class CartItem(models.Model):
 
     @property
     def price(self):
-        if hasattr(self.product, 'is_sale') and self.product.is_sale:
-            return self.product.sale_price
-        return self.product.price
+        return self.product.effective_price
 
     @property
     def is_sale(self):
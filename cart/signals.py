@@ -0,0 +1,37 @@
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from store.models import Product
+from .models import Order, OrderItem
+
+# Order fields printed on the invoice (see utils.invoice_fingerprint)
+INVOICE_FIELDS = frozenset({'full_name', 'email', 'shipping_address', 'date_ordered', 'amount_paid'})
+
+
+def forget_invoices(orders):
+    """Marks stored invoices stale; view_invoice re-renders them on the next view."""
+    orders.exclude(invoice_hash='').update(invoice_hash='')
+
+
+@receiver(post_save, sender=Order)
+def order_changed(sender, instance, created, update_fields=None, **kwargs):
+    if not created and (update_fields is None or INVOICE_FIELDS & set(update_fields)):
+        forget_invoices(Order.objects.filter(pk=instance.pk))
+
+
+@receiver([post_save, post_delete], sender=OrderItem)
+def order_item_changed(sender, instance, **kwargs):
+    forget_invoices(Order.objects.filter(pk=instance.order_id))
+
+
+@receiver(post_init, sender=Product)
+def remember_product_name(sender, instance, **kwargs):
+    # __dict__, not the attribute: reading a deferred field would query per instance
+    instance._invoice_name = instance.__dict__.get('name')
+
+
+@receiver(post_save, sender=Product)
+def product_renamed(sender, instance, created, **kwargs):
+    if not created and instance._invoice_name is not None and instance.name != instance._invoice_name:
+        forget_invoices(Order.objects.filter(items__product=instance))
+    instance._invoice_name = instance.name
@@ -1,44 +1,162 @@
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import letter
+import hashlib
+import os
 from io import BytesIO
-from django.http import HttpResponse
+
+from django.core.files.base import ContentFile
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.utils import simpleSplit
+from reportlab.pdfgen import canvas
+
 from cart.models import Order
 
-def generate_invoice(order_id):
-    order = Order.objects.get(id=order_id)
+# Invoice layout, resolved once instead of per draw call. Bump
+# INVOICE_LAYOUT_VERSION whenever the layout changes so cached PDFs are re-rendered.
+INVOICE_LAYOUT_VERSION = 2
+PAGE_WIDTH, PAGE_HEIGHT = letter
+MARGIN = 50
+LINE_HEIGHT = 20
+FONT = "Helvetica"
+FONT_BOLD = "Helvetica-Bold"
+FONT_SIZE = 12
+TITLE_SIZE = 16
+# (header, x position, column width)
+COLUMNS = (
+    ("Product", 50, 190),
+    ("Quantity", 250, 90),
+    ("Price", 350, 90),
+    ("Total", 450, 110),
+)
+
+
+def invoice_items(order):
+    """Order items with their products in one query."""
+    return list(order.items.select_related('product').order_by('id'))
+
+
+def invoice_fingerprint(order, items):
+    """Content hash of everything printed on the invoice; used as file name part and ETag."""
+    parts = [
+        INVOICE_LAYOUT_VERSION,
+        order.id,
+        order.full_name or order.user.get_full_name(),
+        order.email or order.user.email,
+        order.shipping_address,
+        order.date_ordered.isoformat(),
+        order.amount_paid,
+    ]
+    parts += [(item.product.name, item.quantity, item.price) for item in items]
+    return hashlib.sha256(repr(parts).encode("utf-8")).hexdigest()
+
+
+def render_invoice(order, items):
+    """Renders the invoice PDF and returns its bytes. Long orders continue on extra pages."""
     buffer = BytesIO()
     p = canvas.Canvas(buffer, pagesize=letter)
-    width, height = letter
+    page = 1
+
+    def table_header(y):
+        p.setFont(FONT, FONT_SIZE)
+        for title, x, _ in COLUMNS:
+            p.drawString(x, y, title)
+        return y - LINE_HEIGHT
+
+    def new_page():
+        nonlocal page
+        p.setFont(FONT, 9)
+        p.drawString(PAGE_WIDTH - MARGIN - 40, MARGIN / 2, f"Page {page}")
+        p.showPage()
+        page += 1
+        p.setFont(FONT_BOLD, FONT_SIZE)
+        p.drawString(MARGIN, PAGE_HEIGHT - MARGIN, f"Invoice #{order.id} (continued)")
+        return table_header(PAGE_HEIGHT - MARGIN - 2 * LINE_HEIGHT)
 
     # Header
-    p.setFont("Helvetica-Bold", 16)
-    p.drawString(50, height - 50, f"Invoice #{order.id}")
-    
-    p.setFont("Helvetica", 12)
-    p.drawString(50, height - 80, f"Customer: {order.full_name or order.user.get_full_name()}")
-    p.drawString(50, height - 100, f"Email: {order.email or order.user.email}")
-    p.drawString(50, height - 120, f"Shipping Address: {order.shipping_address}")
-    p.drawString(50, height - 140, f"Date: {order.date_ordered.strftime('%d %B %Y')}")
-
-    # Table Header
-    p.drawString(50, height - 180, "Product")
-    p.drawString(250, height - 180, "Quantity")
-    p.drawString(350, height - 180, "Price")
-    p.drawString(450, height - 180, "Total")
-
-    y = height - 200
-    for item in order.items.all():
-        p.drawString(50, y, item.product.name)
-        p.drawString(250, y, str(item.quantity))
-        p.drawString(350, y, f"{item.price}")
-        p.drawString(450, y, f"{item.price * item.quantity}")
-        y -= 20
+    p.setFont(FONT_BOLD, TITLE_SIZE)
+    p.drawString(MARGIN, PAGE_HEIGHT - 50, f"Invoice #{order.id}")
+
+    p.setFont(FONT, FONT_SIZE)
+    y = PAGE_HEIGHT - 80
+    p.drawString(MARGIN, y, f"Customer: {order.full_name or order.user.get_full_name()}")
+    y -= LINE_HEIGHT
+    p.drawString(MARGIN, y, f"Email: {order.email or order.user.email}")
+    y -= LINE_HEIGHT
+    address_lines = [line for line in (order.shipping_address or "").splitlines() if line.strip()] or [""]
+    p.drawString(MARGIN, y, f"Shipping Address: {address_lines[0]}")
+    for line in address_lines[1:]:
+        y -= LINE_HEIGHT * 0.8
+        p.drawString(MARGIN + 110, y, line)
+    y -= LINE_HEIGHT
+    p.drawString(MARGIN, y, f"Date: {order.date_ordered.strftime('%d %B %Y')}")
+
+    y = table_header(y - 2 * LINE_HEIGHT)
+    name_width = COLUMNS[0][2]
+    for item in items:
+        name_lines = simpleSplit(item.product.name, FONT, FONT_SIZE, name_width) or [""]
+        row_height = LINE_HEIGHT + (len(name_lines) - 1) * FONT_SIZE
+        if y - row_height < MARGIN:
+            y = new_page()
+        for i, line in enumerate(name_lines):
+            p.drawString(COLUMNS[0][1], y - i * FONT_SIZE, line)
+        p.drawString(COLUMNS[1][1], y, str(item.quantity))
+        p.drawString(COLUMNS[2][1], y, f"{item.price}")
+        p.drawString(COLUMNS[3][1], y, f"{item.price * item.quantity}")
+        y -= row_height
 
     # Total
-    p.drawString(50, y - 20, f"Total Amount Paid: ₹ {order.amount_paid}")
-    
+    if y - LINE_HEIGHT < MARGIN:
+        y = new_page()
+    p.drawString(MARGIN, y - 20, f"Total Amount Paid: ₹ {order.amount_paid}")
+
+    if page > 1:
+        p.setFont(FONT, 9)
+        p.drawString(PAGE_WIDTH - MARGIN - 40, MARGIN / 2, f"Page {page}")
     p.showPage()
     p.save()
+    return buffer.getvalue()
+
+
+def stored_invoice(order):
+    """
+    The order's stored invoice if it is still current, checked without
+    loading the items: cart.signals clears invoice_hash when anything printed
+    changes, and the file name carries the layout version.
+    """
+    if order.invoice_hash and order.invoice_file and f"-v{INVOICE_LAYOUT_VERSION}-" in order.invoice_file.name:
+        return order.invoice_file
+    return None
 
+
+def get_invoice(order, items=None, fingerprint=None):
+    """
+    Returns the stored invoice file for an order, rendering it only when the
+    order's printed content changed since the last render (or it was never rendered).
+    """
+    if items is None:
+        items = invoice_items(order)
+    if fingerprint is None:
+        fingerprint = invoice_fingerprint(order, items)
+
+    name = f"order-{order.id}-v{INVOICE_LAYOUT_VERSION}-{fingerprint[:16]}.pdf"
+    if order.invoice_file and order.invoice_hash == fingerprint:
+        return order.invoice_file
+    if order.invoice_file and os.path.basename(order.invoice_file.name) == name:
+        # Marked stale by an edit that changed nothing printed: keep the file
+        order.invoice_hash = fingerprint
+        Order.objects.filter(pk=order.pk).update(invoice_hash=fingerprint)
+        return order.invoice_file
+
+    old_name = order.invoice_file.name if order.invoice_file else None
+    order.invoice_file.save(name, ContentFile(render_invoice(order, items)), save=False)
+    order.invoice_hash = fingerprint
+    # update() rather than save(): no signals, no auto_now fields touched
+    Order.objects.filter(pk=order.pk).update(invoice_file=order.invoice_file.name, invoice_hash=fingerprint)
+    if old_name and old_name != order.invoice_file.name:
+        order.invoice_file.storage.delete(old_name)
+    return order.invoice_file
+
+
+def generate_invoice(order_id):
+    order = Order.objects.select_related('user').get(id=order_id)
+    buffer = BytesIO(render_invoice(order, invoice_items(order)))
     buffer.seek(0)
     return buffer
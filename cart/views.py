@@ -42,7 +42,7 @@ def cart(request):
     cart, _ = Cart.objects.get_or_create(user=request.user)
     items = cart.items.select_related('product').all()
     total_quantity = sum(item.quantity for item in items)
-    order_total = sum((item.product.sale_price if item.product.is_sale else item.product.price) * item.quantity for item in items)
+    order_total = sum(item.product.effective_price * item.quantity for item in items)
 
     context = {
         'cart_items': items,
@@ -121,10 +121,7 @@ def checkout(request):
     cart = get_object_or_404(Cart, user=request.user)
     cart_items = cart.items.select_related('product').all()
     total_quantity = sum(item.quantity for item in cart_items)
-    order_total = sum(
-        (item.product.sale_price if item.product.is_sale else item.product.price) * item.quantity
-        for item in cart_items
-    )
+    order_total = sum(item.product.effective_price * item.quantity for item in cart_items)
 
     try:
         shipping_address = ShippingAddress.objects.get(user=request.user)
@@ -227,16 +224,26 @@ def order_detail(request, order_id):
     return render(request, 'users/order_detail.html', {'order': order})
 
 
-from django.http import HttpResponse
-from .utils import generate_invoice
+from django.http import HttpResponse, HttpResponseNotModified, FileResponse
+from .utils import get_invoice, stored_invoice
 
 def view_invoice(request, order_id):
-    order = Order.objects.get(id=order_id)
+    order = get_object_or_404(Order.objects.select_related('user'), id=order_id)
     if request.user != order.user:
         return HttpResponse("Unauthorized", status=401)
 
-    pdf_file = generate_invoice(order_id)
-    return HttpResponse(pdf_file, content_type='application/pdf')
+    # The invoice is rendered once and stored; the ETag is its content hash,
+    # so unchanged invoices are a 304 or a plain file read.
+    invoice = stored_invoice(order)
+    if invoice and f'"{order.invoice_hash}"' in request.headers.get('If-None-Match', ''):
+        response = HttpResponseNotModified()
+    else:
+        invoice = invoice or get_invoice(order)
+        response = FileResponse(invoice.open('rb'), content_type='application/pdf',
+                                as_attachment=False, filename=f"invoice-{order.id}.pdf")
+    response['ETag'] = f'"{order.invoice_hash}"'
+    response['Cache-Control'] = 'private, max-age=0, must-revalidate'
+    return response
 
 
 from django.shortcuts import render, get_object_or_404
@@ -26,6 +26,15 @@ load_dotenv(dotenv_path=ENV_FILE)
 # See https://docs.djangoproject.com/en/5.0/howto/deployment/checklist/
 RAZORPAY_KEY_ID = os.getenv("RAZORPAY_KEY_ID", "")
 RAZORPAY_KEY_SECRET = os.getenv("RAZORPAY_KEY_SECRET", "")
+# Secret set on the Razorpay dashboard webhook; /payment/webhook/razorpay/ rejects everything without it
+RAZORPAY_WEBHOOK_SECRET = os.getenv("RAZORPAY_WEBHOOK_SECRET", "")
+# Razorpay/RazorpayX HTTP client (payment.gateway); point RAZORPAY_API_URL at a local fake server in development
+RAZORPAY_API_URL = os.getenv("RAZORPAY_API_URL", "https://api.razorpay.com")
+RAZORPAY_HTTP_CONNECT_TIMEOUT = float(os.getenv("RAZORPAY_HTTP_CONNECT_TIMEOUT", "5"))
+RAZORPAY_HTTP_READ_TIMEOUT = float(os.getenv("RAZORPAY_HTTP_READ_TIMEOUT", "30"))
+RAZORPAY_HTTP_POOL_SIZE = int(os.getenv("RAZORPAY_HTTP_POOL_SIZE", "10"))
+RAZORPAY_HTTP_RETRIES = int(os.getenv("RAZORPAY_HTTP_RETRIES", "3"))
+RAZORPAY_HTTP_BACKOFF = float(os.getenv("RAZORPAY_HTTP_BACKOFF", "0.5"))
 
 RAZORPAYX_KEY_ID = os.getenv("RAZORPAYX_KEY_ID", "")
 RAZORPAYX_KEY_SECRET = os.getenv("RAZORPAYX_KEY_SECRET", "")
@@ -300,6 +309,23 @@ CORS_ALLOW_HEADERS = [
 
 
 CART_SESSION_ID = 'cart'
+
+# Worker id (0-1023) in user numbers (users.utils.ids). Leave unset and each process leases
+# its own from the database; only set it if every process gets a different value.
+USER_ID_WORKER = os.getenv("USER_ID_WORKER")
+# Defer MPTT renumbering of the MLM tree on signup; run `manage.py rebuild_mlm_tree` periodically
+MLM_TREE_DEFERRED_UPDATES = os.getenv("MLM_TREE_DEFERRED_UPDATES", "False").lower() in ("true", "1", "yes")
+# Give each top-level branch its own MPTT tree_id; split an existing tree with `manage.py partition_mlm_tree`
+MLM_TREE_PARTITIONED = os.getenv("MLM_TREE_PARTITIONED", "False").lower() in ("true", "1", "yes")
+# Backend for mlmtree.hierarchy uplines()/downline(): "closure" (MLMClosure table) or "mptt"
+MLM_HIERARCHY_BACKEND = os.getenv("MLM_HIERARCHY_BACKEND", "closure")
+# Seconds the admin portal dashboard counters stay cached (product/order saves also refresh them)
+DASHBOARD_METRICS_TTL = int(os.getenv("DASHBOARD_METRICS_TTL", "300"))
+# `manage.py process_payouts`: withdrawals claimed per batch and concurrent RazorpayX calls (keep <= RAZORPAY_HTTP_POOL_SIZE)
+PAYOUT_BATCH_SIZE = int(os.getenv("PAYOUT_BATCH_SIZE", "100"))
+PAYOUT_WORKERS = int(os.getenv("PAYOUT_WORKERS", "8"))
+# `manage.py reconcile_payouts`: RazorpayX status requests per second (0 = no limit)
+PAYOUT_RECONCILE_RATE = float(os.getenv("PAYOUT_RECONCILE_RATE", "20"))
 LOGIN_URL = '/users/login/' 
 
 
@@ -1,9 +1,11 @@
 from django.contrib import admin
+from django.core.exceptions import ValidationError
+from django.forms.models import BaseInlineFormSet
 from django.urls import path
 from django.shortcuts import render
 from django.utils.html import format_html
 from mptt.admin import MPTTModelAdmin
-from .models import MLMTree
+from .models import CommissionPlan, CommissionPlanCategory, CommissionPlanLevel, MLMTree
 
 class MLMTreeAdmin(MPTTModelAdmin):
     mptt_level_indent = 20
@@ -25,3 +27,32 @@ class MLMTreeAdmin(MPTTModelAdmin):
     view_tree_link.short_description = "MLM Tree"
 
 admin.site.register(MLMTree, MLMTreeAdmin)
+
+
+class CommissionPlanLevelFormSet(BaseInlineFormSet):
+    def clean(self):
+        super().clean()
+        levels = [
+            form.cleaned_data['percent'] for form in self.forms
+            if form.cleaned_data.get('percent') is not None and not form.cleaned_data.get('DELETE')
+        ]
+        total = sum(levels) + (self.instance.sponsor_percent or 0)
+        if total > 100:
+            raise ValidationError(f"Levels and sponsor add up to {total}%, more than 100%.")
+
+
+class CommissionPlanLevelInline(admin.TabularInline):
+    model = CommissionPlanLevel
+    formset = CommissionPlanLevelFormSet
+    extra = 0
+
+
+class CommissionPlanCategoryInline(admin.TabularInline):
+    model = CommissionPlanCategory
+    extra = 0
+
+
+@admin.register(CommissionPlan)
+class CommissionPlanAdmin(admin.ModelAdmin):
+    list_display = ("name", "is_active", "sponsor_percent", "cap_per_order", "updated_at")
+    inlines = [CommissionPlanLevelInline, CommissionPlanCategoryInline]
@@ -0,0 +1,219 @@
+from array import array
+from decimal import ROUND_DOWN, Decimal
+from itertools import groupby
+from operator import itemgetter
+
+from django.contrib.auth import get_user_model
+from django.db.models import Max
+
+from .hierarchy import uplines
+from .models import CommissionPlan
+
+User = get_user_model()
+
+UPLINE_LEVELS = 10
+# The default plan: each unit's special_commission_amount in 12 equal shares,
+# 10 uplines, 1 sponsor, 1 company
+COMMISSION_SHARES = 12
+# Plan percentages and multipliers are stored with 4 decimal places
+SCALE = 10_000
+# OrderItem columns read by order_item_rows() / evaluate_orders()
+ITEM_FIELDS = ('order_id', 'user_id', 'product_id', 'quantity', 'product__special_commission_amount', 'product__category_id')
+
+
+def to_paise(amount):
+    """Rupees (Decimal) to whole paise, rounded down."""
+    return int((Decimal(amount or 0) * 100).to_integral_value(ROUND_DOWN))
+
+
+def to_rupees(paise):
+    return Decimal(paise).scaleb(-2)
+
+
+def _scaled(value):
+    return int(Decimal(value) * SCALE)
+
+
+def company_id():
+    """The company account (first superuser), which takes whatever a plan doesn't pay out."""
+    return User.objects.filter(is_superuser=True).order_by('id').values_list('id', flat=True).first()
+
+
+class PlanSpec:
+    """
+    A commission plan reduced to integers. An item's commission base is its
+    special_commission_amount x quantity (x its category multiplier) in
+    paise; upline level n gets ``base * level_rates[n-1] // denominator``,
+    the sponsor likewise with ``sponsor_rate``, each only if their rank is at
+    least the level's minimum. Payouts are floored to the paisa and capped at
+    ``cap`` paise per user per order; everything left over goes to the
+    company, so an order's lines always add up to its bases exactly.
+    """
+
+    def __init__(self, level_rates, denominator, level_ranks=None, sponsor_rate=0, sponsor_rank=0,
+                 categories=None, cap=None, name=''):
+        self.name = name
+        self.level_rates = tuple(level_rates)
+        self.level_ranks = tuple(level_ranks or (0,) * len(self.level_rates))
+        self.denominator = denominator
+        self.sponsor_rate = sponsor_rate
+        self.sponsor_rank = sponsor_rank
+        self.categories = categories or {}  # category id -> multiplier x SCALE
+        self.cap = cap
+        self.depth = len(self.level_rates)
+
+    def __str__(self):
+        return self.name
+
+    @classmethod
+    def default(cls):
+        """The split used when no plan is active: 12 equal shares."""
+        return cls([1] * UPLINE_LEVELS, COMMISSION_SHARES, sponsor_rate=1, name='Default (12 equal shares)')
+
+    @classmethod
+    def from_plan(cls, plan):
+        levels = {level.level: level for level in plan.levels.all()}
+        depth = max(levels, default=0)
+        return cls(
+            [_scaled(levels[n].percent) if n in levels else 0 for n in range(1, depth + 1)],
+            100 * SCALE,
+            level_ranks=[levels[n].min_rank if n in levels else 0 for n in range(1, depth + 1)],
+            sponsor_rate=_scaled(plan.sponsor_percent),
+            sponsor_rank=plan.sponsor_min_rank,
+            categories={c.category_id: _scaled(c.multiplier) for c in plan.categories.all()},
+            cap=None if plan.cap_per_order is None else to_paise(plan.cap_per_order),
+            name=plan.name,
+        )
+
+    @classmethod
+    def active(cls):
+        plan = CommissionPlan.objects.active()
+        return cls.from_plan(plan) if plan else cls.default()
+
+    @classmethod
+    def load(cls, plan_id=None):
+        """The plan with ``plan_id``, or the active one when None."""
+        if plan_id is None:
+            return cls.active()
+        return cls.from_plan(CommissionPlan.objects.prefetch_related('levels', 'categories').get(pk=plan_id))
+
+    def evaluate(self, buyer_id, items, network):
+        """
+        Lines for one order. ``items`` are (product id, quantity, commission
+        per unit in paise, category id). Returns [(recipient id, level,
+        product id, quantity, paise)], level being 1-N, 'sponsor' or 'company'.
+        """
+        items = [item for item in items if item[1] > 0 and item[2] > 0]
+        bases = []
+        for _, quantity, unit, category in items:
+            multiplier = self.categories.get(category)
+            base = unit * quantity
+            bases.append(base if multiplier is None else base * multiplier // SCALE)
+        if not any(bases):
+            return []
+
+        payees = [
+            (recipient, level, rate)
+            for level, (recipient, rate, rank) in enumerate(
+                zip(network.chain(buyer_id, self.depth), self.level_rates, self.level_ranks), start=1
+            )
+            if rate and network.ranks[recipient] >= rank
+        ]
+        sponsor = network.sponsors[buyer_id]
+        if sponsor and self.sponsor_rate and network.ranks[sponsor] >= self.sponsor_rank:
+            payees.append((sponsor, 'sponsor', self.sponsor_rate))
+
+        lines = []
+        remaining = list(bases)
+        earned = {}
+        denominator = self.denominator
+        for recipient, level, rate in payees:
+            amounts = [base * rate // denominator for base in bases]
+            if self.cap is not None:
+                room = self.cap - earned.get(recipient, 0)
+                for i, amount in enumerate(amounts):
+                    amounts[i] = min(amount, room)
+                    room -= amounts[i]
+                earned[recipient] = self.cap - room
+            for i, amount in enumerate(amounts):
+                if amount:
+                    remaining[i] -= amount
+                    lines.append((recipient, level, items[i][0], items[i][1], amount))
+        if network.company:
+            for i, amount in enumerate(remaining):
+                if amount:
+                    lines.append((network.company, 'company', items[i][0], items[i][1], amount))
+        return lines
+
+
+class Network:
+    """
+    parent_node, parent_sponsor and rank by user id (0 for none), so upline
+    chains are walked in memory. load() reads the whole tree into flat arrays
+    indexed by user id in one query, for batch runs; for_buyer() fetches a
+    single buyer's chain through the hierarchy backend.
+    """
+
+    def __init__(self, parents, sponsors, ranks, company):
+        self.parents = parents
+        self.sponsors = sponsors
+        self.ranks = ranks
+        self.company = company
+
+    @classmethod
+    def load(cls, chunk_size=20000):
+        size = (User.objects.aggregate(top=Max('id'))['top'] or 0) + 1
+        parents = array('q', bytes(8 * size))
+        sponsors = array('q', bytes(8 * size))
+        ranks = array('H', bytes(2 * size))
+        rows = User.objects.values_list('id', 'parent_node_id', 'parent_sponsor_id', 'rank')
+        for pk, parent, sponsor, rank in rows.iterator(chunk_size=chunk_size):
+            parents[pk] = parent or 0
+            sponsors[pk] = sponsor or 0
+            ranks[pk] = rank
+        return cls(parents, sponsors, ranks, company_id())
+
+    @classmethod
+    def for_buyer(cls, buyer, depth):
+        chain = uplines(buyer, max_depth=depth) if depth else []
+        ids = [buyer.pk] + [user.pk for user in chain]
+        ranks = {user.pk: user.rank for user in chain}
+        sponsor = buyer.parent_sponsor_id or 0
+        if sponsor and sponsor not in ranks:
+            ranks[sponsor] = User.objects.filter(pk=sponsor).values_list('rank', flat=True).first() or 0
+        return cls(dict(zip(ids, ids[1:] + [0])), {buyer.pk: sponsor}, ranks, company_id())
+
+    def chain(self, user_id, depth):
+        """Upline ids of ``user_id``, nearest first, at most ``depth``."""
+        chain = []
+        node = self.parents[user_id]
+        while node and len(chain) < depth:
+            chain.append(node)
+            node = self.parents[node]
+        return chain
+
+
+def order_item_rows(items, chunk_size=5000):
+    """Streams the OrderItem queryset ``items`` as ITEM_FIELDS tuples, grouped by order."""
+    return items.order_by('order_id', 'id').values_list(*ITEM_FIELDS).iterator(chunk_size=chunk_size)
+
+
+def evaluate_orders(plan, rows, network):
+    """
+    Evaluates many orders in one pass, e.g. a day's orders re-run under a
+    new plan: ``rows`` from order_item_rows(), ``network`` from
+    Network.load(). Yields (order id, lines) for each order that pays out.
+    Nothing is written.
+    """
+    paise = {}
+    for order_id, group in groupby(rows, key=itemgetter(0)):
+        buyer_id = None
+        items = []
+        for _, buyer_id, product_id, quantity, commission, category_id in group:
+            unit = paise.get(commission)
+            if unit is None:
+                unit = paise[commission] = to_paise(commission)
+            items.append((product_id, quantity, unit, category_id))
+        lines = plan.evaluate(buyer_id, items, network)
+        if lines:
+            yield order_id, lines
@@ -0,0 +1,102 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+
+User = get_user_model()
+
+
+def uplines(user, max_depth=None):
+    """
+    Users above ``user`` in the placement tree, nearest first, at most
+    ``max_depth`` levels up (None for all).
+    """
+    if settings.MLM_HIERARCHY_BACKEND == 'mptt':
+        return _mptt_uplines(user, max_depth)
+
+    # Single filter() call so every condition applies to the same closure row
+    depth = {'descendant_links__depth__gte': 1}
+    if max_depth is not None:
+        depth['descendant_links__depth__lte'] = max_depth
+    qs = User.objects.filter(descendant_links__descendant=user, **depth)
+    return list(qs.order_by('descendant_links__depth'))
+
+
+def downline(user, max_depth=None):
+    """Queryset of users below ``user``, at most ``max_depth`` levels down (None for all)."""
+    if settings.MLM_HIERARCHY_BACKEND == 'mptt':
+        return _mptt_downline(user, max_depth)
+
+    depth = {'ancestor_links__depth__gte': 1}
+    if max_depth is not None:
+        depth['ancestor_links__depth__lte'] = max_depth
+    return User.objects.filter(ancestor_links__ancestor=user, **depth)
+
+
+def _mptt_uplines(user, max_depth):
+    node = getattr(user, 'mlm_tree', None)
+    if node is None:
+        return []
+    ancestors = [n.user for n in node.get_upline().select_related('user')]
+    ancestors.reverse()
+    return ancestors if max_depth is None else ancestors[:max_depth]
+
+
+def _mptt_downline(user, max_depth):
+    node = getattr(user, 'mlm_tree', None)
+    if node is None:
+        return User.objects.none()
+    nodes = node.get_downline()
+    if max_depth is not None:
+        if settings.MLM_TREE_PARTITIONED and node.is_company_root():
+            # Branch roots sit at level 0 of their own trees but are one level down
+            nodes = nodes.filter(level__lt=max_depth)
+        else:
+            nodes = nodes.filter(level__lte=node.level + max_depth)
+    return User.objects.filter(mlm_tree__in=nodes)
+
+
+def iter_closure_rows(parents):
+    """
+    Yields (ancestor, descendant, depth) for every pair in the forest given by
+    ``parents`` (node -> parent or None). Depth-first over an explicit path, so
+    memory stays O(depth) beyond the children map. Nodes on a parent cycle are
+    unreachable from any root and are skipped.
+    """
+    children = defaultdict(list)
+    roots = []
+    for node, parent in parents.items():
+        if parent is None or parent not in parents:
+            roots.append(node)
+        else:
+            children[parent].append(node)
+
+    for root in roots:
+        path = []
+        stack = [(root, 0)]
+        while stack:
+            node, level = stack.pop()
+            del path[level:]
+            path.append(node)
+            for depth, ancestor in enumerate(reversed(path)):
+                yield ancestor, node, depth
+            stack.extend((child, level + 1) for child in children[node])
+
+
+def rebuild_closure(user_model, closure_model, batch_size=5000):
+    """
+    Recreates the closure table from CustomUser.parent_node. Takes the models
+    as arguments so migrations can pass their historical versions.
+    """
+    parents = dict(user_model.objects.values_list('id', 'parent_node_id'))
+    closure_model.objects.all().delete()
+
+    batch, total = [], 0
+    for ancestor, descendant, depth in iter_closure_rows(parents):
+        batch.append(closure_model(ancestor_id=ancestor, descendant_id=descendant, depth=depth))
+        if len(batch) >= batch_size:
+            closure_model.objects.bulk_create(batch)
+            total += len(batch)
+            batch = []
+    closure_model.objects.bulk_create(batch)
+    return total + len(batch)
@@ -0,0 +1,133 @@
+import random
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+from django.test.utils import override_settings
+
+from mlmtree.hierarchy import downline, iter_closure_rows, uplines
+from mlmtree.models import MLMClosure, MLMTree
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares the MPTT and closure-table hierarchy backends on a synthetic "
+        "network (build, single insert, 10-level uplines, depth-bounded downline). "
+        "Everything runs in a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--nodes", type=int, default=1_000_000)
+        parser.add_argument("--fanout", type=int, default=5)
+        parser.add_argument("--samples", type=int, default=200)
+        parser.add_argument("--inserts", type=int, default=100)
+        parser.add_argument("--depth", type=int, default=3, help="Depth for downline queries.")
+        parser.add_argument("--batch-size", type=int, default=10000)
+
+    def handle(self, *args, **options):
+        random.seed(0)
+        with transaction.atomic():
+            self.run(**options)
+            transaction.set_rollback(True)
+
+    def run(self, nodes, fanout, samples, inserts, depth, batch_size, **options):
+        results = []
+
+        started = time.perf_counter()
+        levels = self.create_users(nodes, fanout, batch_size)
+        self.stdout.write(f"Created {nodes} users in {time.perf_counter() - started:.1f}s")
+        user_ids = [pk for level in levels for pk, _ in level]
+        parents = {pk: parent for level in levels for pk, parent in level}
+
+        # Build
+        started = time.perf_counter()
+        tree_id = (MLMTree.objects.aggregate(m=Max("tree_id"))["m"] or 0) + 1
+        node_ids = {}
+        with MLMTree.objects.disable_mptt_updates():
+            for level in levels:
+                batch = [
+                    MLMTree(user_id=pk, parent_id=node_ids.get(parent), lft=0, rght=0, tree_id=tree_id, level=0)
+                    for pk, parent in level
+                ]
+                MLMTree.objects.bulk_create(batch, batch_size=batch_size)
+                node_ids.update((node.user_id, node.pk) for node in batch)
+        MLMTree.objects.partial_rebuild(tree_id, batch_size=batch_size)
+        results.append(("build", "mptt", time.perf_counter() - started, 1))
+
+        started = time.perf_counter()
+        # Streamed in batches: the closure of a 1M-node tree is ~9M rows
+        batch, closure_rows = [], 0
+        for a, d, dep in iter_closure_rows(parents):
+            batch.append(MLMClosure(ancestor_id=a, descendant_id=d, depth=dep))
+            if len(batch) >= batch_size:
+                MLMClosure.objects.bulk_create(batch)
+                closure_rows += len(batch)
+                batch = []
+        MLMClosure.objects.bulk_create(batch)
+        closure_rows += len(batch)
+        results.append(("build", "closure", time.perf_counter() - started, 1))
+        self.stdout.write(f"Closure rows: {closure_rows}")
+
+        # Single inserts of new leaves under random existing nodes
+        targets = random.sample(user_ids, min(inserts, len(user_ids)))
+        new_users = User.objects.bulk_create(
+            [User(email=f"bench-new-{i}@bench.invalid", password="!", parent_node_id=t) for i, t in enumerate(targets)]
+        )
+        parent_nodes = {node.user_id: node for node in MLMTree.objects.filter(user_id__in=targets)}
+
+        started = time.perf_counter()
+        for user in new_users:
+            MLMTree.objects.create(user=user, parent=parent_nodes[user.parent_node_id])
+        results.append(("insert", "mptt", time.perf_counter() - started, len(new_users)))
+
+        started = time.perf_counter()
+        for user in new_users:
+            MLMClosure.objects.add_node(user)
+        results.append(("insert", "closure", time.perf_counter() - started, len(new_users)))
+
+        # Queries
+        leaves = [User(pk=pk) for pk in random.sample(user_ids[len(user_ids) // 2:], min(samples, len(user_ids) // 2))]
+        heads = [User(pk=pk) for pk in random.sample(user_ids[: max(1, len(user_ids) // 50)], min(samples, max(1, len(user_ids) // 50)))]
+        for backend in ("mptt", "closure"):
+            with override_settings(MLM_HIERARCHY_BACKEND=backend):
+                started = time.perf_counter()
+                for user in leaves:
+                    uplines(user, max_depth=10)
+                results.append(("uplines(10)", backend, time.perf_counter() - started, len(leaves)))
+
+                started = time.perf_counter()
+                for user in heads:
+                    downline(user, max_depth=depth).count()
+                results.append((f"downline({depth}).count", backend, time.perf_counter() - started, len(heads)))
+
+        self.stdout.write("")
+        self.stdout.write(f"{'operation':<24}{'backend':<10}{'total s':>10}{'per op ms':>12}")
+        order = list(dict.fromkeys(operation for operation, *_ in results))
+        for operation, backend, seconds, count in sorted(results, key=lambda r: order.index(r[0])):
+            self.stdout.write(f"{operation:<24}{backend:<10}{seconds:>10.2f}{seconds / count * 1000:>12.2f}")
+
+    def create_users(self, nodes, fanout, batch_size):
+        """Complete ``fanout``-ary tree, created level by level. Returns [(pk, parent_pk)] per level."""
+        levels = []
+        parents = [None]
+        created = 0
+        while created < nodes:
+            level = []
+            for parent in parents:
+                for _ in range(1 if parent is None else fanout):
+                    if created + len(level) >= nodes:
+                        break
+                    level.append(parent)
+            users = [
+                User(email=f"bench-{created + i}@bench.invalid", password="!", parent_node_id=parent)
+                for i, parent in enumerate(level)
+            ]
+            User.objects.bulk_create(users, batch_size=batch_size)
+            levels.append([(u.pk, p) for u, p in zip(users, level)])
+            parents = [u.pk for u in users]
+            created += len(users)
+        return levels
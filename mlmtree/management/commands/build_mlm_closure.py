@@ -0,0 +1,18 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from mlmtree.hierarchy import rebuild_closure
+from mlmtree.models import MLMClosure
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the MLMClosure table from CustomUser.parent_node (e.g. after moving users in the admin)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            total = rebuild_closure(get_user_model(), MLMClosure, batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Wrote {total} closure rows."))
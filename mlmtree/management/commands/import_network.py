@@ -0,0 +1,275 @@
+import csv
+from collections import defaultdict, deque
+from itertools import chain
+
+from django.contrib.auth.hashers import identify_hasher, make_password
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from mlmtree.models import MLMClosure, MLMTree
+from users.models import CustomUser, Profile
+from users.utils.ids import referral_code_for
+from wallet.models import Wallet
+
+MAX_CHILDREN = 5
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk import a distributor network from a CSV file with columns "
+        "email, first_name, last_name, sponsor, placement[, phone, password]. "
+        "sponsor/placement are emails of users in the file or already in the "
+        "database; an empty placement is auto-placed like a normal signup. "
+        "password should be a Django password hash; users without one get an "
+        "unusable password and set theirs through the password reset page."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--delimiter", default=",")
+        parser.add_argument("--batch-size", type=int, default=2000)
+        parser.add_argument("--dry-run", action="store_true", help="Validate and place rows without writing.")
+        parser.add_argument(
+            "--hash-passwords", action="store_true",
+            help="Hash plain-text passwords from the file. Slow: a full PBKDF2 hash per row.",
+        )
+
+    def handle(self, *args, **options):
+        rows = self.read_rows(options["path"], options["delimiter"])
+        if not rows:
+            self.stdout.write("Nothing to import.")
+            return
+
+        root = CustomUser.objects.filter(is_superuser=True).order_by("id").first()
+        if root is None:
+            raise CommandError("Create the company superuser before importing a network.")
+
+        existing = dict(CustomUser.objects.values_list("email", "id"))
+        clashes = [email for email in rows if email in existing]
+        if clashes:
+            raise CommandError(f"{len(clashes)} users already exist, e.g. {clashes[0]}")
+
+        self.check_passwords(rows, options["hash_passwords"])
+        self.place_rows(rows, root.email, existing)
+        # After place_rows, so auto-placed rows are checked as well
+        self.check_placements(rows, existing)
+        generations = self.generations(rows)
+        self.stdout.write(f"Placed {len(rows)} users in {len(generations)} generations.")
+
+        if options["dry_run"]:
+            return
+
+        batch_size = options["batch_size"]
+        with transaction.atomic():
+            # bulk_create sends no post_save, so the per-user signals (profile,
+            # BFS placement, MPTT insert, wallet) are skipped and done here in bulk.
+            ids = dict(existing)
+            tree_ids = dict(MLMTree.objects.values_list("user__email", "id"))
+            # Same rule as MLMTreeManager.place(): partitioned branches under the
+            # company are roots of their own trees
+            company = MLMTree.objects.company_root()
+            detached = company.pk if company and settings.MLM_TREE_PARTITIONED else None
+            chains = self.existing_chains(rows, existing)
+
+            with MLMTree.objects.disable_mptt_updates():
+                for generation in generations:
+                    users = [self.build_user(rows[email], ids) for email in generation]
+                    CustomUser.objects.bulk_create(users, batch_size=batch_size)
+                    self.collect_ids(users, ids)
+
+                    Profile.objects.bulk_create(
+                        [Profile(user_id=u.pk, phone=rows[u.email]["phone"]) for u in users],
+                        batch_size=batch_size,
+                    )
+                    Wallet.objects.bulk_create([Wallet(user_id=u.pk) for u in users], batch_size=batch_size)
+
+                    nodes = []
+                    for u in users:
+                        parent = tree_ids[rows[u.email]["placement"]]
+                        nodes.append(MLMTree(
+                            user_id=u.pk,
+                            parent_id=None if parent == detached else parent,
+                            lft=0, rght=0, tree_id=0, level=0,
+                        ))
+                    closure = []
+                    for u in users:
+                        chain = [u.pk] + chains[u.parent_node_id]
+                        chains[u.pk] = chain
+                        closure += [
+                            MLMClosure(ancestor_id=ancestor, descendant_id=u.pk, depth=depth)
+                            for depth, ancestor in enumerate(chain)
+                        ]
+                    MLMClosure.objects.bulk_create(closure, batch_size=batch_size)
+
+                    MLMTree.objects.bulk_create(nodes, batch_size=batch_size)
+                    for user, node in zip(users, nodes):
+                        tree_ids[user.email] = node.pk
+                    if any(node.pk is None for node in nodes):
+                        tree_ids.update(
+                            MLMTree.objects.filter(user_id__in=[u.pk for u in users])
+                            .values_list("user__email", "id")
+                        )
+
+            # One pass over the parent links instead of an MPTT insert per user
+            MLMTree.objects.rebuild(batch_size=batch_size)
+
+        self.stdout.write(self.style.SUCCESS(f"Imported {len(rows)} users."))
+
+    def read_rows(self, path, delimiter):
+        rows = {}
+        with open(path, newline="", encoding="utf-8") as fh:
+            for line, record in enumerate(csv.DictReader(fh, delimiter=delimiter), start=2):
+                email = CustomUser.objects.normalize_email((record.get("email") or "").strip())
+                if not email:
+                    raise CommandError(f"Line {line}: missing email")
+                if email in rows:
+                    raise CommandError(f"Line {line}: duplicate email {email}")
+                rows[email] = {
+                    "email": email,
+                    "first_name": (record.get("first_name") or "").strip(),
+                    "last_name": (record.get("last_name") or "").strip(),
+                    "sponsor": CustomUser.objects.normalize_email((record.get("sponsor") or "").strip()),
+                    "placement": CustomUser.objects.normalize_email((record.get("placement") or "").strip()),
+                    "phone": (record.get("phone") or "").strip(),
+                    "password": record.get("password") or None,
+                }
+        return rows
+
+    def check_passwords(self, rows, hash_plain):
+        """Keeps hashed passwords as they are; plain ones are hashed only with --hash-passwords."""
+        plain = 0
+        for row in rows.values():
+            if row["password"] is None:
+                continue
+            try:
+                identify_hasher(row["password"])
+            except ValueError:
+                plain += 1
+                if not hash_plain:
+                    raise CommandError(
+                        f"{row['email']}: password is not a Django password hash "
+                        "(use --hash-passwords to hash plain-text passwords)"
+                    )
+                row["password"] = make_password(row["password"])
+        if plain:
+            self.stdout.write(f"Hashed {plain} plain-text passwords.")
+        missing = sum(row["password"] is None for row in rows.values())
+        if missing:
+            self.stdout.write(f"{missing} users have no password and must use the password reset page.")
+
+    def check_placements(self, rows, existing):
+        """
+        Existing users used as placements, given or auto-placed, must already
+        be in the tree, or their downline would become a new root.
+        """
+        placements = {row["placement"] for row in rows.values() if row["placement"] in existing}
+        placed = set(MLMTree.objects.filter(user__email__in=placements).values_list("user__email", flat=True))
+        missing = sorted(placements - placed)
+        if missing:
+            row = next(row for row in rows.values() if row["placement"] == missing[0])
+            raise CommandError(
+                f"{row['email']}: placement {missing[0]} has no MLM tree node "
+                f"({len(missing)} such placement users; place them in the tree first)"
+            )
+
+    def place_rows(self, rows, root_email, existing):
+        """
+        Fill in sponsor/placement the way users.signals does for a single
+        signup: sponsor defaults to the company, placement is the first node
+        with fewer than 5 children in BFS order below the sponsor.
+        """
+        children = defaultdict(list)
+        for email, parent in CustomUser.objects.filter(parent_node__isnull=False).values_list(
+            "email", "parent_node__email"
+        ):
+            children[parent].append(email)
+
+        known = set(existing) | set(rows)
+        for row in rows.values():
+            if not row["sponsor"]:
+                row["sponsor"] = root_email
+            for ref in ("sponsor", "placement"):
+                if row[ref] and row[ref] not in known:
+                    raise CommandError(f"{row['email']}: unknown {ref} {row[ref]}")
+            if row["placement"]:
+                children[row["placement"]].append(row["email"])
+
+        # Sponsors are placed before the users they referred. One BFS frontier
+        # per sponsor: nodes only gain children during the import and full
+        # nodes stay full, so the frontier never has to restart.
+        frontiers = {}
+        for email in chain.from_iterable(self.generations(rows, refs=("sponsor",))):
+            row = rows[email]
+            if row["placement"]:
+                continue
+            queue = frontiers.setdefault(row["sponsor"], deque([row["sponsor"]]))
+            while len(children[queue[0]]) >= MAX_CHILDREN:
+                queue.extend(children[queue.popleft()])
+            row["placement"] = queue[0]
+            children[queue[0]].append(row["email"])
+
+    def generations(self, rows, refs=("sponsor", "placement")):
+        """Groups rows so every sponsor/placement is created before its downline."""
+        depth = {}
+        for start in rows:
+            if start in depth:
+                continue
+            stack, on_stack = [start], {start}
+            while stack:
+                email = stack[-1]
+                row = rows[email]
+                parents = [row[ref] for ref in refs]
+                pending = [ref for ref in dict.fromkeys(parents) if ref in rows and ref not in depth]
+                if not pending:
+                    depth[email] = 1 + max(depth.get(ref, 0) for ref in parents)
+                    on_stack.discard(stack.pop())
+                    continue
+                # Descend one parent at a time so the stack is always a path
+                ref = pending[0]
+                if ref in on_stack:
+                    raise CommandError(f"Sponsor/placement cycle involving {email}")
+                stack.append(ref)
+                on_stack.add(ref)
+
+        grouped = defaultdict(list)
+        for email, level in depth.items():
+            grouped[level].append(email)
+        return [grouped[level] for level in sorted(grouped)]
+
+    def existing_chains(self, rows, existing):
+        """Ancestor ids (nearest first, self included) of existing users used as placements."""
+        placements = {existing[row["placement"]] for row in rows.values() if row["placement"] in existing}
+        links = defaultdict(list)
+        for descendant, ancestor, depth in MLMClosure.objects.filter(descendant_id__in=placements).values_list(
+            "descendant_id", "ancestor_id", "depth"
+        ):
+            links[descendant].append((depth, ancestor))
+        return {user_id: [ancestor for _, ancestor in sorted(links[user_id])] for user_id in placements}
+
+    def build_user(self, row, ids):
+        user = CustomUser(
+            email=row["email"],
+            first_name=row["first_name"],
+            last_name=row["last_name"],
+            parent_sponsor_id=ids[row["sponsor"]],
+            parent_node_id=ids[row["placement"]],
+        )
+        if row["password"]:
+            user.password = row["password"]
+        else:
+            user.set_unusable_password()
+        user.unique_id = user.generate_unique_id()
+        user.referral_code = referral_code_for(user.unique_id)
+        return user
+
+    def collect_ids(self, users, ids):
+        if any(u.pk is None for u in users):
+            # Backends without RETURNING support
+            created = dict(
+                CustomUser.objects.filter(email__in=[u.email for u in users]).values_list("email", "id")
+            )
+            for user in users:
+                user.pk = created[user.email]
+        for user in users:
+            ids[user.email] = user.pk
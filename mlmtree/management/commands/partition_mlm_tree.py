@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from mlmtree.models import MLMTree
+
+
+class Command(BaseCommand):
+    help = (
+        "Splits the MLM tree so each branch directly under the company gets its "
+        "own MPTT tree_id (use with MLM_TREE_PARTITIONED). --merge puts the "
+        "branches back under the company node."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--merge", action="store_true", help="Undo the split.")
+
+    def handle(self, *args, **options):
+        company = MLMTree.objects.company_root()
+        if company is None:
+            raise CommandError("No company (superuser) root node found.")
+
+        with transaction.atomic():
+            # Only parent links change here; rebuild() recomputes tree_id/lft/rght
+            # and gives every root its own tree_id.
+            with MLMTree.objects.disable_mptt_updates():
+                if options["merge"]:
+                    moved = MLMTree.objects.filter(parent=None).exclude(pk=company.pk).update(parent=company)
+                else:
+                    moved = MLMTree.objects.filter(parent=company).update(parent=None)
+            MLMTree.objects.rebuild()
+
+        action = "Merged" if options["merge"] else "Split off"
+        self.stdout.write(self.style.SUCCESS(f"{action} {moved} branches."))
@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from mlmtree.models import MLMTree
+
+
+class Command(BaseCommand):
+    help = (
+        "Applies deferred MPTT renumbering for MLM tree nodes inserted with "
+        "MLM_TREE_DEFERRED_UPDATES. Run from cron, or with --interval as a worker."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--interval", type=int, default=0, help="Repeat every N seconds instead of running once.")
+        parser.add_argument("--full", action="store_true", help="Rebuild every tree, not only trees with pending nodes.")
+
+    def handle(self, *args, **options):
+        while True:
+            if options["full"]:
+                # All or nothing: a crash halfway would leave lft/rght half rewritten
+                with transaction.atomic():
+                    pending = list(MLMTree.objects.filter(needs_rebuild=True).values_list("pk", flat=True))
+                    MLMTree.objects.rebuild()
+                    MLMTree.objects.filter(pk__in=pending).update(needs_rebuild=False)
+                self.stdout.write("Rebuilt all trees.")
+            else:
+                tree_ids = MLMTree.objects.rebuild_pending()
+                if tree_ids:
+                    self.stdout.write(f"Rebuilt tree ids: {', '.join(map(str, tree_ids))}")
+
+            if not options["interval"]:
+                break
+            time.sleep(options["interval"])
@@ -0,0 +1,81 @@
+import csv
+import datetime
+import sys
+import time
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from cart.models import OrderItem
+from mlmtree.commissions import Network, PlanSpec, evaluate_orders, order_item_rows, to_rupees
+from mlmtree.models import CommissionPlan
+
+
+class Command(BaseCommand):
+    help = (
+        "Replays historical order items under a commission plan and writes what "
+        "each user would have earned per level as CSV (user_id, level, items, "
+        "amount). Read-only: no wallet or transaction is touched."
+    )
+
+    def add_arguments(self, parser):
+        plan = parser.add_mutually_exclusive_group()
+        plan.add_argument("--plan", type=int, help="CommissionPlan id to simulate (default: the active plan).")
+        plan.add_argument("--default", action="store_true", help="Simulate the default 12-share split.")
+        parser.add_argument("--from", dest="date_from", help="First order date, YYYY-MM-DD.")
+        parser.add_argument("--to", dest="date_to", help="Last order date, YYYY-MM-DD (inclusive).")
+        parser.add_argument("--output", default="-", help="CSV file to write (default: stdout).")
+        parser.add_argument("--chunk-size", type=int, default=5000, help="Order items fetched per round trip.")
+
+    def handle(self, *args, **options):
+        try:
+            plan = PlanSpec.default() if options["default"] else PlanSpec.load(options["plan"])
+        except CommissionPlan.DoesNotExist:
+            raise CommandError(f"No commission plan {options['plan']}")
+
+        items = OrderItem.objects.all()
+        for option, lookup, days in (("date_from", "gte", 0), ("date_to", "lt", 1)):
+            if options[option]:
+                try:
+                    day = datetime.date.fromisoformat(options[option]) + datetime.timedelta(days=days)
+                except ValueError:
+                    raise CommandError(f"--{option[5:]} must be YYYY-MM-DD")
+                start = timezone.make_aware(datetime.datetime.combine(day, datetime.time.min))
+                items = items.filter(**{f"order__date_ordered__{lookup}": start})
+
+        started = time.perf_counter()
+        network = Network.load()
+        self.stderr.write(f"Loaded the network in {time.perf_counter() - started:.1f}s; plan: {plan}")
+
+        # (user, level) -> [lines, paise]
+        totals = defaultdict(lambda: [0, 0])
+        orders = 0
+        for orders, (_, lines) in enumerate(
+            evaluate_orders(plan, order_item_rows(items, options["chunk_size"]), network), start=1
+        ):
+            for recipient, level, _, _, paise in lines:
+                total = totals[recipient, level]
+                total[0] += 1
+                total[1] += paise
+            if orders % 100_000 == 0:
+                self.stderr.write(f"{orders} orders, {time.perf_counter() - started:.0f}s")
+
+        by_level = defaultdict(int)
+        output = sys.stdout if options["output"] == "-" else open(options["output"], "w", newline="")
+        try:
+            writer = csv.writer(output)
+            writer.writerow(["user_id", "level", "items", "amount"])
+            for (recipient, level), (count, paise) in sorted(totals.items(), key=lambda row: (row[0][0], str(row[0][1]))):
+                writer.writerow([recipient, level, count, to_rupees(paise)])
+                by_level[level] += paise
+        finally:
+            if output is not sys.stdout:
+                output.close()
+
+        for level, paise in sorted(by_level.items(), key=lambda row: str(row[0]).zfill(3)):
+            self.stderr.write(f"  {level}: {to_rupees(paise)}")
+        self.stderr.write(
+            f"Done: {orders} orders paying commission, {len(totals)} user/level totals, "
+            f"{to_rupees(sum(by_level.values()))} in all, {time.perf_counter() - started:.1f}s"
+        )
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.18 on 2026-10-19 15:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mlmtree', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mlmtree',
+            name='needs_rebuild',
+            field=models.BooleanField(db_index=True, default=False),
+        ),
+    ]
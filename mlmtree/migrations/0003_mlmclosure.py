@@ -0,0 +1,32 @@
+# Generated by Django 4.2.18 on 2026-10-19 15:58
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('mlmtree', '0002_mlmtree_needs_rebuild'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MLMClosure',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('depth', models.PositiveIntegerField()),
+                ('ancestor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='descendant_links', to=settings.AUTH_USER_MODEL)),
+                ('descendant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ancestor_links', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['ancestor', 'depth'], name='mlmclosure_ancestor_depth'), models.Index(fields=['descendant', 'depth'], name='mlmclosure_descendant_depth')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='mlmclosure',
+            constraint=models.UniqueConstraint(fields=('ancestor', 'descendant'), name='mlmclosure_unique_pair'),
+        ),
+    ]
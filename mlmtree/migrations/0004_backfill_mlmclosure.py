@@ -0,0 +1,18 @@
+from django.db import migrations
+
+
+def backfill(apps, schema_editor):
+    from mlmtree.hierarchy import rebuild_closure
+
+    rebuild_closure(apps.get_model('users', 'CustomUser'), apps.get_model('mlmtree', 'MLMClosure'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mlmtree', '0003_mlmclosure'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 4.2.18 on 2026-10-19 16:30
+
+from decimal import Decimal
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0008_priceschedule'),
+        ('mlmtree', '0004_backfill_mlmclosure'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CommissionPlan',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('is_active', models.BooleanField(default=False)),
+                ('sponsor_percent', models.DecimalField(decimal_places=4, default=Decimal('0'), max_digits=7)),
+                ('sponsor_min_rank', models.PositiveSmallIntegerField(default=0)),
+                ('cap_per_order', models.DecimalField(blank=True, decimal_places=2, help_text='Most one user can earn from one order; the excess goes to the company.', max_digits=12, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='CommissionPlanLevel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('level', models.PositiveSmallIntegerField(help_text="1 is the buyer's parent_node.")),
+                ('percent', models.DecimalField(decimal_places=4, max_digits=7)),
+                ('min_rank', models.PositiveSmallIntegerField(default=0)),
+                ('plan', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='levels', to='mlmtree.commissionplan')),
+            ],
+            options={
+                'ordering': ['level'],
+            },
+        ),
+        migrations.CreateModel(
+            name='CommissionPlanCategory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('multiplier', models.DecimalField(decimal_places=4, help_text='Scales the commission base of products in this category; 0 pays nothing on them.', max_digits=6)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='store.category')),
+                ('plan', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='categories', to='mlmtree.commissionplan')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='commissionplan',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_active', True)), fields=('is_active',), name='commission_plan_one_active'),
+        ),
+        migrations.AddConstraint(
+            model_name='commissionplanlevel',
+            constraint=models.UniqueConstraint(fields=('plan', 'level'), name='commission_plan_level_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='commissionplancategory',
+            constraint=models.UniqueConstraint(fields=('plan', 'category'), name='commission_plan_category_unique'),
+        ),
+    ]
@@ -1,13 +1,72 @@
-from django.db import models
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import models, transaction
+from mptt.managers import TreeManager
 from mptt.models import MPTTModel, TreeForeignKey
 from django.contrib.auth import get_user_model
 
 User = get_user_model()  # ✅ Fix: Avoid circular import
 
+
+class MLMTreeManager(TreeManager):
+    def company_root(self):
+        """The company (superuser) node at the top of the network."""
+        return (
+            self.filter(parent=None, user__is_superuser=True)
+            .select_related('user')
+            .order_by('tree_id')
+            .first()
+        )
+
+    def place(self, user, parent=None):
+        """
+        Creates the tree node for a user under ``parent``.
+
+        With MLM_TREE_PARTITIONED, users placed directly under the company
+        start their own tree (own tree_id); the company stays their parent in
+        code only, so inserts in different branches never renumber each other.
+
+        With MLM_TREE_DEFERRED_UPDATES the parent link is stored right away
+        but MPTT renumbering (an UPDATE of every node to the right) is skipped;
+        the node is flagged and ``rebuild_pending()`` fixes the tree later.
+        """
+        if parent is not None and settings.MLM_TREE_PARTITIONED and parent.is_company_root():
+            parent = None
+        if parent is None:
+            # mptt gives a new root max(tree_id) + 1 without a lock; serialise
+            # root inserts on the company node so two signups can't share one
+            with transaction.atomic():
+                list(
+                    self.select_for_update(of=('self',))
+                    .filter(parent=None, user__is_superuser=True)
+                    .values_list('pk', flat=True)[:1]
+                )
+                return self.create(user=user, parent=None)
+        if settings.MLM_TREE_DEFERRED_UPDATES:
+            with self.disable_mptt_updates():
+                return self.create(user=user, parent=parent, needs_rebuild=True)
+        return self.create(user=user, parent=parent)
+
+    def rebuild_pending(self):
+        """Partially rebuilds every tree that has deferred nodes. Returns the tree ids rebuilt."""
+        pending = list(self.filter(needs_rebuild=True).values_list('pk', 'tree_id'))
+        tree_ids = sorted({tree_id for _, tree_id in pending})
+        for tree_id in tree_ids:
+            with transaction.atomic():
+                self.partial_rebuild(tree_id)
+        # Only clear the nodes seen above; later inserts wait for the next run
+        self.filter(pk__in=[pk for pk, _ in pending]).update(needs_rebuild=False)
+        return tree_ids
+
+
 class MLMTree(MPTTModel):
     """Model to store MLM hierarchical structure using MPTT."""
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name="mlm_tree")
     parent = TreeForeignKey('self', on_delete=models.SET_NULL, null=True, blank=True, related_name='children')
+    needs_rebuild = models.BooleanField(default=False, db_index=True)
+
+    objects = MLMTreeManager()
 
     class MPTTMeta:
         order_insertion_by = ['user']
@@ -15,10 +74,167 @@ class MLMTree(MPTTModel):
     def __str__(self):
         return f"{self.user.first_name} {self.user.last_name} ({self.user.unique_id})"
 
+    def is_company_root(self):
+        return self.parent_id is None and self.user.is_superuser
+
+    def get_logical_parent(self):
+        """Parent node, resolving the virtual company root for partitioned branches."""
+        if self.parent_id is not None or not settings.MLM_TREE_PARTITIONED or self.is_company_root():
+            return self.parent
+        return MLMTree.objects.company_root()
+
     def get_downline(self):
-        """Returns all users under this user in the hierarchy."""
+        """Returns all users under this user in the hierarchy.
+
+        lft/rght based, so nodes still waiting for a deferred rebuild are
+        missing until ``rebuild_mlm_tree`` runs. get_children() is always current.
+        """
+        if settings.MLM_TREE_PARTITIONED and self.is_company_root():
+            # Every branch hangs off the company, whichever tree_id it lives in
+            return MLMTree.objects.exclude(pk=self.pk).order_by('tree_id', 'lft')
         return self.get_descendants()
 
     def get_upline(self):
         """Returns the chain of sponsors above this user."""
-        return self.get_ancestors()
+        ancestors = self.get_ancestors()
+        if not settings.MLM_TREE_PARTITIONED or self.is_company_root():
+            return ancestors
+        company = MLMTree.objects.company_root()
+        if company is None or company.tree_id == self.tree_id:
+            return ancestors
+        return (ancestors | MLMTree.objects.filter(pk=company.pk)).order_by('tree_id', 'lft')
+
+
+class MLMClosureManager(models.Manager):
+    def add_node(self, user):
+        """
+        Adds closure rows for a newly placed user: a self row plus one row per
+        ancestor of its parent_node. One read and one insert, O(depth) rows.
+        """
+        rows = [MLMClosure(ancestor_id=user.pk, descendant_id=user.pk, depth=0)]
+        if user.parent_node_id:
+            rows += [
+                MLMClosure(ancestor_id=ancestor_id, descendant_id=user.pk, depth=depth + 1)
+                for ancestor_id, depth in self.filter(descendant_id=user.parent_node_id)
+                .values_list('ancestor_id', 'depth')
+            ]
+        self.bulk_create(rows, ignore_conflicts=True)
+
+    @transaction.atomic
+    def move_node(self, user, batch_size=5000):
+        """
+        Re-links ``user`` and its whole subtree under its current parent_node:
+        drops the paths from its old ancestors and adds one per (new
+        ancestor, subtree member). Does nothing for a user with no closure
+        rows yet (a signup still being placed; add_node covers it).
+        """
+        subtree = list(self.filter(ancestor_id=user.pk).values_list('descendant_id', 'depth'))
+        if not subtree:
+            return
+        members = [descendant for descendant, _ in subtree]
+        if user.parent_node_id in members:
+            raise ValueError(f"Can't place user {user.pk} under its own downline ({user.parent_node_id})")
+
+        self.filter(descendant_id__in=members).exclude(ancestor_id__in=members).delete()
+        if user.parent_node_id:
+            ancestors = list(self.filter(descendant_id=user.parent_node_id).values_list('ancestor_id', 'depth'))
+            self.bulk_create(
+                [
+                    MLMClosure(ancestor_id=ancestor, descendant_id=descendant, depth=up + down + 1)
+                    for ancestor, up in ancestors
+                    for descendant, down in subtree
+                ],
+                batch_size=batch_size,
+            )
+
+
+class MLMClosure(models.Model):
+    """Closure table over CustomUser.parent_node: one row per (ancestor, descendant) pair."""
+    ancestor = models.ForeignKey(User, on_delete=models.CASCADE, related_name="descendant_links")
+    descendant = models.ForeignKey(User, on_delete=models.CASCADE, related_name="ancestor_links")
+    depth = models.PositiveIntegerField()
+
+    objects = MLMClosureManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['ancestor', 'descendant'], name='mlmclosure_unique_pair'),
+        ]
+        indexes = [
+            models.Index(fields=['ancestor', 'depth'], name='mlmclosure_ancestor_depth'),
+            models.Index(fields=['descendant', 'depth'], name='mlmclosure_descendant_depth'),
+        ]
+
+    def __str__(self):
+        return f"{self.ancestor_id} -> {self.descendant_id} ({self.depth})"
+
+
+class CommissionPlanManager(models.Manager):
+    def active(self):
+        """The plan in force, levels and category overrides prefetched; None means the default split."""
+        return self.filter(is_active=True).prefetch_related('levels', 'categories').first()
+
+
+class CommissionPlan(models.Model):
+    """
+    How an item's special_commission_amount is shared out: a percentage per
+    upline level (1 = the buyer's parent_node) and for the buyer's
+    parent_sponsor, each with a minimum rank, category multipliers on the
+    base, and a cap on what one user earns from one order. Anything not paid
+    out goes to the company. See mlmtree.commissions.
+    """
+    name = models.CharField(max_length=100)
+    is_active = models.BooleanField(default=False)
+    sponsor_percent = models.DecimalField(max_digits=7, decimal_places=4, default=Decimal('0'))
+    sponsor_min_rank = models.PositiveSmallIntegerField(default=0)
+    cap_per_order = models.DecimalField(
+        max_digits=12, decimal_places=2, null=True, blank=True,
+        help_text="Most one user can earn from one order; the excess goes to the company.",
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = CommissionPlanManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['is_active'], condition=models.Q(is_active=True), name='commission_plan_one_active',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.name}{' (active)' if self.is_active else ''}"
+
+
+class CommissionPlanLevel(models.Model):
+    plan = models.ForeignKey(CommissionPlan, on_delete=models.CASCADE, related_name='levels')
+    level = models.PositiveSmallIntegerField(help_text="1 is the buyer's parent_node.")
+    percent = models.DecimalField(max_digits=7, decimal_places=4)
+    min_rank = models.PositiveSmallIntegerField(default=0)
+
+    class Meta:
+        ordering = ['level']
+        constraints = [
+            models.UniqueConstraint(fields=['plan', 'level'], name='commission_plan_level_unique'),
+        ]
+
+    def __str__(self):
+        return f"Level {self.level}: {self.percent}%"
+
+
+class CommissionPlanCategory(models.Model):
+    plan = models.ForeignKey(CommissionPlan, on_delete=models.CASCADE, related_name='categories')
+    category = models.ForeignKey('store.Category', on_delete=models.CASCADE)
+    multiplier = models.DecimalField(
+        max_digits=6, decimal_places=4,
+        help_text="Scales the commission base of products in this category; 0 pays nothing on them.",
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['plan', 'category'], name='commission_plan_category_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.category} x{self.multiplier}"
@@ -1,6 +1,6 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_init, post_save
 from django.dispatch import receiver
-from .models import MLMTree
+from .models import MLMClosure, MLMTree
 from users.models import CustomUser
 
 @receiver(post_save, sender=CustomUser)
@@ -15,4 +15,22 @@ def create_mlm_tree(sender, instance, created, **kwargs):
             except MLMTree.DoesNotExist:
                 pass
 
-        MLMTree.objects.create(user=instance, parent=parent_tree)
+        MLMTree.objects.place(instance, parent=parent_tree)
+
+
+UNKNOWN = object()
+
+
+@receiver(post_init, sender=CustomUser)
+def remember_parent_node(sender, instance, **kwargs):
+    # __dict__, not the attribute: reading a deferred field would query per instance
+    instance._saved_parent_node_id = instance.__dict__.get('parent_node_id', UNKNOWN)
+
+
+@receiver(post_save, sender=CustomUser)
+def sync_closure(sender, instance, created, **kwargs):
+    """Keeps MLMClosure (and so commission uplines) in step when a user is moved to another parent_node."""
+    current = instance.__dict__.get('parent_node_id', UNKNOWN)
+    if not created and current is not UNKNOWN and current != instance._saved_parent_node_id:
+        MLMClosure.objects.move_node(instance)
+    instance._saved_parent_node_id = current
@@ -1,61 +1,80 @@
+from collections import defaultdict
 from decimal import Decimal
-from users.models import CustomUser
-from wallet.models import Wallet
-from wallet.utils import log_wallet_transaction  # ✅ Import transaction logger
 
-def distribute_commission(user, product):
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from wallet.models import Wallet, WalletTransaction
+from mlmtree.commissions import Network, PlanSpec, to_paise, to_rupees
+
+CENT = Decimal('0.01')
+
+
+def commission_lines(user, items, plan=None):
+    """
+    Splits the commission on ``items`` [(product, quantity)] bought by
+    ``user`` under ``plan`` (a PlanSpec, the active plan by default).
+    Returns [(recipient id, level, product id, quantity, amount)], level
+    being 1-N for uplines, 'sponsor' or 'company'.
+    """
+    plan = plan or PlanSpec.active()
+    network = Network.for_buyer(user, plan.depth)
+    items = [
+        (product.id, quantity, to_paise(product.special_commission_amount), product.category_id)
+        for product, quantity in items
+    ]
+    return [
+        (recipient, level, product_id, quantity, to_rupees(paise))
+        for recipient, level, product_id, quantity, paise in plan.evaluate(user.pk, items, network)
+    ]
+
+
+@transaction.atomic
+def credit_commission_lines(order, lines):
+    """
+    Credits commission lines to wallets: one WalletTransaction per recipient
+    for the whole order, its parts kept in ``details``, and one balance
+    UPDATE per recipient. Returns the number of wallets credited.
+    """
+    totals = defaultdict(Decimal)
+    details = defaultdict(list)
+    for recipient, level, product_id, quantity, amount in lines:
+        totals[recipient] += amount
+        details[recipient].append({
+            'level': level,
+            'product': product_id,
+            'quantity': quantity,
+            'amount': str(amount.quantize(CENT)),
+        })
+    if not totals:
+        return 0
+
+    Wallet.objects.bulk_create([Wallet(user_id=pk) for pk in totals], ignore_conflicts=True)
+    wallets = dict(Wallet.objects.filter(user_id__in=totals).values_list('user_id', 'id'))
+    now = timezone.now()
+    entries = []
+    for recipient, total in totals.items():
+        total = total.quantize(CENT)
+        Wallet.objects.filter(pk=wallets[recipient]).update(balance=F('balance') + total, updated_at=now)
+        entries.append(WalletTransaction(
+            wallet_id=wallets[recipient],
+            transaction_type='credit',
+            amount=total,
+            description=f"Commission for order #{order.id}",
+            order=order,
+            details=details[recipient],
+        ))
+    WalletTransaction.objects.bulk_create(entries)
+    return len(entries)
+
+
+def distribute_order_commission(order):
     """
-    Distributes commission from product.special_commission_amount:
-    - Up to 10 uplines (parent_node)
-    - 1 parent_sponsor
-    - Remaining shares to company (superuser)
-    Also logs each credit in WalletTransaction.
+    Pays the commission on every item of ``order`` under the active
+    commission plan (mlmtree.commissions): uplines on the parent_node chain,
+    the buyer's parent_sponsor, and the rest to the company (first
+    superuser). Call once, after the order's items exist.
     """
-    if not product.special_commission_amount:
-        return
-
-    total_commission = Decimal(product.special_commission_amount)
-    share = total_commission / Decimal(12)
-    company = CustomUser.objects.filter(is_superuser=True).first()
-
-    uplines_paid = 0
-    current = user.parent_node
-
-    # 1️⃣ Pay 10 uplines
-    while current and uplines_paid < 10:
-        wallet, _ = Wallet.objects.get_or_create(user=current)
-        wallet.balance += share
-        wallet.save()
-        log_wallet_transaction(
-            user=current,
-            amount=share,
-            description=f"commission"
-        )
-        current = current.parent_node
-        uplines_paid += 1
-
-    # 2️⃣ Sponsor (if exists)
-    sponsor_paid = False
-    if user.parent_sponsor:
-        sponsor = user.parent_sponsor
-        wallet, _ = Wallet.objects.get_or_create(user=sponsor)
-        wallet.balance += share
-        wallet.save()
-        log_wallet_transaction(
-            user=sponsor,
-            amount=share,
-            description=f"Sponsor commission"
-        )
-        sponsor_paid = True
-
-    # 3️⃣ Company gets remaining shares
-    remaining_shares = (10 - uplines_paid) + (0 if sponsor_paid else 1) + 1
-    if company:
-        wallet, _ = Wallet.objects.get_or_create(user=company)
-        wallet.balance += share * remaining_shares
-        wallet.save()
-        log_wallet_transaction(
-            user=company,
-            amount=share * remaining_shares,
-            description=f"Company share of commission"
-        )
\ No newline at end of file
+    items = [(item.product, item.quantity) for item in order.items.select_related('product')]
+    return credit_commission_lines(order, commission_lines(order.user, items))
@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.shortcuts import render
 from django.http import JsonResponse
 from .models import MLMTree
@@ -16,5 +17,11 @@ def get_mlm_tree(request):
         }
 
     root_nodes = MLMTree.objects.filter(parent=None)
+    company = MLMTree.objects.company_root() if settings.MLM_TREE_PARTITIONED else None
+    if company is not None:
+        # Partitioned branches are separate trees; show them under the company again
+        tree = serialize_tree(company)
+        tree["children"].extend(serialize_tree(node) for node in root_nodes.exclude(pk=company.pk))
+        return JsonResponse([tree], safe=False)
     tree_data = [serialize_tree(node) for node in root_nodes]
     return JsonResponse(tree_data, safe=False)
@@ -1,7 +1,20 @@
 from django.contrib import admin
-from .models import Payment
+from .models import Payment, RazorpayCheckout, RazorpayEvent
 
 @admin.register(Payment)
 class PaymentAdmin(admin.ModelAdmin):
     list_display = ('id', 'user', 'order','payment_method','razorpay_order_id', 'razorpay_payment_id', 'status', 'amount', 'created_at')
     search_fields = ('razorpay_payment_id', 'razorpay_order_id', 'user__username')
+
+@admin.register(RazorpayCheckout)
+class RazorpayCheckoutAdmin(admin.ModelAdmin):
+    list_display = ('id', 'user', 'razorpay_order_id', 'amount', 'status', 'order', 'created_at')
+    list_filter = ('status',)
+    search_fields = ('razorpay_order_id', 'user__email')
+    raw_id_fields = ('user', 'order')
+
+@admin.register(RazorpayEvent)
+class RazorpayEventAdmin(admin.ModelAdmin):
+    list_display = ('id', 'event', 'event_id', 'payment_id', 'razorpay_order_id', 'status', 'attempts', 'received_at')
+    list_filter = ('status', 'event')
+    search_fields = ('event_id', 'payment_id', 'razorpay_order_id')
@@ -10,11 +10,12 @@ from razorpay.errors import SignatureVerificationError
 from cart.models import Cart, Order, OrderItem
 from store.models import Product
 from payment.models import Payment
-from wallet.models import Wallet, WalletTransaction
+from wallet.ledger import InsufficientBalance, post_transaction
+from wallet.models import Wallet
 from users.models import Profile
 from .razorpay import razorpay_client
-from mlmtree.utils import distribute_commission
-from decimal import Decimal
+from .checkout import CheckoutError, finalize_razorpay_payment, start_razorpay_checkout
+from mlmtree.utils import distribute_order_commission
 
 from .serializers import (
     RazorpayVerificationSerializer,
@@ -35,6 +36,7 @@ class PaymentViewSet(viewsets.ViewSet):
                 'currency': 'INR',
                 'payment_capture': 1
             })
+            start_razorpay_checkout(user=request.user, razorpay_order=razorpay_order, cart=cart)
 
             serializer = RazorpayOrderResponseSerializer({
                 'razorpay_order_id': razorpay_order['id'],
@@ -51,7 +53,6 @@ class PaymentViewSet(viewsets.ViewSet):
 
     @action(detail=False, methods=['post'])
     def verify_razorpay_payment(self, request):
-        user = request.user
         serializer = RazorpayVerificationSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         data = serializer.validated_data
@@ -69,60 +70,12 @@ class PaymentViewSet(viewsets.ViewSet):
             return Response({'error': 'Invalid payment signature.'}, status=400)
 
         try:
-            payment_data = razorpay_client.payment.fetch(payment_id)
-            if payment_data['status'] != 'captured':
-                return Response({'error': 'Payment not captured yet.'}, status=400)
-
-            with transaction.atomic():
-                cart = Cart.objects.get(user=user)
-                cart_items = cart.get_prods()
-                cart_quantities = cart.get_quants()
-                order_total = cart.order_total()
-
-                order = Order.objects.create(
-                    user=user,
-                    full_name=f"{user.first_name} {user.last_name}",
-                    email=user.email,
-                    amount_paid=order_total,
-                    shipping_address="App - Not provided"
-                )
-
-                Payment.objects.create(
-                    user=user,
-                    order=order,
-                    payment_method='razorpay',
-                    amount=order_total,
-                    razorpay_order_id=order_id,
-                    razorpay_payment_id=payment_id,
-                    status='captured'
-                )
-
-                for item in cart_items:
-                    product = item.product
-                    quantity = cart_quantities.get(str(product.id), item.quantity)
-
-                    OrderItem.objects.create(
-                        order=order,
-                        product=product,
-                        user=user,
-                        quantity=quantity,
-                        price=item.price
-                    )
-
-                    for _ in range(quantity):
-                        distribute_commission(user, product)
-
-                    product.stock_quantity -= quantity
-                    product.save()
-
-                cart.items.all().delete()
-                cart.delete()
-                Profile.objects.filter(user=user).update(old_cart="")
-
-            return Response({'success': True, 'order_id': order.id})
-
+            order, _ = finalize_razorpay_payment(order_id, payment_id)
+        except CheckoutError as e:
+            return Response({'error': str(e)}, status=400)
         except Exception as e:
             return Response({'error': str(e)}, status=500)
+        return Response({'success': True, 'order_id': order.id})
 
     @action(detail=False, methods=['post'])
     def wallet_payment(self, request):
@@ -159,16 +112,9 @@ class PaymentViewSet(viewsets.ViewSet):
                     payment_method='wallet'
                 )
 
-                WalletTransaction.objects.create(
-                    wallet=wallet,
-                    transaction_type='debit',
-                    amount=order_total,
-                    description=f"Order #{order.id} paid via Wallet",
-                    order=order
-                )
-
-                wallet.balance -= Decimal(order_total)
-                wallet.save()
+                # Locked, F() debit with its ledger row; re-checks the balance under the lock
+                post_transaction(user.pk, 'debit', order_total, f"Order #{order.id} paid via Wallet",
+                                 order=order, require_funds=True)
 
                 for item in cart_items:
                     product = item.product
@@ -182,16 +128,16 @@ class PaymentViewSet(viewsets.ViewSet):
                         price=item.price
                     )
 
-                    for _ in range(quantity):
-                        distribute_commission(user, product)
+                    product.decrement_stock(quantity)
 
-                    product.stock_quantity -= quantity
-                    product.save()
+                distribute_order_commission(order)
 
                 cart.items.all().delete()
                 cart.delete()
                 Profile.objects.filter(user=user).update(old_cart="")
 
             return Response({'success': True, 'order_id': order.id})
+        except InsufficientBalance:
+            return Response({'error': 'Insufficient wallet balance.'}, status=400)
         except Exception as e:
             return Response({'error': str(e)}, status=500)
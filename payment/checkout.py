@@ -0,0 +1,209 @@
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from cart.models import Cart, Order, OrderItem
+from mlmtree.utils import distribute_order_commission
+from store.models import Product
+from users.models import Profile
+from .models import Payment, RazorpayCheckout
+
+
+class CheckoutError(Exception):
+    """A Razorpay payment that can't be turned into an order (unknown order id, cart gone)."""
+
+
+class RefundDue(CheckoutError):
+    """A captured payment that can't become an order; its checkout is marked 'refund_due'."""
+
+
+def shipping_text(shipping):
+    """The Order.shipping_address text for the shipping dict kept in the session."""
+    if not shipping:
+        return ''
+    return (
+        f"{shipping['phone']}\n"
+        f"{shipping['shipping_address1']}\n"
+        f"{shipping['shipping_address2']}\n"
+        f"{shipping['city']}\n"
+        f"{shipping['state']}\n"
+        f"{shipping['zipcode']}\n"
+        f"{shipping['country']}"
+    )
+
+
+def cart_lines(cart):
+    """The cart's lines as stored on RazorpayCheckout.items: [{product, quantity, price}]."""
+    quantities = cart.get_quants()
+    return [
+        {
+            'product': item.product.id,
+            'quantity': quantities.get(str(item.product.id), item.quantity),
+            'price': str(item.price),
+        }
+        for item in cart.get_prods()
+    ]
+
+
+def lines_total(lines):
+    return sum((Decimal(line['price']) * line['quantity'] for line in lines), Decimal('0'))
+
+
+def start_razorpay_checkout(user, razorpay_order, shipping_address='', cart=None):
+    """
+    Records a Razorpay order created for ``user``'s cart; ``razorpay_order``
+    is the gateway response. The cart's lines are kept so the order is later
+    placed for exactly what was paid.
+    """
+    checkout, _ = RazorpayCheckout.objects.update_or_create(
+        razorpay_order_id=razorpay_order['id'],
+        defaults={
+            'user': user,
+            'amount': Decimal(razorpay_order['amount']) / 100,
+            'items': cart_lines(cart) if cart is not None else [],
+            'shipping_address': shipping_address,
+        },
+    )
+    return checkout
+
+
+def place_order(user, lines, amount_paid, shipping_address, **order_fields):
+    """
+    Creates an Order from ``lines`` [{product, quantity, price}]: items,
+    commissions and stock. Raises CheckoutError for a product that is gone
+    and ValidationError when stock runs short; call inside a transaction.
+    """
+    products = Product.objects.in_bulk([line['product'] for line in lines])
+    order = Order.objects.create(
+        user=user,
+        full_name=f"{user.first_name} {user.last_name}",
+        email=user.email,
+        amount_paid=amount_paid,
+        shipping_address=shipping_address,
+        **order_fields
+    )
+
+    for line in lines:
+        product = products.get(line['product'])
+        if product is None:
+            raise CheckoutError(f"Product {line['product']} no longer exists")
+        quantity = line['quantity']
+
+        OrderItem.objects.create(
+            order=order,
+            product=product,
+            user=user,
+            quantity=quantity,
+            price=Decimal(line['price'])
+        )
+
+        product.decrement_stock(quantity)
+
+    distribute_order_commission(order)
+    return order
+
+
+def _clear_cart(user, lines):
+    """Takes the purchased products out of the user's cart; anything added since stays."""
+    cart = Cart.objects.filter(user=user).first()
+    if cart is None:
+        return
+    cart.items.filter(product_id__in=[line['product'] for line in lines]).delete()
+    if not cart.items.exists():
+        cart.delete()
+        Profile.objects.filter(user=user).update(old_cart="")
+
+
+def _refund_due(checkout, reason):
+    checkout.status = 'refund_due'
+    checkout.error = reason
+    checkout.save(update_fields=['status', 'error', 'updated_at'])
+
+
+def finalize_razorpay_payment(razorpay_order_id, payment_id, amount=None):
+    """
+    Places the order for a captured Razorpay payment. Returns (order, created).
+
+    Safe to call more than once for the same payment: the browser callback
+    and the webhook worker both call it, and whichever comes second gets the
+    existing order back. The checkout row is locked, so they can't both
+    place it.
+
+    The order is built from the lines saved with the checkout, not the cart
+    as it is now. ``amount`` (rupees, when the caller knows what was
+    captured) must match the checkout. A payment that can't be turned into
+    an order (amount mismatch, product gone, out of stock) leaves the
+    checkout 'refund_due' and raises RefundDue.
+    """
+    with transaction.atomic():
+        checkout = (
+            RazorpayCheckout.objects.select_for_update()
+            .select_related('user')
+            .filter(razorpay_order_id=razorpay_order_id)
+            .first()
+        )
+        if checkout is None:
+            raise CheckoutError(f'Unknown Razorpay order {razorpay_order_id}')
+
+        payment = Payment.objects.filter(razorpay_payment_id=payment_id).select_related('order').first()
+        if payment is not None:
+            return payment.order, False
+        if checkout.order_id:
+            return checkout.order, False
+        if checkout.status == 'refund_due':
+            raise RefundDue(f'Payment {payment_id} needs a refund: {checkout.error}')
+
+        user = checkout.user
+        lines = checkout.items
+        if not lines:
+            # Checkouts started before the cart lines were kept
+            cart = Cart.objects.filter(user=user).first()
+            if cart is None:
+                raise CheckoutError(f'No cart left for Razorpay order {razorpay_order_id}')
+            lines = cart_lines(cart)
+
+        if amount is not None and Decimal(amount) != checkout.amount:
+            reason = f'Captured ₹{amount} but the order was for ₹{checkout.amount}'
+        elif lines_total(lines) != checkout.amount:
+            reason = f'Cart total ₹{lines_total(lines)} does not match the ₹{checkout.amount} paid'
+        else:
+            reason = None
+            try:
+                with transaction.atomic():
+                    order = place_order(
+                        user,
+                        lines,
+                        checkout.amount,
+                        checkout.shipping_address or "App - Not provided",
+                        payment_method='razorpay',
+                        payment_status='Paid',
+                        transaction_id=payment_id,
+                    )
+            except ValidationError as e:
+                reason = '; '.join(e.messages)
+            except CheckoutError as e:
+                reason = str(e)
+
+        if reason:
+            _refund_due(checkout, reason)
+        else:
+            Payment.objects.create(
+                user=user,
+                order=order,
+                razorpay_order_id=razorpay_order_id,
+                razorpay_payment_id=payment_id,
+                status='captured',
+                amount=checkout.amount,
+                payment_method='razorpay'
+            )
+            checkout.order = order
+            checkout.status = 'paid'
+            checkout.save(update_fields=['order', 'status', 'updated_at'])
+            _clear_cart(user, lines)
+
+    # Raised after the block so the refund_due mark is kept; callers already
+    # inside a transaction must not roll back on it
+    if reason:
+        raise RefundDue(f'Payment {payment_id} needs a refund: {reason}')
+    return order, True
@@ -0,0 +1,120 @@
+import logging
+import re
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+# Only calls that are safe to repeat are retried; a POST that timed out may have gone through
+RETRY_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'})
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# /v1/payments/pay_29QQoUBi66xm2f -> /v1/payments/:id, so stats group by endpoint
+_ID_SEGMENT = re.compile(r'/[A-Za-z]+_[A-Za-z0-9]+(?=/|$)')
+
+
+class GatewaySession(requests.Session):
+    """
+    requests.Session for Razorpay and RazorpayX: keep-alive connections from
+    a bounded pool, a default timeout on every call, retries with backoff
+    for idempotent methods, and latency recorded per endpoint.
+    """
+
+    def __init__(self, timeout, pool_size, retries, backoff):
+        super().__init__()
+        self.timeout = timeout
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=retries,
+            status=retries,
+            backoff_factor=backoff,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=RETRY_METHODS,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_size, pool_block=True, max_retries=retry)
+        self.mount('https://', adapter)
+        self.mount('http://', adapter)
+        self._stats = {}
+        self._stats_lock = threading.Lock()
+
+    def request(self, method, url, *args, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        started = time.perf_counter()
+        status = None
+        try:
+            response = super().request(method, url, *args, **kwargs)
+            status = response.status_code
+            return response
+        finally:
+            elapsed = time.perf_counter() - started
+            endpoint = f"{method.upper()} {_ID_SEGMENT.sub('/:id', urlsplit(url).path)}"
+            self._record(endpoint, elapsed, status)
+            logger.info("%s -> %s in %.0f ms", endpoint, status or 'error', elapsed * 1000)
+
+    def _record(self, endpoint, elapsed, status):
+        with self._stats_lock:
+            stats = self._stats.setdefault(endpoint, {'calls': 0, 'errors': 0, 'total_ms': 0.0, 'max_ms': 0.0})
+            stats['calls'] += 1
+            if status is None or status >= 400:
+                stats['errors'] += 1
+            stats['total_ms'] += elapsed * 1000
+            stats['max_ms'] = max(stats['max_ms'], elapsed * 1000)
+
+    def stats(self):
+        """{endpoint: {calls, errors, total_ms, max_ms, avg_ms}} since the process started."""
+        with self._stats_lock:
+            return {
+                endpoint: dict(stats, avg_ms=stats['total_ms'] / stats['calls'])
+                for endpoint, stats in self._stats.items()
+            }
+
+
+class RateLimiter:
+    """Spaces calls at most ``rate`` per second across threads; ``rate`` 0 means unlimited."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0.0
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def gateway_session():
+    """The process-wide GatewaySession, created on first use from the RAZORPAY_HTTP_* settings."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = GatewaySession(
+                    timeout=(settings.RAZORPAY_HTTP_CONNECT_TIMEOUT, settings.RAZORPAY_HTTP_READ_TIMEOUT),
+                    pool_size=settings.RAZORPAY_HTTP_POOL_SIZE,
+                    retries=settings.RAZORPAY_HTTP_RETRIES,
+                    backoff=settings.RAZORPAY_HTTP_BACKOFF,
+                )
+    return _session
+
+
+def api_url(path):
+    """Absolute URL for a Razorpay API path such as '/v1/payouts'."""
+    return settings.RAZORPAY_API_URL.rstrip('/') + path
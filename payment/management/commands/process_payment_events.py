@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from payment.webhooks import process_pending_events
+
+
+class Command(BaseCommand):
+    help = (
+        "Processes stored Razorpay webhook events: places orders for captured "
+        "payments whose browser callback never arrived and marks failed "
+        "checkouts. Run from cron every minute, or with --interval as a worker."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--interval", type=int, default=0, help="Repeat every N seconds instead of running once.")
+        parser.add_argument("--limit", type=int, default=100, help="Events handled per run.")
+
+    def handle(self, *args, **options):
+        while True:
+            process_pending_events(limit=options["limit"], log=self.stdout.write)
+            if not options["interval"]:
+                break
+            time.sleep(options["interval"])
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.18 on 2026-10-19 16:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payment', '0003_razorpay_webhook_inbox'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='razorpaycheckout',
+            name='error',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='razorpaycheckout',
+            name='items',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AlterField(
+            model_name='razorpaycheckout',
+            name='status',
+            field=models.CharField(choices=[('created', 'Created'), ('paid', 'Paid'), ('failed', 'Failed'), ('refund_due', 'Paid, needs refund')], default='created', max_length=20),
+        ),
+    ]
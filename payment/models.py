@@ -21,3 +21,71 @@ class Payment(models.Model):
 
     def __str__(self):
         return f"Payment {self.user.email} | {self.amount} | {self.payment_method}"
+
+    class Meta:
+        constraints = [
+            # One Payment per gateway payment id; browser callback and webhook worker may both try
+            models.UniqueConstraint(
+                fields=['razorpay_payment_id'],
+                condition=~models.Q(razorpay_payment_id=''),
+                name='payment_unique_razorpay_payment_id',
+            ),
+        ]
+
+
+class RazorpayCheckout(models.Model):
+    """
+    A Razorpay order created for a user's cart. Keeps what is needed to place
+    the Order later, so a webhook can finish the checkout when the browser
+    never posts back, and the order matches what was paid for even if the
+    cart changes in between. A captured payment that can't become an order
+    is left 'refund_due'.
+    """
+    STATUS = (
+        ('created', 'Created'),
+        ('paid', 'Paid'),
+        ('failed', 'Failed'),
+        ('refund_due', 'Paid, needs refund'),
+    )
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='razorpay_checkouts')
+    razorpay_order_id = models.CharField(max_length=255, unique=True)
+    amount = models.DecimalField(max_digits=12, decimal_places=2)
+    # Cart lines when the Razorpay order was created: [{product, quantity, price}]
+    items = models.JSONField(default=list, blank=True)
+    shipping_address = models.TextField(blank=True, default='')
+    status = models.CharField(max_length=20, choices=STATUS, default='created')
+    error = models.TextField(blank=True, default='')
+    order = models.ForeignKey(Order, null=True, blank=True, on_delete=models.SET_NULL, related_name='+')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Checkout {self.razorpay_order_id} | {self.user.email} | {self.status}"
+
+
+class RazorpayEvent(models.Model):
+    """Raw webhook delivery, stored as received and processed later by `manage.py process_payment_events`."""
+    STATUS = (
+        ('pending', 'Pending'),
+        ('processed', 'Processed'),
+        ('ignored', 'Ignored'),
+        ('failed', 'Failed'),
+    )
+    event_id = models.CharField(max_length=255, unique=True)
+    event = models.CharField(max_length=100)
+    payment_id = models.CharField(max_length=255, blank=True, default='', db_index=True)
+    razorpay_order_id = models.CharField(max_length=255, blank=True, default='')
+    payload = models.JSONField()
+    status = models.CharField(max_length=20, choices=STATUS, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True, default='')
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'id'], name='razorpay_event_status'),
+        ]
+
+    def __str__(self):
+        return f"{self.event} {self.event_id} | {self.status}"
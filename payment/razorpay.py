@@ -2,4 +2,11 @@
 import razorpay
 from django.conf import settings
 
-razorpay_client = razorpay.Client(auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET))
\ No newline at end of file
+from .gateway import gateway_session
+
+# Shares the pooled keep-alive session with users.utils.razorpay_x
+razorpay_client = razorpay.Client(
+    session=gateway_session(),
+    auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET),
+    base_url=settings.RAZORPAY_API_URL,
+)
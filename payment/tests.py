@@ -1,3 +1,182 @@
-from django.test import TestCase
+import hashlib
+import hmac
+import json
+import os
+import tempfile
+import threading
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
 
-# Create your tests here.
+from django.test import TestCase, override_settings
+from PIL import Image
+from rest_framework.test import APIClient
+
+from cart.models import Cart, CartItem, Order
+from store.models import Product
+from users.models import CustomUser
+from .models import Payment, RazorpayCheckout, RazorpayEvent
+from .razorpay import razorpay_client
+from .webhooks import process_pending_events
+
+KEY_SECRET = 'test_key_secret'
+WEBHOOK_SECRET = 'test_webhook_secret'
+
+
+class FakeRazorpay(BaseHTTPRequestHandler):
+    """Answers POST /v1/orders like Razorpay does, numbering the orders it creates."""
+    protocol_version = 'HTTP/1.1'
+    created = 0
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        data = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+        if self.path != '/v1/orders':
+            return self._send(404, {'error': {'description': 'not found'}})
+        FakeRazorpay.created += 1
+        self._send(200, {
+            'id': f'order_fake{FakeRazorpay.created}',
+            'amount': data['amount'],
+            'currency': data.get('currency', 'INR'),
+            'status': 'created',
+        })
+
+    def _send(self, code, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def sign(secret, message):
+    return hmac.new(secret.encode(), message.encode(), hashlib.sha256).hexdigest()
+
+
+@override_settings(RAZORPAY_WEBHOOK_SECRET=WEBHOOK_SECRET)
+class RazorpayCheckoutTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Products are created with default/product.png; give them one in a throwaway MEDIA_ROOT
+        media = cls.enterClassContext(tempfile.TemporaryDirectory())
+        cls.enterClassContext(override_settings(MEDIA_ROOT=media))
+        os.makedirs(os.path.join(media, 'default'))
+        Image.new('RGB', (8, 8)).save(os.path.join(media, 'default', 'product.png'))
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), FakeRazorpay)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.patches = [
+            mock.patch.object(razorpay_client, 'base_url', f'http://127.0.0.1:{cls.server.server_port}'),
+            mock.patch.object(razorpay_client, 'auth', ('rzp_test', KEY_SECRET)),
+        ]
+        for patch in cls.patches:
+            patch.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        for patch in cls.patches:
+            patch.stop()
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(email='buyer@example.com', password='pass')
+        self.product = Product.objects.create(name='Soap', price=Decimal('40.00'), stock_quantity=10)
+        cart = Cart.objects.create(user=self.user)
+        CartItem.objects.create(cart=cart, product=self.product, quantity=2)
+        self.api = APIClient()
+        self.api.force_authenticate(self.user)
+
+    def start_checkout(self):
+        response = self.api.post('/api/payment/create_razorpay_order/')
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.data['razorpay_order_id']
+
+    def post_webhook(self, payment_id, order_id, event_id='evt_1', signature=None, amount=8000):
+        body = json.dumps({
+            'event': 'payment.captured',
+            'payload': {'payment': {'entity': {
+                'id': payment_id, 'order_id': order_id, 'amount': amount, 'status': 'captured',
+            }}},
+        })
+        return self.client.post(
+            '/payment/webhook/razorpay/',
+            body,
+            content_type='application/json',
+            HTTP_X_RAZORPAY_SIGNATURE=signature or sign(WEBHOOK_SECRET, body),
+            HTTP_X_RAZORPAY_EVENT_ID=event_id,
+        )
+
+    def browser_callback(self, payment_id, order_id):
+        return self.api.post('/api/payment/verify_razorpay_payment/', {
+            'razorpay_order_id': order_id,
+            'razorpay_payment_id': payment_id,
+            'razorpay_signature': sign(KEY_SECRET, f'{order_id}|{payment_id}'),
+        }, format='json')
+
+    def assert_one_order(self, payment_id):
+        self.assertEqual(Order.objects.filter(user=self.user).count(), 1)
+        self.assertEqual(Payment.objects.filter(razorpay_payment_id=payment_id).count(), 1)
+        order = Order.objects.get(user=self.user)
+        self.assertEqual(order.transaction_id, payment_id)
+        self.assertEqual(order.items.get().quantity, 2)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock_quantity, 8)
+
+    def test_webhook_with_bad_signature_is_rejected(self):
+        order_id = self.start_checkout()
+        response = self.post_webhook('pay_1', order_id, signature='not-a-signature')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(RazorpayEvent.objects.exists())
+
+    def test_repeated_webhook_is_stored_once(self):
+        order_id = self.start_checkout()
+        for _ in range(3):
+            self.assertEqual(self.post_webhook('pay_1', order_id).status_code, 200)
+        self.assertEqual(RazorpayEvent.objects.count(), 1)
+
+        process_pending_events(log=lambda message: None)
+        self.assertEqual(RazorpayEvent.objects.get().status, 'processed')
+        self.assert_one_order('pay_1')
+
+    def test_webhook_then_browser_callback_places_one_order(self):
+        order_id = self.start_checkout()
+        self.post_webhook('pay_1', order_id)
+        process_pending_events(log=lambda message: None)
+
+        response = self.browser_callback('pay_1', order_id)
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assert_one_order('pay_1')
+
+    def test_browser_callback_then_webhook_places_one_order(self):
+        order_id = self.start_checkout()
+        response = self.browser_callback('pay_1', order_id)
+        self.assertEqual(response.status_code, 200, response.content)
+
+        self.post_webhook('pay_1', order_id)
+        process_pending_events(log=lambda message: None)
+        self.assertEqual(RazorpayEvent.objects.get().status, 'processed')
+        self.assert_one_order('pay_1')
+
+    def test_order_uses_the_cart_that_was_paid_for(self):
+        order_id = self.start_checkout()
+        CartItem.objects.filter(cart__user=self.user).update(quantity=5)
+
+        self.post_webhook('pay_1', order_id)
+        process_pending_events(log=lambda message: None)
+        self.assert_one_order('pay_1')
+
+    def test_payment_without_stock_is_left_for_refund(self):
+        order_id = self.start_checkout()
+        Product.objects.filter(pk=self.product.pk).update(stock_quantity=1)
+
+        self.post_webhook('pay_1', order_id)
+        process_pending_events(log=lambda message: None)
+        checkout = RazorpayCheckout.objects.get(razorpay_order_id=order_id)
+        self.assertEqual(checkout.status, 'refund_due')
+        self.assertEqual(RazorpayEvent.objects.get().status, 'failed')
+        self.assertFalse(Order.objects.exists())
@@ -7,4 +7,5 @@ urlpatterns = [
     path('execute/', views.payment_execute, name='payment_execute'),
     path('cancel/', views.payment_cancel, name='payment_cancel'),
     path('success/', views.order_success, name='order_success'),
+    path('webhook/razorpay/', views.razorpay_webhook, name='razorpay_webhook'),
 ]
\ No newline at end of file
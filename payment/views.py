@@ -1,15 +1,21 @@
 from django.shortcuts import render, redirect
 from django.contrib import messages
 from django.conf import settings
+from django.db import transaction
+from django.http import HttpResponse
 from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
 from razorpay.errors import SignatureVerificationError
-from wallet.models import Wallet, WalletTransaction
+from wallet.ledger import InsufficientBalance, post_transaction
+from wallet.models import Wallet
 from cart.models import Cart, CartItem, Order, OrderItem
 from store.models import Product
 from users.models import ShippingAddress, Profile
 from payment.models import Payment
 from .razorpay import razorpay_client
-from mlmtree.utils import distribute_commission
+from .checkout import finalize_razorpay_payment, shipping_text, start_razorpay_checkout
+from .webhooks import record_event
+from mlmtree.utils import distribute_order_commission
 
 @csrf_exempt
 def payment(request):
@@ -86,6 +92,7 @@ def process_payment(request):
         return redirect('payment')
 
     request.session['razorpay_order_id'] = order['id']
+    start_razorpay_checkout(request.user, order, shipping_text(request.session.get('shipping')), cart=cart_instance)
 
     context = {
         'order_id': order['id'],
@@ -122,81 +129,18 @@ def payment_execute(request):
             messages.error(request, 'Payment verification failed. Please try again.')
             return redirect('payment')
 
+        # The signature proves the payment was made for this order; no round-trip
+        # to Razorpay. The webhook worker places the order too if we never get here.
         try:
-            payment_data = razorpay_client.payment.fetch(payment_id)
-            if payment_data['status'] == 'captured':
-                cart_instance = Cart.objects.get(user=request.user)
-                cart_items = cart_instance.get_prods()
-                cart_quantities = cart_instance.get_quants()
-                order_total = cart_instance.order_total()
-
-                user = request.user
-                shipping = request.session.get('shipping')
-                amount_paid = order_total
-                full_name = f"{user.first_name} {user.last_name}"
-                email = user.email
-
-                shipping_address = (
-                    f"{shipping['phone']}\n"
-                    f"{shipping['shipping_address1']}\n"
-                    f"{shipping['shipping_address2']}\n"
-                    f"{shipping['city']}\n"
-                    f"{shipping['state']}\n"
-                    f"{shipping['zipcode']}\n"
-                    f"{shipping['country']}"
-                )
-
-                order = Order.objects.create(
-                    user=user,
-                    full_name=full_name,
-                    email=email,
-                    amount_paid=amount_paid,
-                    shipping_address=shipping_address
-                )
-
-                Payment.objects.create(
-                    user=user,
-                    order=order,
-                    razorpay_order_id=order_id,
-                    razorpay_payment_id=payment_id,
-                    status='captured',
-                    amount=amount_paid,
-                    payment_method='razorpay'
-                )
-
-                for item in cart_items:
-                    product = item.product
-                    quantity = cart_quantities.get(str(product.id), item.quantity)
-
-                    OrderItem.objects.create(
-                        order=order,
-                        product=product,
-                        user=user,
-                        quantity=quantity,
-                        price=item.price
-                    )
-
-                    for _ in range(quantity):
-                        distribute_commission(user, product)
-
-                    product.stock_quantity -= quantity
-                    product.save()
-
-                cart_instance.items.all().delete()
-                cart_instance.delete()
-                Profile.objects.filter(user=user).update(old_cart="")
-                request.session.pop('payment_method', None)
-
-                messages.success(request, 'Payment successful!')
-                return redirect('order_success')
-            else:
-                messages.error(request, 'Payment failed. Please try again.')
-                return redirect('payment')
-
+            finalize_razorpay_payment(order_id, payment_id)
         except Exception as e:
             messages.error(request, f'An error occurred: {str(e)}')
             return redirect('payment')
 
+        request.session.pop('payment_method', None)
+        messages.success(request, 'Payment successful!')
+        return redirect('order_success')
+
     elif payment_method == 'wallet' and request.method == 'GET':
         try:
             cart_instance = Cart.objects.get(user=request.user)
@@ -229,54 +173,51 @@ def payment_execute(request):
             f"{shipping['country']}"
         )
 
-        order = Order.objects.create(
-            user=user,
-            full_name=full_name,
-            email=email,
-            amount_paid=amount_paid,
-            shipping_address=shipping_address
-        )
+        try:
+            with transaction.atomic():
+                order = Order.objects.create(
+                    user=user,
+                    full_name=full_name,
+                    email=email,
+                    amount_paid=amount_paid,
+                    shipping_address=shipping_address
+                )
 
-        Payment.objects.create(
-            user=user,
-            order=order,
-            status='captured',
-            amount=amount_paid,
-            payment_method='wallet'
-        )
+                Payment.objects.create(
+                    user=user,
+                    order=order,
+                    status='captured',
+                    amount=amount_paid,
+                    payment_method='wallet'
+                )
 
-        WalletTransaction.objects.create(
-            wallet=wallet,
-            transaction_type='debit',
-            amount=amount_paid,
-            description=f"Order {order.id} placed with Wallet",
-            order=order
-        )
+                # Locked, F() debit with its ledger row; re-checks the balance under the lock
+                post_transaction(user.pk, 'debit', amount_paid, f"Order {order.id} placed with Wallet",
+                                 order=order, require_funds=True)
 
-        wallet.balance -= amount_paid
-        wallet.save()
+                for item in cart_items:
+                    product = item.product
+                    quantity = cart_quantities.get(str(product.id), item.quantity)
 
-        for item in cart_items:
-            product = item.product
-            quantity = cart_quantities.get(str(product.id), item.quantity)
+                    OrderItem.objects.create(
+                        order=order,
+                        product=product,
+                        user=user,
+                        quantity=quantity,
+                        price=item.price
+                    )
 
-            OrderItem.objects.create(
-                order=order,
-                product=product,
-                user=user,
-                quantity=quantity,
-                price=item.price
-            )
+                    product.decrement_stock(quantity)
 
-            for _ in range(quantity):
-                distribute_commission(user, product)
+                distribute_order_commission(order)
 
-            product.stock_quantity -= quantity
-            product.save()
+                cart_instance.items.all().delete()
+                cart_instance.delete()
+                Profile.objects.filter(user=user).update(old_cart="")
+        except InsufficientBalance:
+            messages.error(request, "Insufficient wallet balance.")
+            return redirect('payment')
 
-        cart_instance.items.all().delete()
-        cart_instance.delete()
-        Profile.objects.filter(user=user).update(old_cart="")
         request.session.pop('payment_method', None)
 
         messages.success(request, 'Payment successful via Wallet!')
@@ -291,4 +232,28 @@ def order_success(request):
 
 def payment_cancel(request):
     messages.warning(request, 'Payment canceled.')
-    return render(request, 'payment_cancel.html')
\ No newline at end of file
+    return render(request, 'payment_cancel.html')
+
+@csrf_exempt
+@require_POST
+def razorpay_webhook(request):
+    """
+    Razorpay webhook receiver. Checks the signature, stores the event and
+    answers 200 straight away; `manage.py process_payment_events` acts on it.
+    """
+    if not settings.RAZORPAY_WEBHOOK_SECRET:
+        return HttpResponse(status=503)
+
+    body = request.body.decode('utf-8')
+    try:
+        razorpay_client.utility.verify_webhook_signature(
+            body, request.headers.get('X-Razorpay-Signature', ''), settings.RAZORPAY_WEBHOOK_SECRET
+        )
+    except SignatureVerificationError:
+        return HttpResponse(status=400)
+
+    try:
+        record_event(body, request.headers.get('X-Razorpay-Event-Id'))
+    except ValueError:
+        return HttpResponse(status=400)
+    return HttpResponse(status=200)
@@ -0,0 +1,91 @@
+import hashlib
+import json
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils import timezone
+
+from .checkout import CheckoutError, RefundDue, finalize_razorpay_payment
+from .models import RazorpayCheckout, RazorpayEvent
+
+# Events that place an order; payment.failed only marks the checkout
+CAPTURE_EVENTS = ('payment.captured', 'order.paid')
+MAX_ATTEMPTS = 5
+
+
+def _payment_entity(payload):
+    return ((payload.get('payload') or {}).get('payment') or {}).get('entity') or {}
+
+
+def record_event(body, event_id=None):
+    """
+    Stores a verified webhook body in the inbox. Razorpay retries deliveries,
+    so the X-Razorpay-Event-Id header (or the body hash without one) keeps
+    each event stored once. Returns (event, created).
+    """
+    payload = json.loads(body)
+    entity = _payment_entity(payload)
+    return RazorpayEvent.objects.get_or_create(
+        event_id=event_id or hashlib.sha256(body.encode()).hexdigest(),
+        defaults={
+            'event': payload.get('event', ''),
+            'payment_id': entity.get('id') or '',
+            'razorpay_order_id': entity.get('order_id') or '',
+            'payload': payload,
+        },
+    )
+
+
+def process_event(event):
+    """Acts on one stored event and sets its status; raises on errors worth retrying."""
+    event.error = ''
+    if event.event in CAPTURE_EVENTS and event.payment_id and event.razorpay_order_id:
+        captured = _payment_entity(event.payload).get('amount')
+        try:
+            finalize_razorpay_payment(
+                event.razorpay_order_id,
+                event.payment_id,
+                amount=None if captured is None else Decimal(captured) / 100,
+            )
+        except RefundDue as e:
+            # Returned, not raised: the caller's savepoint would undo the refund_due mark
+            event.status, event.error = 'failed', str(e)
+            return
+        event.status = 'processed'
+    elif event.event == 'payment.failed' and event.razorpay_order_id:
+        RazorpayCheckout.objects.filter(razorpay_order_id=event.razorpay_order_id, status='created').update(
+            status='failed', updated_at=timezone.now()
+        )
+        event.status = 'processed'
+    else:
+        event.status = 'ignored'
+
+
+def process_pending_events(limit=100, log=print):
+    """
+    Works through pending inbox events, oldest first. Each event is locked
+    (skipped if another worker holds it) and handled in its own transaction.
+    Failures are retried on later runs, up to MAX_ATTEMPTS. Returns the
+    number of events looked at.
+    """
+    ids = list(RazorpayEvent.objects.filter(status='pending').order_by('id').values_list('id', flat=True)[:limit])
+    for pk in ids:
+        with transaction.atomic():
+            event = RazorpayEvent.objects.select_for_update(skip_locked=True).filter(pk=pk, status='pending').first()
+            if event is None:
+                continue
+            event.attempts += 1
+            try:
+                with transaction.atomic():
+                    process_event(event)
+            except CheckoutError as e:
+                event.status, event.error = 'failed', str(e)
+            except Exception as e:
+                event.error = str(e)
+                if event.attempts >= MAX_ATTEMPTS:
+                    event.status = 'failed'
+            if event.status != 'pending':
+                event.processed_at = timezone.now()
+            event.save(update_fields=['status', 'attempts', 'error', 'processed_at'])
+        log(f"{event}: {event.error}" if event.error else str(event))
+    return len(ids)
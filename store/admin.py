@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import Category, Product, ProductImage, WebBanner, MobileBanner
+from .models import Category, Product, ProductImage, WebBanner, MobileBanner, StockAdjustment, PriceSchedule
 
 class ProductImageInline(admin.TabularInline):
     model = ProductImage
@@ -12,6 +12,18 @@ class ProductAdmin(admin.ModelAdmin):
     prepopulated_fields = {'slug': ('name',)}
     search_fields = ('name',)
 
+class StockAdjustmentAdmin(admin.ModelAdmin):
+    list_display = ('product', 'previous_quantity', 'new_quantity', 'user', 'source', 'reason', 'created_at')
+    list_select_related = ('product', 'user')
+    list_filter = ('source',)
+    raw_id_fields = ('product', 'user')
+
+class PriceScheduleAdmin(admin.ModelAdmin):
+    list_display = ('name', 'product', 'category', 'starts_at', 'ends_at', 'sale_price', 'percent_off', 'status')
+    list_filter = ('status',)
+    raw_id_fields = ('product',)
+    readonly_fields = ('status', 'activated_at', 'ended_at')
+
 class CategoryAdmin(admin.ModelAdmin):
     list_display = ('name', 'slug',)
     prepopulated_fields = {'slug': ('name',)}
@@ -30,6 +42,5 @@ admin.site.register(Product, ProductAdmin)
 admin.site.register(ProductImage)
 admin.site.register(WebBanner)
 admin.site.register(MobileBanner)
-
-
-
+admin.site.register(StockAdjustment, StockAdjustmentAdmin)
+admin.site.register(PriceSchedule, PriceScheduleAdmin)
@@ -0,0 +1,117 @@
+from django.db import transaction
+from django.db.models import BooleanField, ExpressionWrapper, Q
+
+from admin_portal.metrics import DashboardMetrics
+from .models import Product, StockAdjustment
+
+BATCH_SIZE = 1000
+MAX_ADJUSTMENTS = 20000
+
+
+def _key(entry):
+    """The product an entry refers to: ('id', 5) or ('slug', 'blue-shirt'). Products have no SKU column; sku is the slug."""
+    if entry.get('id') is not None:
+        try:
+            return ('id', int(entry['id']))
+        except (TypeError, ValueError):
+            return None
+    sku = entry.get('sku') or entry.get('slug')
+    return ('slug', str(sku)) if sku else None
+
+
+def _chunks(items, size=BATCH_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def validate_adjustments(entries):
+    """Splits raw entries into ([(index, key, 'delta'|'absolute', value)], errors)."""
+    valid, errors = [], []
+    if not isinstance(entries, list):
+        return valid, [{'index': None, 'error': 'Expected a list of adjustments'}]
+    if len(entries) > MAX_ADJUSTMENTS:
+        return valid, [{'index': None, 'error': f'At most {MAX_ADJUSTMENTS} adjustments per request'}]
+
+    for index, entry in enumerate(entries):
+        if not isinstance(entry, dict) or _key(entry) is None:
+            errors.append({'index': index, 'error': 'Each adjustment needs an id or sku'})
+            continue
+        modes = [mode for mode in ('delta', 'absolute') if entry.get(mode) is not None]
+        if len(modes) != 1:
+            errors.append({'index': index, 'error': 'Give exactly one of delta or absolute'})
+            continue
+        try:
+            value = int(entry[modes[0]])
+        except (TypeError, ValueError):
+            errors.append({'index': index, 'error': f'{modes[0]} must be an integer'})
+            continue
+        if modes[0] == 'absolute' and value < 0:
+            errors.append({'index': index, 'error': 'absolute must not be negative'})
+            continue
+        valid.append((index, _key(entry), modes[0], value))
+    return valid, errors
+
+
+@transaction.atomic
+def apply_stock_adjustments(entries, user=None, reason='', source='api'):
+    """
+    Applies a batch of stock changes: [{id|sku, delta|absolute}, ...].
+
+    Touched rows are locked and read once (id, slug, stock only), new
+    quantities are written with bulk_update and is_listed is recomputed in
+    SQL. Product.save() is never called, so no full_clean(), discount
+    recalculation or image work happens; the dashboard metrics cache is
+    dropped explicitly once the batch commits. One StockAdjustment row is written
+    per applied entry. Entries that are invalid, name an unknown product or
+    would take stock below zero are skipped and reported in ``errors``.
+    """
+    valid, errors = validate_adjustments(entries)
+    ids = {value for _, (field, value), _, _ in valid if field == 'id'}
+    slugs = {value for _, (field, value), _, _ in valid if field == 'slug'}
+
+    by_id, products = {}, {}
+    for field, values in (('id', list(ids)), ('slug', list(slugs))):
+        for chunk in _chunks(values):
+            for product in (
+                Product.objects.filter(**{f'{field}__in': chunk})
+                .select_for_update()
+                .only('id', 'slug', 'stock_quantity')
+                .order_by('id')
+            ):
+                # Same instance whether an entry names the product by id or by slug
+                product = by_id.setdefault(product.id, product)
+                products[('id', product.id)] = products[('slug', product.slug)] = product
+
+    original = {product.id: product.stock_quantity for product in by_id.values()}
+    audit = []
+    for index, key, mode, value in valid:
+        product = products.get(key)
+        if product is None:
+            errors.append({'index': index, 'error': f'Unknown product {key[1]}'})
+            continue
+        new_quantity = value if mode == 'absolute' else product.stock_quantity + value
+        if new_quantity < 0:
+            errors.append({'index': index, 'error': f'Stock of {product.slug} would go below zero'})
+            continue
+        audit.append(StockAdjustment(
+            product_id=product.id,
+            user=user,
+            previous_quantity=product.stock_quantity,
+            new_quantity=new_quantity,
+            reason=reason,
+            source=source,
+        ))
+        product.stock_quantity = new_quantity
+
+    changed = [p for p in by_id.values() if p.stock_quantity != original[p.id]]
+    Product.objects.bulk_update(changed, ['stock_quantity'], batch_size=BATCH_SIZE)
+    in_stock = ExpressionWrapper(Q(stock_quantity__gt=0), output_field=BooleanField())
+    for chunk in _chunks([p.id for p in changed]):
+        Product.objects.filter(id__in=chunk).update(is_listed=in_stock)
+    StockAdjustment.objects.bulk_create(audit, batch_size=BATCH_SIZE)
+    if changed:
+        # bulk_update()/update() send no post_save, so drop the cached stock counters here
+        transaction.on_commit(DashboardMetrics.invalidate)
+
+    errors.sort(key=lambda e: (e['index'] is None, e['index'] or 0))
+    return {'applied': len(audit), 'updated_products': len(changed), 'errors': errors}
@@ -0,0 +1,26 @@
+import datetime
+import time
+
+from django.core.management.base import BaseCommand
+
+from store.pricing import run_due_schedules
+
+
+class Command(BaseCommand):
+    help = (
+        "Activates and ends PriceSchedule sale windows that are due, each in one "
+        "transaction, and prepares windows starting soon. Run from cron every "
+        "minute, or with --interval as a worker."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--interval", type=int, default=0, help="Repeat every N seconds instead of running once.")
+        parser.add_argument("--lead", type=int, default=60, help="Prepare windows starting within N minutes.")
+
+    def handle(self, *args, **options):
+        lead = datetime.timedelta(minutes=options["lead"])
+        while True:
+            run_due_schedules(lead=lead, log=self.stdout.write)
+            if not options["interval"]:
+                break
+            time.sleep(options["interval"])
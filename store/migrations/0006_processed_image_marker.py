@@ -0,0 +1,38 @@
+# Generated by Django 4.2.18 on 2026-10-19 16:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0005_stockadjustment'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='processed_image',
+            field=models.CharField(blank=True, default='', editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='mobilebanner',
+            name='processed_image',
+            field=models.CharField(blank=True, default='', editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='processed_image',
+            field=models.CharField(blank=True, default='', editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='productimage',
+            name='processed_image',
+            field=models.CharField(blank=True, default='', editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='webbanner',
+            name='processed_image',
+            field=models.CharField(blank=True, default='', editable=False, max_length=255),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.18 on 2026-10-19 16:09
+
+from django.db import migrations, models
+from django.db.models import Case, F, Q, When
+
+
+def fill_effective_price(apps, schema_editor):
+    # Historical models have no custom queryset, so mirror refresh_pricing() here
+    Product = apps.get_model('store', 'Product')
+    on_sale = Q(sale_price__isnull=False) & ~Q(sale_price=0)
+    Product.objects.update(effective_price=Case(When(on_sale, then=F('sale_price')), default=F('price')))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0006_processed_image_marker'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='effective_price',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=12),
+        ),
+        migrations.RunPython(fill_effective_price, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['is_listed', 'effective_price'], name='product_listed_price'),
+        ),
+    ]
@@ -1,6 +1,11 @@
+import os
 from datetime import timedelta
+from decimal import ROUND_HALF_UP, Decimal
 from io import BytesIO
+from django.conf import settings
 from django.db import models
+from django.db.models import Case, ExpressionWrapper, F, Q, Value, When
+from django.db.models.functions import Floor
 from django.utils.text import slugify
 from django.core.exceptions import ValidationError
 from django.utils import timezone
@@ -8,12 +13,58 @@ from django.core.files.base import ContentFile
 from PIL import Image
 
 
-class Category(models.Model):
+class ResizedImageMixin:
+    """
+    Shrinks the model's ``image_field`` to fit MAX_IMAGE_SIZE after save, but
+    only when a new file was uploaded in this save (``processed_image`` holds
+    the name of the last file that went through resize_image). Plain saves
+    such as a price edit or a stock change, and the field's default image,
+    never open the file.
+    """
+    image_field = 'image'
+    MAX_IMAGE_SIZE = (1125, 1125)
+
+    def save(self, *args, **kwargs):
+        # Checked up front: saving writes the upload to storage and marks it committed
+        self._image_uploaded = self.image_needs_processing()
+        super().save(*args, **kwargs)
+
+    def image_needs_processing(self):
+        """True when a new file was assigned and hasn't been written to storage yet."""
+        if self.image_field not in self.__dict__:
+            return False  # deferred and never touched
+        image = getattr(self, self.image_field)
+        return bool(image) and not getattr(image, '_committed', True)
+
+    def process_image(self):
+        if not getattr(self, '_image_uploaded', False):
+            return
+        self._image_uploaded = False
+        self.resize_image()
+        name = getattr(self, self.image_field).name
+        # update(): record the (possibly renamed) resized file without re-running save()
+        type(self)._default_manager.filter(pk=self.pk).update(**{self.image_field: name, 'processed_image': name})
+        self.processed_image = name
+
+    def resize_image(self):
+        image = getattr(self, self.image_field)
+        image.seek(0)
+        img = Image.open(image)
+        if img.height > self.MAX_IMAGE_SIZE[1] or img.width > self.MAX_IMAGE_SIZE[0]:
+            img.thumbnail(self.MAX_IMAGE_SIZE)
+            img_io = BytesIO()
+            img.save(img_io, format=img.format, quality=70, optimize=True)
+            # basename: save() prepends upload_to again
+            image.save(os.path.basename(image.name), ContentFile(img_io.getvalue()), save=False)
+
+
+class Category(ResizedImageMixin, models.Model):
     name = models.CharField(max_length=50, unique=True, blank=False, null=False)
     key_words = models.CharField(max_length=255, blank=True, null=True)
     description = models.CharField(max_length=255, blank=True, null=True)
     image = models.ImageField(upload_to='uploads/categories/', blank=True, null=True)
     slug = models.SlugField(unique=True, blank=True, null=True)
+    processed_image = models.CharField(max_length=255, blank=True, default='', editable=False)
 
     class Meta:
         verbose_name_plural = 'Categories'
@@ -25,20 +76,61 @@ class Category(models.Model):
         if not self.slug and self.name:
             self.slug = slugify(self.name)
         super().save(*args, **kwargs)
-        self.resize_image()
-
-    def resize_image(self):
-        if self.image:
-            self.image.seek(0)
-            img = Image.open(self.image)
-            if img.height > 1125 or img.width > 1125:
-                img.thumbnail((1125, 1125))
-                img_io = BytesIO()
-                img.save(img_io, format=img.format, quality=70, optimize=True)
-                self.image.save(self.image.name, ContentFile(img_io.getvalue()), save=False)
+        self.process_image()
+
+
+class ProductQuerySet(models.QuerySet):
+    def refresh_pricing(self):
+        """
+        Recomputes is_sale, discount, percentage_discount and effective_price in
+        SQL, the same way Product.save() does. Run after bulk price changes
+        (queryset.update / bulk_update) that bypass save().
+        """
+        on_sale = Q(sale_price__isnull=False) & ~Q(sale_price=0)
+        discounted = on_sale & Q(sale_price__lt=F('price'))
+        money = models.DecimalField(max_digits=12, decimal_places=2)
+        return self.update(
+            is_sale=ExpressionWrapper(on_sale, output_field=models.BooleanField()),
+            discount=Case(When(discounted, then=F('price') - F('sale_price')), default=Value(0), output_field=money),
+            percentage_discount=Case(
+                # floor(discount * 100 / price + 1/2): halves round up, as in save(),
+                # and the single division stays exact on SQLite's integer maths
+                When(discounted & Q(price__gt=0), then=Floor(
+                    ((F('price') - F('sale_price')) * 200 + F('price')) / (F('price') * 2)
+                )),
+                default=Value(0),
+                output_field=models.DecimalField(max_digits=5, decimal_places=0),
+            ),
+            effective_price=Case(When(on_sale, then=F('sale_price')), default=F('price'), output_field=money),
+        )
+
+    def price_between(self, min_price=None, max_price=None):
+        if min_price is not None:
+            self = self.filter(effective_price__gte=min_price)
+        if max_price is not None:
+            self = self.filter(effective_price__lte=max_price)
+        return self
+
+
+class ProductManager(models.Manager.from_queryset(ProductQuerySet)):
+    def decrement_stock(self, product_id, quantity):
+        """
+        Takes ``quantity`` units in a single conditional UPDATE and unlists the
+        product when it reaches zero. No save(), so no full_clean(), slug or
+        image work. Returns False (and changes nothing) if there isn't enough stock.
+        """
+        return bool(
+            self.filter(pk=product_id, stock_quantity__gte=quantity).update(
+                # Both SET expressions see the row before the update
+                is_listed=ExpressionWrapper(Q(stock_quantity__gt=quantity), output_field=models.BooleanField()),
+                stock_quantity=F('stock_quantity') - quantity,
+            )
+        )
+
+
+class Product(ResizedImageMixin, models.Model):
+    image_field = 'profile_image'
 
-
-class Product(models.Model):
     profile_image = models.ImageField(
         upload_to='uploads/products',
         null=True,
@@ -56,6 +148,8 @@ class Product(models.Model):
     sale_price = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
     discount = models.DecimalField(default=0, max_digits=9, decimal_places=2, null=True, blank=True)
     percentage_discount = models.DecimalField(default=0, max_digits=5, decimal_places=0, null=True, blank=True)
+    # Price actually charged (sale_price while on sale, else price); kept by save() and refresh_pricing()
+    effective_price = models.DecimalField(max_digits=12, decimal_places=2, default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     is_listed = models.BooleanField(default=True)
     is_featured = models.BooleanField(default=False)
@@ -67,6 +161,17 @@ class Product(models.Model):
     category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='products', blank=True, null=True)
     color = models.CharField(max_length=255, blank=True)
     size = models.CharField(max_length=255, blank=True)
+    processed_image = models.CharField(max_length=255, blank=True, default='', editable=False)
+
+    objects = ProductManager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['is_listed', 'created_at'], name='product_listed_created'),
+            models.Index(fields=['category', 'is_listed'], name='product_category_listed'),
+            models.Index(fields=['stock_quantity'], name='product_stock'),
+            models.Index(fields=['is_listed', 'effective_price'], name='product_listed_price'),
+        ]
 
     def __str__(self):
         return self.name
@@ -82,10 +187,12 @@ class Product(models.Model):
         self.is_sale = bool(self.sale_price)
         if self.is_sale and self.sale_price and self.sale_price < self.price:
             self.discount = round(self.price - self.sale_price, 2)
-            self.percentage_discount = round((self.discount / self.price) * 100)
+            # Halves round up, the same as ProductQuerySet.refresh_pricing()
+            self.percentage_discount = (self.discount / self.price * 100).quantize(Decimal('1'), ROUND_HALF_UP)
         else:
             self.discount = 0
             self.percentage_discount = 0
+        self.effective_price = self.sale_price if self.is_sale else self.price
 
         if not self.slug:
             base_slug = slugify(self.name)
@@ -97,17 +204,7 @@ class Product(models.Model):
             self.slug = slug
 
         super().save(*args, **kwargs)
-        self.resize_image()
-
-    def resize_image(self):
-        if self.profile_image:
-            self.profile_image.seek(0)
-            img = Image.open(self.profile_image)
-            if img.height > 1125 or img.width > 1125:
-                img.thumbnail((1125, 1125))
-                img_io = BytesIO()
-                img.save(img_io, format=img.format, quality=70, optimize=True)
-                self.profile_image.save(self.profile_image.name, ContentFile(img_io.getvalue()), save=False)
+        self.process_image()
 
     @property
     def imageURL(self):
@@ -116,6 +213,13 @@ class Product(models.Model):
         except:
             return ''
 
+    def decrement_stock(self, quantity):
+        """Checkout stock decrement; raises ValidationError like save() did when stock would go negative."""
+        if not Product.objects.decrement_stock(self.pk, quantity):
+            raise ValidationError({'stock_quantity': f'Not enough stock for {self.name}'})
+        self.stock_quantity -= quantity
+        self.is_listed = self.stock_quantity > 0
+
     @property
     def is_new(self):
         return (timezone.now() - self.created_at) <= timedelta(days=30)
@@ -125,9 +229,92 @@ class Product(models.Model):
         return self.stock_quantity > 0
 
 
-class ProductImage(models.Model):
+class StockAdjustment(models.Model):
+    """Audit row for every stock change made through the bulk inventory API."""
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='stock_adjustments')
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
+    previous_quantity = models.IntegerField()
+    new_quantity = models.IntegerField()
+    reason = models.CharField(max_length=255, blank=True)
+    source = models.CharField(max_length=50, default='api')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['product', 'created_at'], name='stockadjustment_product'),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id}: {self.previous_quantity} -> {self.new_quantity}"
+
+    @property
+    def delta(self):
+        return self.new_quantity - self.previous_quantity
+
+
+class PriceSchedule(models.Model):
+    """
+    A time-windowed sale on one product or a whole category: either a fixed
+    sale price or a percentage off. Applied and reverted in bulk by
+    ``manage.py run_price_schedules``.
+    """
+    STATUS_CHOICES = [
+        ('scheduled', 'Scheduled'),
+        ('active', 'Active'),
+        ('ended', 'Ended'),
+    ]
+
+    name = models.CharField(max_length=255)
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, null=True, blank=True, related_name='price_schedules')
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, null=True, blank=True, related_name='price_schedules')
+    starts_at = models.DateTimeField()
+    ends_at = models.DateTimeField()
+    sale_price = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+    percent_off = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='scheduled')
+    activated_at = models.DateTimeField(null=True, blank=True)
+    ended_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'starts_at'], name='priceschedule_status_start'),
+            models.Index(fields=['status', 'ends_at'], name='priceschedule_status_end'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.starts_at:%Y-%m-%d %H:%M} - {self.ends_at:%Y-%m-%d %H:%M})"
+
+    def clean(self):
+        super().clean()
+        if bool(self.product_id) == bool(self.category_id):
+            raise ValidationError('Choose either a product or a category.')
+        if (self.sale_price is None) == (self.percent_off is None):
+            raise ValidationError('Set either a sale price or a percentage off.')
+        if self.percent_off is not None and not 0 < self.percent_off < 100:
+            raise ValidationError({'percent_off': 'Percentage must be between 0 and 100.'})
+        if self.starts_at and self.ends_at and self.ends_at <= self.starts_at:
+            raise ValidationError({'ends_at': 'End must be after start.'})
+
+
+class PriceScheduleProduct(models.Model):
+    """Products a schedule covers, resolved ahead of the start, and the sale_price to restore at the end."""
+    schedule = models.ForeignKey(PriceSchedule, on_delete=models.CASCADE, related_name='items')
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='+')
+    previous_sale_price = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['schedule', 'product'], name='priceschedule_product_unique'),
+        ]
+
+
+class ProductImage(ResizedImageMixin, models.Model):
+    image_field = 'product_images'
+
     product = models.ForeignKey(Product, default=None, on_delete=models.CASCADE, related_name='product_images')
     product_images = models.ImageField(upload_to='uploads/products', null=True, blank=True)
+    processed_image = models.CharField(max_length=255, blank=True, default='', editable=False)
 
     class Meta:
         verbose_name_plural = 'Product Images'
@@ -137,17 +324,7 @@ class ProductImage(models.Model):
 
     def save(self, *args, **kwargs):
         super().save(*args, **kwargs)
-        self.resize_image()
-
-    def resize_image(self):
-        if self.product_images:
-            self.product_images.seek(0)
-            img = Image.open(self.product_images)
-            if img.height > 1125 or img.width > 1125:
-                img.thumbnail((1125, 1125))
-                img_io = BytesIO()
-                img.save(img_io, format=img.format, quality=70, optimize=True)
-                self.product_images.save(self.product_images.name, ContentFile(img_io.getvalue()), save=False)
+        self.process_image()
 
     @property
     def imageURL(self):
@@ -157,25 +334,16 @@ class ProductImage(models.Model):
             return ''
 
 
-class WebBanner(models.Model):
+class WebBanner(ResizedImageMixin, models.Model):
     image = models.ImageField(upload_to='uploads/banners/', verbose_name="Image")
     caption = models.CharField(max_length=255, blank=True, null=True, verbose_name="Caption")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Created At")
     in_use = models.BooleanField(default=False)
+    processed_image = models.CharField(max_length=255, blank=True, default='', editable=False)
 
     def save(self, *args, **kwargs):
         super().save(*args, **kwargs)
-        self.resize_image()
-
-    def resize_image(self):
-        if self.image:
-            self.image.seek(0)
-            img = Image.open(self.image)
-            if img.height > 1125 or img.width > 1125:
-                img.thumbnail((1125, 1125))
-                img_io = BytesIO()
-                img.save(img_io, format=img.format, quality=70, optimize=True)
-                self.image.save(self.image.name, ContentFile(img_io.getvalue()), save=False)
+        self.process_image()
 
     @property
     def imageURL(self):
@@ -185,25 +353,16 @@ class WebBanner(models.Model):
             return ''
 
 
-class MobileBanner(models.Model):
+class MobileBanner(ResizedImageMixin, models.Model):
     image = models.ImageField(upload_to='uploads/banners/', verbose_name="Image")
     caption = models.CharField(max_length=255, blank=True, null=True, verbose_name="Caption")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Created At")
     in_use = models.BooleanField(default=False)
+    processed_image = models.CharField(max_length=255, blank=True, default='', editable=False)
 
     def save(self, *args, **kwargs):
         super().save(*args, **kwargs)
-        self.resize_image()
-
-    def resize_image(self):
-        if self.image:
-            self.image.seek(0)
-            img = Image.open(self.image)
-            if img.height > 1125 or img.width > 1125:
-                img.thumbnail((1125, 1125))
-                img_io = BytesIO()
-                img.save(img_io, format=img.format, quality=70, optimize=True)
-                self.image.save(self.image.name, ContentFile(img_io.getvalue()), save=False)
+        self.process_image()
 
     @property
     def imageURL(self):
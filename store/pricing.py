@@ -0,0 +1,110 @@
+import datetime
+
+from django.db import transaction
+from django.db.models import DecimalField, F, OuterRef, Subquery, Value
+from django.db.models.functions import Round
+from django.utils import timezone
+
+from .models import PriceSchedule, PriceScheduleProduct, Product
+
+
+def prepare_schedule(schedule):
+    """
+    Resolves the products a schedule covers into PriceScheduleProduct rows,
+    so activation itself only runs UPDATEs. Products already in another
+    active schedule are left out; overlapping sales on one product don't stack.
+    A window can start later than this runs, so activate_schedule checks again.
+    Returns the number of products covered.
+    """
+    products = Product.objects.all()
+    if schedule.product_id:
+        products = products.filter(pk=schedule.product_id)
+    else:
+        products = products.filter(category_id=schedule.category_id)
+    products = products.exclude(pk__in=_busy(schedule).values('product_id'))
+
+    PriceScheduleProduct.objects.bulk_create(
+        [PriceScheduleProduct(schedule=schedule, product_id=pk) for pk in products.values_list('pk', flat=True).iterator()],
+        batch_size=2000,
+        ignore_conflicts=True,
+    )
+    return schedule.items.count()
+
+
+def _busy(schedule):
+    """Products some other active schedule has on sale."""
+    return PriceScheduleProduct.objects.filter(schedule__status='active').exclude(schedule=schedule)
+
+
+def _covered(schedule):
+    return Product.objects.filter(pk__in=schedule.items.values('product_id'))
+
+
+@transaction.atomic
+def activate_schedule(schedule):
+    """Puts every covered product on sale in one transaction: a few set-based UPDATEs, no save() calls."""
+    schedule = PriceSchedule.objects.select_for_update().get(pk=schedule.pk)
+    if schedule.status != 'scheduled':
+        return 0
+    if not schedule.items.exists():
+        prepare_schedule(schedule)
+    # Lock the covered products, then drop any another schedule put on sale
+    # since this one was prepared. Otherwise this schedule would record that
+    # sale price as the one to restore and leave it in place when it ends.
+    list(_covered(schedule).select_for_update().order_by('pk').values_list('pk', flat=True))
+    schedule.items.filter(product_id__in=_busy(schedule).values('product_id')).delete()
+
+    # Remember what to restore, then set the sale price
+    schedule.items.update(
+        previous_sale_price=Subquery(Product.objects.filter(pk=OuterRef('product_id')).values('sale_price')[:1])
+    )
+    money = DecimalField(max_digits=12, decimal_places=2)
+    if schedule.sale_price is not None:
+        sale_price = Value(schedule.sale_price, output_field=money)
+    else:
+        factor = Value((100 - schedule.percent_off) / 100, output_field=DecimalField(max_digits=7, decimal_places=4))
+        sale_price = Round(F('price') * factor, 2, output_field=money)
+    products = _covered(schedule)
+    count = products.update(sale_price=sale_price)
+    products.refresh_pricing()
+
+    schedule.status = 'active'
+    schedule.activated_at = timezone.now()
+    schedule.save(update_fields=['status', 'activated_at'])
+    return count
+
+
+@transaction.atomic
+def end_schedule(schedule):
+    """Restores the sale prices recorded at activation for every covered product."""
+    schedule = PriceSchedule.objects.select_for_update().get(pk=schedule.pk)
+    count = 0
+    if schedule.status == 'active':
+        products = _covered(schedule)
+        count = products.update(sale_price=Subquery(
+            schedule.items.filter(product_id=OuterRef('pk')).values('previous_sale_price')[:1]
+        ))
+        products.refresh_pricing()
+    schedule.status = 'ended'
+    schedule.ended_at = timezone.now()
+    schedule.save(update_fields=['status', 'ended_at'])
+    return count
+
+
+def run_due_schedules(now=None, lead=datetime.timedelta(hours=1), log=print):
+    """
+    One scheduler tick: ends windows that are over, activates windows that
+    have started, and prepares windows starting within ``lead``.
+    """
+    now = now or timezone.now()
+
+    for schedule in PriceSchedule.objects.filter(status='active', ends_at__lte=now):
+        log(f"Ending {schedule}: {end_schedule(schedule)} products restored")
+    for schedule in PriceSchedule.objects.filter(status='scheduled', ends_at__lte=now):
+        end_schedule(schedule)
+        log(f"Skipped {schedule}: window passed before it was activated")
+    for schedule in PriceSchedule.objects.filter(status='scheduled', starts_at__lte=now, ends_at__gt=now).order_by('starts_at'):
+        log(f"Activating {schedule}: {activate_schedule(schedule)} products on sale")
+    for schedule in PriceSchedule.objects.filter(status='scheduled', starts_at__gt=now, starts_at__lte=now + lead):
+        if not schedule.items.exists():
+            log(f"Prepared {schedule}: {prepare_schedule(schedule)} products")
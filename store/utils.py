@@ -0,0 +1,25 @@
+from decimal import Decimal, InvalidOperation
+
+# ?sort= values for product listings
+PRODUCT_SORTS = {
+    'price': ('effective_price', 'id'),
+    '-price': ('-effective_price', '-id'),
+    'newest': ('-created_at', '-id'),
+}
+
+
+def _price(value):
+    try:
+        price = Decimal(value)
+    except (InvalidOperation, TypeError, ValueError):
+        return None
+    return price if price.is_finite() and price >= 0 else None
+
+
+def apply_price_params(products, params):
+    """?min_price / ?max_price filter and ?sort=price|-price|newest on the stored effective_price."""
+    products = products.price_between(_price(params.get('min_price')), _price(params.get('max_price')))
+    sort = params.get('sort')
+    if sort in PRODUCT_SORTS:
+        products = products.order_by(*PRODUCT_SORTS[sort])
+    return products
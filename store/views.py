@@ -4,6 +4,7 @@ from .models import Product, Category, WebBanner
 from django.contrib import messages
 from django.utils import timezone
 from django.db.models import Q
+from .utils import apply_price_params
 
 
 def product(request, slug):
@@ -27,7 +28,7 @@ def product(request, slug):
 
 def category(request, slug):
     category = get_object_or_404(Category, slug=slug)
-    products = Product.objects.filter(category=category)
+    products = apply_price_params(Product.objects.filter(category=category), request.GET)
     context = {
         'category': category,
         'products': products,
@@ -55,7 +56,7 @@ def categories(request):
     
 
 def sale(request):
-    products = Product.objects.filter(is_sale=True)
+    products = apply_price_params(Product.objects.filter(is_sale=True), request.GET)
     context = {
         'products': products,
     }
@@ -63,7 +64,7 @@ def sale(request):
 
 def new(request):
     thirty_days_ago = timezone.now() - timedelta(days=30)
-    products = Product.objects.filter(created_at__gte=thirty_days_ago)
+    products = apply_price_params(Product.objects.filter(created_at__gte=thirty_days_ago), request.GET)
     context = {
         'products': products,
     }
@@ -80,7 +81,7 @@ def new(request):
 
 
 def featured(request):
-    products = Product.objects.filter(is_featured=True)
+    products = apply_price_params(Product.objects.filter(is_featured=True), request.GET)
     context = {
         'products': products, }
     return render(request, 'store/featured.html', context)
@@ -101,7 +102,7 @@ def featured(request):
 #     return render(request, 'store/all_products.html', context)
 
 def products(request):
-    products = Product.objects.filter(is_listed=True).select_related('category')
+    products = apply_price_params(Product.objects.filter(is_listed=True).select_related('category'), request.GET)
     banners = WebBanner.objects.filter(in_use=True)
     sale_products = products.filter(is_sale=True)
     featured_products = products.filter(is_featured=True)
@@ -124,6 +125,7 @@ def search(request):
             Q(description__icontains=query) |
             Q(category__name__icontains=query)
         ).select_related('category')
+        products = apply_price_params(products, request.GET)
     else:
         products = Product.objects.none() 
 
@@ -1,8 +1,13 @@
 from django.contrib.auth.base_user import BaseUserManager
+from django.db.models import Q
 from django.utils.translation import gettext_lazy as _
 
 
 class CustomUserManager(BaseUserManager):
+    def get_by_referral(self, code):
+        """Looks up a sponsor by unique_id or referral_code (both indexed)."""
+        return self.filter(Q(unique_id=code) | Q(referral_code=code)).first()
+
     def create_user(self, email, password, **extra_fields):
         if not email:
             raise ValueError(_("The Email must be set"))
@@ -0,0 +1,45 @@
+# Generated by Django 4.2.18 on 2026-10-19 15:52
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def dedupe_referral_codes(apps, schema_editor):
+    """
+    Old referral codes were the last 5 characters of unique_id and can
+    collide. Keep the oldest holder of each code and give everyone else a
+    code derived from their full unique_id before adding the constraint.
+    """
+    from users.utils.ids import referral_code_for
+
+    CustomUser = apps.get_model('users', 'CustomUser')
+    duplicates = (
+        CustomUser.objects.exclude(referral_code__isnull=True)
+        .values('referral_code')
+        .annotate(n=Count('id'))
+        .filter(n__gt=1)
+        .values_list('referral_code', flat=True)
+    )
+    for code in list(duplicates):
+        users = CustomUser.objects.filter(referral_code=code).order_by('id')[1:]
+        for user in users:
+            new_code = referral_code_for(user.unique_id or '')
+            if CustomUser.objects.filter(referral_code=new_code).exists():
+                new_code = f"REF-U{user.pk}"
+            CustomUser.objects.filter(pk=user.pk).update(referral_code=new_code)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_make_pan_number_unique'),
+    ]
+
+    operations = [
+        migrations.RunPython(dedupe_referral_codes, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='customuser',
+            name='referral_code',
+            field=models.CharField(blank=True, max_length=100, null=True, unique=True),
+        ),
+    ]
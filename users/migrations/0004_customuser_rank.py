@@ -0,0 +1,18 @@
+# Generated by Django 4.2.18 on 2026-10-19 16:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_referral_code_unique'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='rank',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 4.2.18 on 2026-10-19 16:59
+
+import datetime
+
+from django.db import migrations, models
+
+LEASE_TTL = datetime.timedelta(minutes=10)
+
+
+def rows_to_slots(apps, schema_editor):
+    """
+    Turns the one-row-per-process leases into one row per worker id (row id
+    mod 1024, as before). The newest row of each slot is kept and expires a
+    lease TTL after it was taken, so processes started just before the deploy
+    keep their id until they are replaced.
+    """
+    UserIdWorker = apps.get_model('users', 'UserIdWorker')
+    newest = {}
+    for pk, created_at in UserIdWorker.objects.order_by('pk').values_list('pk', 'created_at'):
+        newest[pk & 1023] = (pk, created_at)
+    UserIdWorker.objects.exclude(pk__in=[pk for pk, _ in newest.values()]).delete()
+    for worker_id, (pk, created_at) in newest.items():
+        UserIdWorker.objects.filter(pk=pk).update(worker_id=worker_id, expires_at=created_at + LEASE_TTL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0005_useridworker'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='useridworker',
+            name='worker_id',
+            field=models.PositiveSmallIntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name='useridworker',
+            name='token',
+            field=models.CharField(default='', max_length=32),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='useridworker',
+            name='expires_at',
+            field=models.DateTimeField(null=True),
+        ),
+        migrations.RunPython(rows_to_slots, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='useridworker',
+            name='created_at',
+        ),
+        migrations.AlterField(
+            model_name='useridworker',
+            name='worker_id',
+            field=models.PositiveSmallIntegerField(unique=True),
+        ),
+        migrations.AlterField(
+            model_name='useridworker',
+            name='expires_at',
+            field=models.DateTimeField(),
+        ),
+    ]
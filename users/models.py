@@ -2,7 +2,7 @@ from django.db import models
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin
 from users.managers import CustomUserManager
 from django.conf import settings
-import random
+from users.utils.ids import generator, referral_code_for
 
 class CustomUser(AbstractBaseUser, PermissionsMixin):
     email = models.EmailField(verbose_name='email', unique=True)
@@ -13,7 +13,7 @@ class CustomUser(AbstractBaseUser, PermissionsMixin):
     date_joined = models.DateTimeField(auto_now_add=True)
     last_login = models.DateTimeField(auto_now=True)
     unique_id = models.CharField(max_length=50, unique=True, blank=True, null=True)
-    referral_code = models.CharField(max_length=100, blank=True, null=True)
+    referral_code = models.CharField(max_length=100, unique=True, blank=True, null=True)
     pan_number = models.CharField(max_length=10, unique=True, null=True, blank=True)
     parent_sponsor = models.ForeignKey(
         'self', null=True, blank=True, on_delete=models.SET_NULL, related_name='sponsored_users'
@@ -21,6 +21,8 @@ class CustomUser(AbstractBaseUser, PermissionsMixin):
     parent_node = models.ForeignKey(
         'self', null=True, blank=True, on_delete=models.SET_NULL, related_name='child_nodes'
     )
+    # Commission plans can require a minimum rank per level (mlmtree.CommissionPlan)
+    rank = models.PositiveSmallIntegerField(default=0)
 
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = ["first_name", "last_name"]
@@ -35,20 +37,15 @@ class CustomUser(AbstractBaseUser, PermissionsMixin):
         product_name = "SS"
         first_initial = self.first_name[0].upper() if self.first_name else 'X'
         last_initial = self.last_name[0].upper() if self.last_name else 'X'
-        random_number = random.randint(1000000000, 9999999999)
-        unique_id = f"{company_name}-{product_name}-{first_initial}{last_initial}-{random_number}"
-
-        while CustomUser.objects.filter(unique_id=unique_id).exists():
-            random_number = random.randint(1000000000, 9999999999)
-            unique_id = f"{company_name}-{product_name}-{first_initial}{last_initial}-{random_number}"
-
-        return unique_id
+        # Time-ordered, checksummed number: unique without an existence query
+        number = generator.next_number()
+        return f"{company_name}-{product_name}-{first_initial}{last_initial}-{number}"
 
     def save(self, *args, **kwargs):
         if not self.unique_id:
             self.unique_id = self.generate_unique_id()
         if not self.referral_code:
-            self.referral_code = f"REF-{self.unique_id[-5:]}"
+            self.referral_code = referral_code_for(self.unique_id)
         super().save(*args, **kwargs)
 
     def get_referral_link(self):
@@ -84,6 +81,23 @@ class Profile(models.Model):
         verbose_name = 'User Profile'
 
 
+class UserIdWorker(models.Model):
+    """
+    Lease on one of the 1024 worker ids used in user numbers
+    (users.utils.ids). The process holding ``token`` renews ``expires_at``
+    while it issues numbers; once it has expired, another process may take
+    the slot over, so the table never holds more than 1024 rows.
+    """
+    worker_id = models.PositiveSmallIntegerField(unique=True)
+    token = models.CharField(max_length=32)
+    hostname = models.CharField(max_length=255, blank=True)
+    pid = models.PositiveIntegerField()
+    expires_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"Worker {self.worker_id} ({self.hostname}:{self.pid})"
+
+
 class ShippingAddress(models.Model):
     user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, null=True, blank=True)
     phone = models.CharField(max_length=20, blank=True)
@@ -46,7 +46,7 @@ class CustomUserCreateSerializer(serializers.ModelSerializer):
         
         referred_by = None
         if referral_code:
-            referred_by = CustomUser.objects.filter(unique_id=referral_code).first()
+            referred_by = CustomUser.objects.get_by_referral(referral_code)
             
         user = CustomUser.objects.create(**validated_data, parent_sponsor=referred_by)
         user.set_password(password)
@@ -14,6 +14,7 @@ def create_user_profile(sender, instance, created, **kwargs):
     """
     Profile = apps.get_model('users', 'Profile')
     MLMTree = apps.get_model('mlmtree', 'MLMTree')
+    MLMClosure = apps.get_model('mlmtree', 'MLMClosure')
 
     if not created:
         return
@@ -26,7 +27,8 @@ def create_user_profile(sender, instance, created, **kwargs):
         instance.parent_sponsor = None
         instance.parent_node = None
         instance.save()
-        MLMTree.objects.create(user=instance, parent=None)
+        MLMTree.objects.place(instance)
+        MLMClosure.objects.add_node(instance)
         return
 
     # Set parent_sponsor if not already set
@@ -52,16 +54,17 @@ def create_user_profile(sender, instance, created, **kwargs):
                 queue.extend(current.child_nodes.all())
 
     instance.save()
+    MLMClosure.objects.add_node(instance)
 
     # Ensure parent_node has MLMTree record
     if instance.parent_node and not hasattr(instance.parent_node, 'mlm_tree'):
-        MLMTree.objects.create(
-            user=instance.parent_node,
+        MLMTree.objects.place(
+            instance.parent_node,
             parent=instance.parent_node.parent_node.mlm_tree if instance.parent_node.parent_node else None
         )
 
     # Create MLMTree node for new user
-    MLMTree.objects.create(
-        user=instance,
+    MLMTree.objects.place(
+        instance,
         parent=instance.parent_node.mlm_tree if instance.parent_node else None
     )
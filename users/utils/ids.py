@@ -0,0 +1,235 @@
+# users/utils/ids.py
+
+import datetime
+import os
+import socket
+import string
+import threading
+import time
+import uuid
+
+# Time-ordered user numbers (snowflake style):
+#   41 bits milliseconds since EPOCH_MS | 10 bits worker | 12 bits sequence
+# followed by a Luhn check digit. Numbers are unique per worker by
+# construction and every process holds its own worker id, so no existence
+# query is needed before saving a user.
+EPOCH_MS = 1704067200000  # 2024-01-01 00:00:00 UTC
+WORKER_BITS = 10
+SEQUENCE_BITS = 12
+MAX_WORKER = (1 << WORKER_BITS) - 1
+MAX_SEQUENCE = (1 << SEQUENCE_BITS) - 1
+# A worker id lease lasts this long and is renewed once half of it has passed
+LEASE_TTL = datetime.timedelta(minutes=10)
+LEASE_ATTEMPTS = 5
+
+BASE36 = string.digits + string.ascii_uppercase
+
+
+class WorkerIdsExhausted(RuntimeError):
+    """All 1024 worker ids are leased by live processes."""
+
+
+def _outside_transaction(func):
+    """
+    Runs ``func`` so its writes commit on their own: directly in autocommit,
+    or on a short-lived thread (its own connection) inside the caller's
+    atomic block, so a rolled-back signup can't take the lease with it.
+    Returns (result, committed). SQLite has a single writer, so the thread
+    would wait on the caller's own lock; there ``func`` runs in the caller's
+    transaction and ``committed`` is False.
+    """
+    from django.db import connection, connections
+
+    if not connection.in_atomic_block:
+        return func(), True
+    if connection.vendor == 'sqlite':
+        return func(), False
+    result = {}
+
+    def run():
+        try:
+            result['value'] = func()
+        except Exception as e:
+            result['error'] = e
+        finally:
+            connections.close_all()
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    thread.join()
+    if 'error' in result:
+        raise result['error']
+    return result['value'], True
+
+
+def _lease_worker_id(token):
+    """
+    Leases a worker id for ``token``: an expired slot is taken over, else
+    the lowest unused one is created. The unique worker_id and the
+    conditional UPDATE stop two processes taking the same slot.
+    """
+    from django.db import IntegrityError, transaction
+    from django.utils import timezone
+    from users.models import UserIdWorker
+
+    owner = {'token': token, 'hostname': socket.gethostname()[:255], 'pid': os.getpid()}
+    for _ in range(LEASE_ATTEMPTS):
+        now = timezone.now()
+        expired = (
+            UserIdWorker.objects.filter(expires_at__lt=now)
+            .order_by('expires_at').values_list('worker_id', flat=True).first()
+        )
+        if expired is not None:
+            if UserIdWorker.objects.filter(worker_id=expired, expires_at__lt=now).update(
+                expires_at=now + LEASE_TTL, **owner
+            ):
+                return expired
+            continue
+        taken = set(UserIdWorker.objects.values_list('worker_id', flat=True))
+        free = next((n for n in range(MAX_WORKER + 1) if n not in taken), None)
+        if free is None:
+            raise WorkerIdsExhausted(f"All {MAX_WORKER + 1} user-number worker ids are leased")
+        try:
+            with transaction.atomic():
+                UserIdWorker.objects.create(worker_id=free, expires_at=now + LEASE_TTL, **owner)
+            return free
+        except IntegrityError:
+            continue  # another process took it first
+    raise WorkerIdsExhausted(f"Couldn't lease a worker id in {LEASE_ATTEMPTS} attempts")
+
+
+def _renew_lease(worker_id, token):
+    """Extends our lease; False if it expired and another process took the slot."""
+    from django.utils import timezone
+    from users.models import UserIdWorker
+
+    return bool(
+        UserIdWorker.objects.filter(worker_id=worker_id, token=token)
+        .update(expires_at=timezone.now() + LEASE_TTL)
+    )
+
+
+class UserNumberGenerator:
+    def __init__(self, worker_id=None):
+        # Leased on first use, so importing this module needs no database
+        self.worker_id = None if worker_id is None else worker_id & MAX_WORKER
+        self._lock = threading.Lock()
+        self._last_ms = -1
+        self._sequence = 0
+        self._token = uuid.uuid4().hex
+        self._renew_at = None  # monotonic time; None when the id isn't leased
+        self._unconfirmed = False  # lease written in a transaction not yet committed
+
+    def _now_ms(self):
+        return int(time.time() * 1000) - EPOCH_MS
+
+    def _ensure_worker_id(self):
+        """
+        USER_ID_WORKER if configured; otherwise a leased worker id, renewed
+        before issuing once half its TTL has passed (and leased again if the
+        slot was lost meanwhile).
+        """
+        if self.worker_id is not None and self._renew_at is None:
+            return  # fixed id
+        if self.worker_id is None:
+            from django.conf import settings
+            if settings.USER_ID_WORKER not in (None, ""):
+                self.worker_id = int(settings.USER_ID_WORKER) & MAX_WORKER
+                return
+        elif self._unconfirmed and not self._lease_visible():
+            pass  # written in a transaction that rolled back: lease again
+        elif time.monotonic() < self._renew_at:
+            return
+        else:
+            renewed, committed = _outside_transaction(lambda: _renew_lease(self.worker_id, self._token))
+            if renewed:
+                self._leased(committed)
+                return
+        self.worker_id, committed = _outside_transaction(lambda: _lease_worker_id(self._token))
+        self._leased(committed)
+
+    def _leased(self, committed):
+        self._renew_at = time.monotonic() + LEASE_TTL.total_seconds() / 2
+        self._unconfirmed = not committed
+        if not committed:
+            from django.db import transaction
+            transaction.on_commit(self._confirm)
+
+    def _confirm(self):
+        self._unconfirmed = False
+
+    def _lease_visible(self):
+        from django.utils import timezone
+        from users.models import UserIdWorker
+
+        return UserIdWorker.objects.filter(
+            worker_id=self.worker_id, token=self._token, expires_at__gt=timezone.now()
+        ).exists()
+
+    def next_int(self):
+        with self._lock:
+            self._ensure_worker_id()
+            now = self._now_ms()
+            if now < self._last_ms:
+                # Clock moved backwards: keep issuing from the last timestamp
+                now = self._last_ms
+            if now == self._last_ms:
+                self._sequence = (self._sequence + 1) & MAX_SEQUENCE
+                if self._sequence == 0:
+                    # Sequence exhausted for this millisecond, wait for the next one
+                    while now <= self._last_ms:
+                        now = self._now_ms()
+            else:
+                self._sequence = 0
+            self._last_ms = now
+            return (now << (WORKER_BITS + SEQUENCE_BITS)) | (self.worker_id << SEQUENCE_BITS) | self._sequence
+
+    def next_number(self):
+        """Returns the next user number as a digit string ending in a Luhn check digit."""
+        digits = str(self.next_int())
+        return f"{digits}{luhn_check_digit(digits)}"
+
+
+def luhn_check_digit(digits):
+    total = 0
+    for i, ch in enumerate(reversed(digits)):
+        d = int(ch)
+        if i % 2 == 0:
+            d *= 2
+            if d > 9:
+                d -= 9
+        total += d
+    return (10 - total % 10) % 10
+
+
+def is_valid_number(number):
+    return number.isdigit() and len(number) > 1 and luhn_check_digit(number[:-1]) == int(number[-1])
+
+
+def to_base36(value):
+    if value == 0:
+        return "0"
+    out = []
+    while value:
+        value, rem = divmod(value, 36)
+        out.append(BASE36[rem])
+    return "".join(reversed(out))
+
+
+def referral_code_for(unique_id):
+    """
+    Referral code derived from the full numeric part of a unique_id.
+    The mapping is one-to-one, so unique ids give unique referral codes.
+    """
+    number = unique_id.rsplit("-", 1)[-1]
+    if not number.isdigit():
+        return f"REF-{number}"
+    return f"REF-{to_base36(int(number))}"
+
+
+generator = UserNumberGenerator()
+
+if hasattr(os, "register_at_fork"):
+    # Preforked workers (gunicorn --preload) must not share the parent's worker id;
+    # each child leases its own on first use
+    os.register_at_fork(after_in_child=lambda: generator.__init__())
@@ -2,19 +2,72 @@
 
 import requests
 from django.conf import settings
-from requests.auth import HTTPBasicAuth
 
 from razorpay import Client, errors
+from payment.gateway import api_url, gateway_session
+
 # ✅ Define variables BEFORE using them
 RAZORPAYX_KEY_ID = settings.RAZORPAYX_KEY_ID
 RAZORPAYX_KEY_SECRET = settings.RAZORPAYX_KEY_SECRET
+PAYOUT_ACCOUNT_NUMBER = "2323230012900444"  # RazorpayX virtual account
+# 4xx answers that don't mean the payout was refused (timeout, conflict, rate limit)
+RETRYABLE_CLIENT_ERRORS = (408, 409, 429)
 
 # ✅ Now use them
+# Every RazorpayX call goes through the shared pooled session (payment.gateway):
+# warm keep-alive connections, default timeouts, retries on idempotent calls.
+session = gateway_session()
+
+razorpay_client = Client(
+    session=session,
+    auth=(settings.RAZORPAYX_KEY_ID, settings.RAZORPAYX_KEY_SECRET),
+    base_url=settings.RAZORPAY_API_URL,
+)
+
+
+def _post(path, data, headers=None):
+    return session.post(
+        api_url(path),
+        auth=(RAZORPAYX_KEY_ID, RAZORPAYX_KEY_SECRET),
+        json=data,
+        headers=headers,
+    )
+
+
+def fetch_payout(payout_id):
+    """The RazorpayX payout object, or None if the call failed. GETs are retried by the shared session."""
+    try:
+        response = session.get(
+            api_url(f"/v1/payouts/{payout_id}"),
+            auth=(RAZORPAYX_KEY_ID, RAZORPAYX_KEY_SECRET),
+        )
+        response.raise_for_status()
+        return response.json()
+    except requests.exceptions.RequestException as e:
+        print("Payout fetch failed:", payout_id, e)
+        return None
+
+
+def find_payout(reference_id):
+    """
+    The RazorpayX payout created with ``reference_id``, {} if RazorpayX has
+    none, or None if the lookup itself failed.
+    """
+    try:
+        response = session.get(
+            api_url("/v1/payouts"),
+            auth=(RAZORPAYX_KEY_ID, RAZORPAYX_KEY_SECRET),
+            params={"account_number": PAYOUT_ACCOUNT_NUMBER, "reference_id": reference_id},
+        )
+        response.raise_for_status()
+        items = response.json().get("items") or []
+    except requests.exceptions.RequestException as e:
+        print("Payout lookup failed:", reference_id, e)
+        return None
+    return items[0] if items else {}
 
-razorpay_client = Client(auth=(settings.RAZORPAYX_KEY_ID, settings.RAZORPAYX_KEY_SECRET))
 
 def create_contact(name, email, phone, contact_type):
-    url = "https://api.razorpay.com/v1/contacts"
     data = {
         "name": name,
         "email": email,
@@ -22,25 +75,18 @@ def create_contact(name, email, phone, contact_type):
         "type": contact_type
     }
 
+    response = None
     try:
-        response = requests.post(
-            url,
-            auth=HTTPBasicAuth(RAZORPAYX_KEY_ID, RAZORPAYX_KEY_SECRET),
-            json=data,
-            timeout=10  # optional, add timeout
-        )
+        response = _post("/v1/contacts", data)
         response.raise_for_status()  # raises HTTPError for bad status
         return response.json()
     except requests.exceptions.RequestException as e:
         print("Request failed:", e)
         print("Response content:", getattr(response, 'text', 'No response'))
         return None
-    
-
 
 
 def create_fund_account(contact_id, name, account_number, ifsc):
-    url = "https://api.razorpay.com/v1/fund_accounts"
     data = {
         "contact_id": contact_id,
         "account_type": "bank_account",
@@ -51,22 +97,23 @@ def create_fund_account(contact_id, name, account_number, ifsc):
         }
     }
 
-    response = requests.post(
-        url,
-        auth=HTTPBasicAuth(RAZORPAYX_KEY_ID, RAZORPAYX_KEY_SECRET),
-        json=data
-    )
+    try:
+        response = _post("/v1/fund_accounts", data)
+    except requests.exceptions.RequestException as e:
+        print("Request failed:", e)
+        return None
     print("Created fund account:", data)
     return response.json()
 
 
-import requests
-from requests.auth import HTTPBasicAuth
-
-def initiate_payout(fund_account_id, amount, purpose="payout"):
-    url = "https://api.razorpay.com/v1/payouts"
+def initiate_payout(fund_account_id, amount, purpose="payout", idempotency_key=None, reference_id=None):
+    """
+    The created payout, ``{"error": ...}`` when RazorpayX refused the request
+    (nothing was paid), or None when the outcome is unknown: a timeout, a
+    dropped connection or a 5xx may still have created the payout.
+    """
     data = {
-        "account_number": "2323230012900444",  # RazorpayX virtual account
+        "account_number": PAYOUT_ACCOUNT_NUMBER,
         "fund_account_id": fund_account_id,
         "amount": int(amount * 100),  # Razorpay requires paise
         "currency": "INR",
@@ -74,19 +121,29 @@ def initiate_payout(fund_account_id, amount, purpose="payout"):
         "purpose": purpose,
         "queue_if_low_balance": True
     }
+    if reference_id:
+        data["reference_id"] = reference_id  # lets find_payout() look it up later
+    # Lets RazorpayX recognise a repeated request instead of paying twice
+    headers = {"X-Payout-Idempotency": idempotency_key} if idempotency_key else None
 
     print("Initiating payout to fund_account_id:", fund_account_id)
     print("Payload being sent:", data)
 
-    response = requests.post(
-        url,
-        auth=HTTPBasicAuth(RAZORPAYX_KEY_ID, RAZORPAYX_KEY_SECRET),
-        json=data
-    )
+    try:
+        response = _post("/v1/payouts", data, headers=headers)
+    except requests.exceptions.RequestException as e:
+        print("❌ Razorpay payout request failed:", e)
+        return None
 
     if response.status_code != 200:
         print("❌ Razorpay payout failed with status:", response.status_code)
         print("❌ Response content:", response.text)
+        if 400 <= response.status_code < 500 and response.status_code not in RETRYABLE_CLIENT_ERRORS:
+            try:
+                error = response.json().get("error")
+            except ValueError:
+                error = None
+            return {"error": error or {"description": response.text[:200]}}
         return None
 
     print("✅ Payout Success:", response.json())
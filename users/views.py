@@ -15,6 +15,10 @@ from cart.models import Cart, CartItem
 from cart.models import Order
 from django.contrib.auth.decorators import login_required 
 from wallet.models import Wallet, WalletTransaction
+from mlmtree.hierarchy import downline
+
+# Levels counted as the user's team (same depth that earns commission)
+TEAM_DEPTH = 10
 
 
 from django.conf import settings
@@ -28,18 +32,14 @@ def register_user(request):
     if 'ref' in request.GET:
         referral_id = request.GET.get('ref')
         request.session['referral_id'] = referral_id  # Store in session
-        print(f"Referral ID received and stored in session: {referral_id}")
 
     # Retrieve referral ID from session (if available)
     referral_id = request.session.get('referral_id')
-    print(f"Referral ID used for registration: {referral_id}")  # Debugging
 
     parent_sponsor = None
     if referral_id:
-        try:
-            parent_sponsor = CustomUser.objects.get(unique_id=referral_id)
-            print(f"Parent Sponsor Found: {parent_sponsor.email}")  # Debugging
-        except CustomUser.DoesNotExist:
+        parent_sponsor = CustomUser.objects.get_by_referral(referral_id)
+        if parent_sponsor is None:
             messages.error(request, "Invalid referral link.")
             return redirect('register')
 
@@ -49,7 +49,6 @@ def register_user(request):
             user = form.save(commit=False)
             user.parent_sponsor = parent_sponsor  # Assign sponsor
             user.save()
-            print(f"User {user.email} saved with Parent Sponsor: {user.parent_sponsor.email if user.parent_sponsor else 'None'}")  # Debugging
             
             # Clear the referral ID from session after use
             request.session.pop('referral_id', None)
@@ -210,7 +209,12 @@ def user_profile(request):
 @login_required
 def my_referrals_view(request):
     referred_users = request.user.sponsored_users.all()
-    return render(request, 'users/my_referrals.html', {'referred_users': referred_users})
+    team_size = downline(request.user, max_depth=TEAM_DEPTH).count()
+    return render(request, 'users/my_referrals.html', {
+        'referred_users': referred_users,
+        'team_size': team_size,
+        'team_depth': TEAM_DEPTH,
+    })
 
 
 # users/views.py
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Wallet, WalletTransaction ,Payout
+from .models import Wallet, WalletCheckpoint, WalletTransaction ,Payout
 
 @admin.register(Wallet)
 class WalletAdmin(admin.ModelAdmin):
@@ -19,7 +19,16 @@ class PayoutAdmin(admin.ModelAdmin):
         'amount', 
         'status', 
         'transaction_id', 
+        'razorpay_payout_id',
+        'attempts',
         'created_at'
     ]
-    search_fields = ['user__username', 'transaction_id']
+    search_fields = ['user__email', 'transaction_id', 'razorpay_payout_id']
     list_filter = ['status', 'created_at']
+
+
+@admin.register(WalletCheckpoint)
+class WalletCheckpointAdmin(admin.ModelAdmin):
+    list_display = ('wallet', 'transaction_id', 'balance', 'created_at')
+    search_fields = ('wallet__user__email',)
+    raw_id_fields = ('wallet',)
@@ -3,7 +3,13 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from .models import Wallet, WalletTransaction
-from .serializers import WalletSerializer, WalletTransactionSerializer
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils import timezone
+from rest_framework.pagination import CursorPagination
+from .serializers import WalletSerializer, WalletStatementEntrySerializer, WalletTransactionSerializer
+from .statements import (
+    closing_balance, render_statement_pdf, running_balances, statement, statement_filters, stream_statement_csv,
+)
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
@@ -21,6 +27,56 @@ def get_wallet_transactions(request):
     return Response(serializer.data)
 
 
+class StatementPagination(CursorPagination):
+    page_size = 50
+    ordering = 'id'
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_wallet_statement(request):
+    """
+    Wallet statement, oldest first, 50 entries per page, each with the
+    running balance after it. ?date_from / ?date_to (YYYY-MM-DD) limit the
+    period; opening and closing balances cover the whole period, not just
+    the page. Pages are keyset cursors on the ledger id (``next`` /
+    ``previous`` links), and every balance is seeded from the nearest
+    checkpoint, so deep pages cost the same as the first.
+    """
+    wallet, _ = Wallet.objects.get_or_create(user=request.user)
+    filters = statement_filters(request.query_params)
+    opening, transactions = statement(wallet, filters)
+    paginator = StatementPagination()
+    page = running_balances(wallet, paginator.paginate_queryset(transactions, request))
+    serializer = WalletStatementEntrySerializer(page, many=True)
+    return Response({
+        'opening_balance': str(opening),
+        'closing_balance': str(closing_balance(wallet, opening, transactions)),
+        'count': transactions.count(),
+        'next': paginator.get_next_link(),
+        'previous': paginator.get_previous_link(),
+        'results': serializer.data,
+    })
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def download_wallet_statement(request):
+    """The statement for ?date_from / ?date_to as a streamed CSV, or a PDF with ?type=pdf."""
+    wallet, _ = Wallet.objects.get_or_create(user=request.user)
+    filters = statement_filters(request.query_params)
+    opening, transactions = statement(wallet, filters)
+    filename = f"wallet-statement-{timezone.localdate():%Y%m%d}"
+
+    if request.query_params.get('type') == 'pdf':
+        output = render_statement_pdf(wallet, filters, opening, transactions)
+        return FileResponse(output, as_attachment=True, filename=f"{filename}.pdf", content_type='application/pdf')
+
+    response = StreamingHttpResponse(stream_statement_csv(transactions, opening), content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="{filename}.csv"'
+    return response
+
+
 
 
 
@@ -29,13 +85,11 @@ def get_wallet_transactions(request):
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from django.db import transaction
 from decimal import Decimal
 import uuid
 
-from wallet.models import Wallet, WalletTransaction, Payout
-from users.models import BankingDetails
-from users.utils.razorpay_x import initiate_payout
+from wallet.models import Wallet, WalletTransaction
+from wallet.payouts import PayoutError, request_payout
 
 
 @api_view(['POST'])
@@ -56,52 +110,21 @@ def withdraw_from_wallet(request):
     except (TypeError, ValueError):
         return Response({"error": "Invalid amount"}, status=400)
 
-    with transaction.atomic():
-        # ✅ Lock wallet for concurrent safety
-        wallet = Wallet.objects.select_for_update().get(user=user)
-
-        # ✅ Check if payout with this request_id already exists
-        existing_payout = Payout.objects.filter(transaction_id=request_id).first()
-        if existing_payout:
-            # Return previous status without charging again
-            return Response({
-                "message": f"Withdrawal of ₹{existing_payout.amount} already processed.",
-                "status": existing_payout.status
-            }, status=200)
-
-        if wallet.balance < amount:
-            return Response({"error": "Insufficient wallet balance."}, status=400)
-
-        try:
-            banking = BankingDetails.objects.get(user=user)
-        except BankingDetails.DoesNotExist:
-            return Response({"error": "Banking details not found."}, status=404)
-
-        payout_response = initiate_payout(banking.razorpay_fund_account_id, float(amount))
-        if not payout_response or "id" not in payout_response:
-            return Response({
-                "error": f"Failed to initiate payout. Response: {payout_response}"
-            }, status=400)
-
-        # ✅ Deduct wallet balance
-        wallet.balance -= amount
-        wallet.save()
-
-        # ✅ Save wallet transaction
-        WalletTransaction.objects.create(
-            wallet=wallet,
-            transaction_type="debit",
-            amount=amount,
-            description=f"Payout initiated: ₹{amount}"
-        )
-
-        # ✅ Save payout record
-        Payout.objects.create(
-            user=user,
-            amount=amount,
-            razorpay_payout_id=payout_response["id"],
-            status=payout_response.get("status", "initiated"),
-            transaction_id=request_id
-        )
-
-    return Response({"message": f"Withdrawal of ₹{amount} initiated successfully."}, status=200)
+    # ✅ Hold the amount and queue the payout (short wallet lock, no gateway call)
+    try:
+        payout, created = request_payout(user, amount, request_id, charge_fees=False)
+    except PayoutError as e:
+        return Response({"error": str(e)}, status=e.status)
+
+    if not created:
+        # Return previous status without charging again
+        return Response({
+            "message": f"Withdrawal of ₹{payout.amount} already processed.",
+            "status": payout.status
+        }, status=200)
+
+    return Response({
+        "message": f"Withdrawal of ₹{amount} requested.",
+        "status": payout.status,
+        "payout_id": payout.id
+    }, status=200)
@@ -0,0 +1,190 @@
+import datetime
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, Count, DecimalField, F, Max, Min, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from .models import Wallet, WalletCheckpoint, WalletTransaction
+
+MONEY = DecimalField(max_digits=14, decimal_places=2)
+# Credits add to the balance, debits subtract
+SIGNED_AMOUNT = Case(
+    When(transaction_type='credit', then=F('amount')),
+    default=-F('amount'),
+    output_field=MONEY,
+)
+# Transactions newer than this are left out of new checkpoints, so a row
+# committed late with a lower id can't fall behind one
+CHECKPOINT_LAG = datetime.timedelta(minutes=5)
+CENT = Decimal('0.01')
+# Per-unit, per-recipient commission rows written before commissions were credited per order
+LEGACY_COMMISSION_DESCRIPTIONS = ('commission', 'Sponsor commission', 'Company share of commission')
+
+
+class InsufficientBalance(Exception):
+    """The wallet can't cover a debit; nothing was written."""
+
+
+def post_transaction(user_id, transaction_type, amount, description, order=None, require_funds=False):
+    """
+    Moves ``amount`` in or out of a user's wallet and records the
+    WalletTransaction. The wallet row is locked and the balance changed with
+    an F() UPDATE, so concurrent writers can't lose each other's changes.
+    With ``require_funds`` a debit larger than the balance raises
+    InsufficientBalance. Call inside a transaction; returns the new balance.
+    """
+    wallet = Wallet.objects.select_for_update().get(user_id=user_id)
+    amount = Decimal(amount)
+    if require_funds and transaction_type == 'debit' and wallet.balance < amount:
+        raise InsufficientBalance(f"Wallet balance ₹{wallet.balance} is less than ₹{amount}")
+    change = amount if transaction_type == 'credit' else -amount
+    Wallet.objects.filter(pk=wallet.pk).update(balance=F('balance') + change, updated_at=timezone.now())
+    WalletTransaction.objects.create(
+        wallet=wallet,
+        transaction_type=transaction_type,
+        amount=amount,
+        description=description,
+        order=order,
+    )
+    return wallet.balance + change
+
+
+def _money(value):
+    """Rounds a summed amount to paise (SQLite sums decimals as floats)."""
+    return Decimal(value or 0).quantize(CENT)
+
+
+def _sum(transactions):
+    return _money(transactions.aggregate(total=Sum(SIGNED_AMOUNT))['total'])
+
+
+def ledger_balance(wallet, upto_id=None):
+    """Balance from the ledger through transaction ``upto_id`` (all of it when None)."""
+    checkpoints = WalletCheckpoint.objects.filter(wallet=wallet)
+    transactions = WalletTransaction.objects.filter(wallet=wallet)
+    if upto_id is not None:
+        checkpoints = checkpoints.filter(transaction_id__lte=upto_id)
+        transactions = transactions.filter(id__lte=upto_id)
+    checkpoint = checkpoints.order_by('-transaction_id').first()
+    if checkpoint:
+        return _money(checkpoint.balance) + _sum(transactions.filter(id__gt=checkpoint.transaction_id))
+    return _sum(transactions)
+
+
+def balance_at(wallet, when):
+    """The wallet's balance just after ``when``, from the nearest checkpoint before it."""
+    last = WalletTransaction.objects.filter(wallet=wallet, timestamp__lte=when).aggregate(last=Max('id'))['last']
+    if last is None:
+        return Decimal('0')
+    return ledger_balance(wallet, upto_id=last)
+
+
+def _with_ledger(wallets, upto_id):
+    """
+    Annotates each wallet with its latest checkpoint and the sums after it,
+    as subqueries, so a whole chunk is read in one query:
+    ``ledger`` (all transactions), ``settled`` (through ``upto_id``) and
+    ``settled_id`` (its last transaction through ``upto_id``, None if none new).
+    """
+    latest = WalletCheckpoint.objects.filter(wallet=OuterRef('pk')).order_by('-transaction_id')
+    wallets = wallets.annotate(
+        checkpoint_id=Coalesce(Subquery(latest.values('transaction_id')[:1]), Value(0)),
+        checkpoint_balance=Coalesce(Subquery(latest.values('balance')[:1]), Value(Decimal('0')), output_field=MONEY),
+    )
+    since = WalletTransaction.objects.filter(wallet=OuterRef('pk'), id__gt=OuterRef('checkpoint_id')).values('wallet')
+    settled = since.filter(id__lte=upto_id)
+
+    def total(transactions):
+        return Coalesce(
+            Subquery(transactions.annotate(total=Sum(SIGNED_AMOUNT)).values('total')),
+            Value(Decimal('0')),
+            output_field=MONEY,
+        )
+
+    return wallets.annotate(
+        ledger=F('checkpoint_balance') + total(since),
+        settled=F('checkpoint_balance') + total(settled),
+        settled_id=Subquery(settled.annotate(last=Max('id')).values('last')),
+    )
+
+
+def verify_chunk(wallet_ids, checkpoint=False, lag=CHECKPOINT_LAG):
+    """
+    Compares Wallet.balance with the ledger for ``wallet_ids`` in one query.
+    Mismatches are checked again with the wallet row locked, which rules out
+    a transaction landing between the two reads. With ``checkpoint``, a new
+    checkpoint is stored for every wallet with transactions older than
+    ``lag`` since its last one. Returns (mismatches, checkpoints written);
+    mismatches are (wallet id, stored balance, ledger balance).
+    """
+    upto_id = WalletTransaction.objects.filter(
+        timestamp__lte=timezone.now() - lag
+    ).aggregate(last=Max('id'))['last'] or 0
+
+    rows = _with_ledger(Wallet.objects.filter(pk__in=wallet_ids), upto_id).values_list(
+        'pk', 'balance', 'ledger', 'settled', 'settled_id'
+    )
+    suspects, checkpoints = [], []
+    for pk, balance, ledger, settled, settled_id in rows:
+        ledger, settled = _money(ledger), _money(settled)
+        if balance != ledger:
+            suspects.append(pk)
+        if checkpoint and settled_id:
+            checkpoints.append(WalletCheckpoint(wallet_id=pk, transaction_id=settled_id, balance=settled))
+
+    mismatches = []
+    for pk in suspects:
+        with transaction.atomic():
+            wallet = Wallet.objects.select_for_update().get(pk=pk)
+            ledger = ledger_balance(wallet)
+            if wallet.balance != ledger:
+                mismatches.append((pk, wallet.balance, ledger))
+
+    WalletCheckpoint.objects.bulk_create(checkpoints, batch_size=1000, ignore_conflicts=True)
+    return mismatches, len(checkpoints)
+
+
+def compact_commissions(wallet_ids, before):
+    """
+    Folds the legacy commission credits of ``wallet_ids`` dated before
+    ``before`` into one row per (wallet, description, day). The group's first
+    row keeps its id and timestamp and takes the total; the rest are deleted.
+    Balances don't change, but a checkpoint taken inside a group would no
+    longer add up, so checkpoints from the first folded id onwards are dropped
+    (verify_wallets --checkpoint writes them again). Returns (groups, rows removed).
+    """
+    legacy = WalletTransaction.objects.filter(
+        wallet_id__in=wallet_ids,
+        transaction_type='credit',
+        description__in=LEGACY_COMMISSION_DESCRIPTIONS,
+        order__isnull=True,
+        details__isnull=True,
+        timestamp__lt=before,
+    ).annotate(day=TruncDate('timestamp'))
+    groups = (
+        legacy.values('wallet_id', 'description', 'day')
+        .annotate(first=Min('id'), last=Max('id'), rows=Count('id'), total=Sum('amount'))
+        .filter(rows__gt=1)
+        .order_by()
+    )
+
+    removed = 0
+    first_folded = {}
+    with transaction.atomic():
+        groups = list(groups)
+        for group in groups:
+            WalletTransaction.objects.filter(pk=group['first']).update(
+                amount=_money(group['total']),
+                description=f"{group['description']} ({group['rows']} entries on {group['day']})",
+                details={'compacted': group['rows'], 'last_id': group['last']},
+            )
+            removed += legacy.filter(
+                wallet_id=group['wallet_id'], description=group['description'], day=group['day'],
+            ).exclude(pk=group['first']).delete()[0]
+            wallet_id = group['wallet_id']
+            first_folded[wallet_id] = min(group['first'], first_folded.get(wallet_id, group['first']))
+        for wallet_id, first in first_folded.items():
+            WalletCheckpoint.objects.filter(wallet_id=wallet_id, transaction_id__gte=first).delete()
+    return len(groups), removed
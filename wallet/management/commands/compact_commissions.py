@@ -0,0 +1,37 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from wallet.ledger import compact_commissions
+from wallet.models import Wallet
+
+
+class Command(BaseCommand):
+    help = (
+        "Folds historical per-unit commission credits (one row per upline per "
+        "unit sold) into one row per wallet, kind and day. Balances are "
+        "unchanged; new orders are already credited once per wallet and order."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--before", help="Only rows before this date, YYYY-MM-DD (default: today).")
+        parser.add_argument("--chunk-size", type=int, default=500, help="Wallets per transaction.")
+
+    def handle(self, *args, **options):
+        try:
+            day = datetime.date.fromisoformat(options["before"]) if options["before"] else timezone.localdate()
+        except ValueError:
+            raise CommandError("--before must be YYYY-MM-DD")
+        before = timezone.make_aware(datetime.datetime.combine(day, datetime.time.min))
+
+        ids = list(Wallet.objects.order_by("pk").values_list("pk", flat=True))
+        size = options["chunk_size"]
+        total_groups = total_removed = 0
+        for start in range(0, len(ids), size):
+            groups, removed = compact_commissions(ids[start:start + size], before)
+            total_groups += groups
+            total_removed += removed
+            if removed:
+                self.stdout.write(f"Wallets {ids[start]}-{ids[min(start + size, len(ids)) - 1]}: {removed} rows folded into {groups}")
+        self.stdout.write(f"Done: {total_removed} rows removed, {total_groups} compacted rows")
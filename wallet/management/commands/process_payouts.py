@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from wallet.payouts import submit_pending_payouts
+
+
+class Command(BaseCommand):
+    help = (
+        "Sends pending wallet withdrawals to RazorpayX in concurrent batches and "
+        "returns the held amount of payouts that fail. Run from cron every "
+        "minute, or with --interval as a worker."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--interval", type=int, default=0, help="Repeat every N seconds instead of running once.")
+        parser.add_argument("--batch-size", type=int, help="Payouts claimed per batch (default PAYOUT_BATCH_SIZE).")
+        parser.add_argument("--workers", type=int, help="Concurrent RazorpayX calls (default PAYOUT_WORKERS).")
+
+    def handle(self, *args, **options):
+        while True:
+            # Drain the queue a batch at a time; payouts to retry wait for the next tick
+            while True:
+                counts = submit_pending_payouts(options["batch_size"], options["workers"], log=self.stdout.write)
+                if not counts or "retry" in counts:
+                    break
+            if not options["interval"]:
+                break
+            time.sleep(options["interval"])
@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from wallet.payouts import reconcile_payouts
+
+
+class Command(BaseCommand):
+    help = (
+        "Fetches the current RazorpayX status of every payout that isn't final, "
+        "updates the Payout rows and credits back failed or reversed payouts. "
+        "Payouts whose submission got no answer are looked up by reference_id first. "
+        "Run from cron, or with --interval as a worker."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--interval", type=int, default=0, help="Repeat every N seconds instead of running once.")
+        parser.add_argument("--page-size", type=int, default=500, help="Payouts fetched and updated per page.")
+        parser.add_argument("--workers", type=int, help="Concurrent RazorpayX calls (default PAYOUT_WORKERS).")
+        parser.add_argument("--rate", type=float, help="Max requests per second (default PAYOUT_RECONCILE_RATE, 0 = no limit).")
+
+    def handle(self, *args, **options):
+        while True:
+            reconcile_payouts(
+                page_size=options["page_size"],
+                workers=options["workers"],
+                rate=options["rate"],
+                log=self.stdout.write,
+            )
+            if not options["interval"]:
+                break
+            time.sleep(options["interval"])
@@ -0,0 +1,44 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from wallet.ledger import verify_chunk
+from wallet.models import Wallet
+
+
+class Command(BaseCommand):
+    help = (
+        "Checks every Wallet.balance against its WalletTransaction ledger, in "
+        "parallel chunks, summing only transactions after each wallet's last "
+        "checkpoint. With --checkpoint, also stores new checkpoints so the next "
+        "run starts from there. Exits non-zero when a wallet doesn't match."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=1000, help="Wallets per query.")
+        parser.add_argument("--workers", type=int, default=4, help="Chunks checked in parallel (one DB connection each).")
+        parser.add_argument("--checkpoint", action="store_true", help="Write new balance checkpoints.")
+
+    def handle(self, *args, **options):
+        ids = list(Wallet.objects.order_by("pk").values_list("pk", flat=True))
+        size = options["chunk_size"]
+        chunks = [ids[start:start + size] for start in range(0, len(ids), size)]
+
+        def run(chunk):
+            try:
+                return verify_chunk(chunk, checkpoint=options["checkpoint"])
+            finally:
+                connection.close()
+
+        mismatches, written = [], 0
+        with ThreadPoolExecutor(max_workers=options["workers"]) as executor:
+            for chunk_mismatches, chunk_written in executor.map(run, chunks):
+                mismatches.extend(chunk_mismatches)
+                written += chunk_written
+
+        for pk, balance, ledger in mismatches:
+            self.stderr.write(f"Wallet {pk}: balance {balance}, ledger {ledger}, off by {balance - ledger}")
+        self.stdout.write(f"Checked {len(ids)} wallets, {len(mismatches)} mismatched, {written} checkpoints written")
+        if mismatches:
+            raise CommandError(f"{len(mismatches)} wallets don't match their ledger")
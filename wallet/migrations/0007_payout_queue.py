@@ -0,0 +1,42 @@
+# Generated by Django 4.2.18 on 2026-10-19 16:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallet', '0006_payout_fee_payout_final_amount_payout_tax'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='payout',
+            name='attempts',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='payout',
+            name='charge_fees',
+            field=models.BooleanField(default=True),
+        ),
+        migrations.AddField(
+            model_name='payout',
+            name='error',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='payout',
+            name='fund_account_id',
+            field=models.CharField(blank=True, default='', max_length=100),
+        ),
+        migrations.AddField(
+            model_name='payout',
+            name='submitted_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='payout',
+            index=models.Index(fields=['status', 'id'], name='payout_status'),
+        ),
+    ]
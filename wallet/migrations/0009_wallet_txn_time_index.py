@@ -0,0 +1,17 @@
+# Generated by Django 4.2.18 on 2026-10-19 16:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallet', '0008_wallet_checkpoints'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='wallettransaction',
+            index=models.Index(fields=['wallet', 'timestamp'], name='wallet_txn_wallet_time'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.18 on 2026-10-19 16:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallet', '0009_wallet_txn_time_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='wallettransaction',
+            name='details',
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
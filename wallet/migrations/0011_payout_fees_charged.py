@@ -0,0 +1,28 @@
+# Generated by Django 4.2.18 on 2026-10-19 16:38
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_fees_charged(apps, schema_editor):
+    # Until now fee + tax was always debited in full once a payout was submitted
+    Payout = apps.get_model('wallet', 'Payout')
+    Payout.objects.filter(charge_fees=True, razorpay_payout_id__isnull=False).update(
+        fees_charged=F('fee') + F('tax')
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallet', '0010_wallettransaction_details'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='payout',
+            name='fees_charged',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=12),
+        ),
+        migrations.RunPython(backfill_fees_charged, migrations.RunPython.noop),
+    ]
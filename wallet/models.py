@@ -24,9 +24,40 @@ class WalletTransaction(models.Model):
     timestamp = models.DateTimeField(auto_now_add=True)
     description = models.TextField()
     order = models.ForeignKey(Order, on_delete=models.SET_NULL, null=True, blank=True)
+    # Commission credits: one row per (wallet, order) with its parts listed here,
+    # [{"level": 1..10 | "sponsor" | "company", "product": id, "quantity": n, "amount": "1.25"}];
+    # compacted historical rows hold {"compacted": n, "last_id": id} instead
+    details = models.JSONField(null=True, blank=True)
 
     def __str__(self):
         return f"{self.transaction_type} - {self.amount} for {self.wallet.user.email}"
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['wallet', 'id'], name='wallet_txn_wallet_id'),
+            models.Index(fields=['wallet', 'timestamp'], name='wallet_txn_wallet_time'),
+        ]
+
+
+class WalletCheckpoint(models.Model):
+    """
+    Ledger balance of a wallet through WalletTransaction ``transaction_id``
+    (inclusive): the sum of its credits minus debits up to that row. Balance
+    checks and historical balances start from the latest checkpoint instead
+    of summing the whole history. Written by `manage.py verify_wallets`.
+    """
+    wallet = models.ForeignKey(Wallet, on_delete=models.CASCADE, related_name='checkpoints')
+    transaction_id = models.BigIntegerField()
+    balance = models.DecimalField(max_digits=14, decimal_places=2)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['wallet', 'transaction_id'], name='wallet_checkpoint_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.wallet} @ {self.transaction_id}: {self.balance}"
     
 
 class Payout(models.Model):
@@ -42,3 +73,20 @@ class Payout(models.Model):
     tax = models.DecimalField(max_digits=12, decimal_places=2, default=0)
     final_amount = models.DecimalField(max_digits=12, decimal_places=2, default=0)
 
+    # Withdrawals are created 'pending' with the amount already held from the wallet;
+    # `manage.py process_payouts` sends them to RazorpayX (see wallet.payouts)
+    fund_account_id = models.CharField(max_length=100, blank=True, default='')
+    charge_fees = models.BooleanField(default=True)  # debit RazorpayX fee + tax from the wallet once known
+    fees_charged = models.DecimalField(max_digits=12, decimal_places=2, default=0)  # what the wallet could cover
+    attempts = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True, default='')
+    submitted_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'id'], name='payout_status'),
+        ]
+
+    def __str__(self):
+        return f"Payout {self.id} | {self.user} | {self.amount} | {self.status}"
+
@@ -0,0 +1,290 @@
+import datetime
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from users.models import BankingDetails
+from payment.gateway import RateLimiter
+from users.utils.razorpay_x import fetch_payout, find_payout, initiate_payout
+from .ledger import InsufficientBalance, post_transaction
+from .models import Payout, Wallet
+
+MAX_ATTEMPTS = 3
+# RazorpayX payout states that won't change again; the last four mean the money never left
+FINAL_STATUSES = ('processed', 'reversed', 'failed', 'rejected', 'cancelled')
+REVERSED_STATUSES = ('reversed', 'failed', 'rejected', 'cancelled')
+# A payout left 'submitting' this long belongs to a worker that died; it is sent again
+# (the request_id idempotency key stops RazorpayX paying it twice)
+STALE_SUBMISSION = datetime.timedelta(minutes=10)
+# Every attempt went unanswered, so RazorpayX may or may not have the payout;
+# reconcile_payouts() looks it up by reference_id before anything is credited back
+UNKNOWN_STATUS = 'unknown'
+
+
+class PayoutError(Exception):
+    """A withdrawal that can't be requested; the message is shown to the user."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def request_payout(user, amount, request_id, charge_fees=True):
+    """
+    Holds ``amount`` from the user's wallet and queues a 'pending' Payout.
+    The wallet row is locked only for these few writes; RazorpayX is called
+    later by ``submit_pending_payouts``. Returns (payout, created); a
+    repeated ``request_id`` returns the existing payout.
+    """
+    try:
+        banking = BankingDetails.objects.get(user=user)
+    except BankingDetails.DoesNotExist:
+        raise PayoutError("Banking details not found.", status=404)
+
+    with transaction.atomic():
+        # Locked first, so two requests with one request_id can't both pass the check below
+        Wallet.objects.select_for_update().get(user=user)
+
+        existing = Payout.objects.filter(transaction_id=request_id).first()
+        if existing:
+            return existing, False
+
+        try:
+            post_transaction(user.pk, 'debit', amount, f"Payout requested: ₹{amount}", require_funds=True)
+        except InsufficientBalance:
+            raise PayoutError("Insufficient wallet balance.")
+        payout = Payout.objects.create(
+            user=user,
+            amount=amount,
+            status='pending',
+            transaction_id=request_id,
+            fund_account_id=banking.razorpay_fund_account_id or '',
+            charge_fees=charge_fees,
+        )
+    return payout, True
+
+
+def reverse_payout_hold(payout, status, reason):
+    """
+    Marks a payout failed/reversed and credits its held amount back, plus
+    whatever fee and tax was taken from the wallet (RazorpayX refunds them).
+    Call inside a transaction.
+    """
+    payout.status = status
+    payout.error = reason
+    payout.save(update_fields=['status', 'error'])
+    refund = Decimal(str(payout.amount)) + payout.fees_charged
+    post_transaction(payout.user_id, 'credit', refund, f"Payout {payout.id} {status}: ₹{refund} returned")
+
+
+def _claim(batch_size):
+    """Moves up to ``batch_size`` pending payouts to 'submitting' so no other worker sends them."""
+    Payout.objects.filter(
+        status='submitting', submitted_at__lt=timezone.now() - STALE_SUBMISSION
+    ).update(status='pending')
+
+    with transaction.atomic():
+        payouts = list(
+            Payout.objects.select_for_update(skip_locked=True)
+            .filter(status='pending', razorpay_payout_id__isnull=True)
+            .order_by('id')[:batch_size]
+        )
+        Payout.objects.filter(pk__in=[p.pk for p in payouts]).update(
+            status='submitting', submitted_at=timezone.now(), attempts=F('attempts') + 1
+        )
+    for payout in payouts:
+        payout.attempts += 1
+    return payouts
+
+
+def _reference(payout):
+    return f"payout-{payout.pk}"
+
+
+def _send(payout):
+    if not payout.fund_account_id:
+        return None
+    return initiate_payout(
+        payout.fund_account_id, float(payout.amount),
+        idempotency_key=payout.transaction_id, reference_id=_reference(payout),
+    )
+
+
+def _charge_fees(payout):
+    """
+    Debits the payout's fee and tax from the wallet, capped at its balance
+    (the amount itself was held when it was requested). Returns what was charged.
+    """
+    fees = payout.fee + payout.tax
+    wallet = Wallet.objects.select_for_update().get(user_id=payout.user_id)
+    charged = min(fees, max(wallet.balance, Decimal('0')))
+    if charged:
+        post_transaction(payout.user_id, 'debit', charged, f"Payout {payout.id} fees ₹{payout.fee} + tax ₹{payout.tax}")
+    if charged < fees:
+        payout.error = f"Wallet covered ₹{charged} of ₹{fees} fees"
+    return charged
+
+
+@transaction.atomic
+def _apply_result(payout, response):
+    if response and 'id' in response:
+        fee = Decimal(response.get('fees') or 0).scaleb(-2)
+        tax = Decimal(response.get('tax') or 0).scaleb(-2)
+        status = response.get('status') or 'processing'
+        payout.razorpay_payout_id = response['id']
+        payout.fee, payout.tax = fee, tax
+        payout.final_amount = Decimal(str(payout.amount)) + fee + tax
+        payout.error = ''
+        if status in REVERSED_STATUSES:
+            # Refused outright: nothing was charged, so only the hold goes back
+            payout.save(update_fields=['razorpay_payout_id', 'fee', 'tax', 'final_amount'])
+            reverse_payout_hold(payout, status, _failure_reason(response) or f"RazorpayX answered '{status}'")
+            return 'failed'
+        payout.status = status
+        if payout.charge_fees and fee + tax:
+            payout.fees_charged = _charge_fees(payout)
+        payout.save(update_fields=[
+            'razorpay_payout_id', 'status', 'fee', 'tax', 'final_amount', 'fees_charged', 'error',
+        ])
+        return 'submitted'
+
+    if not payout.fund_account_id:
+        reverse_payout_hold(payout, 'failed', "No RazorpayX fund account")
+        return 'failed'
+    if response and 'error' in response:
+        # RazorpayX answered and refused: nothing was paid
+        reverse_payout_hold(payout, 'failed', response['error'].get('description') or "RazorpayX rejected the payout")
+        return 'failed'
+    if payout.attempts >= MAX_ATTEMPTS:
+        Payout.objects.filter(pk=payout.pk).update(
+            status=UNKNOWN_STATUS, error=f"No answer from RazorpayX after {payout.attempts} attempts"
+        )
+        return UNKNOWN_STATUS
+    Payout.objects.filter(pk=payout.pk).update(status='pending', error="RazorpayX call failed; will retry")
+    return 'retry'
+
+
+def submit_pending_payouts(batch_size=None, workers=None, log=print):
+    """
+    Sends one batch of pending payouts to RazorpayX, ``workers`` at a time
+    over the shared keep-alive session, then records each result in its own
+    short transaction. Payouts RazorpayX refuses have their hold credited
+    back; unanswered ones are retried on later runs and, after MAX_ATTEMPTS,
+    left 'unknown' for reconcile_payouts(). Returns {result: count}.
+    """
+    batch_size = batch_size or settings.PAYOUT_BATCH_SIZE
+    workers = workers or settings.PAYOUT_WORKERS
+    payouts = _claim(batch_size)
+    counts = {}
+    if not payouts:
+        return counts
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for payout, response in zip(payouts, executor.map(_send, payouts)):
+            result = _apply_result(payout, response)
+            counts[result] = counts.get(result, 0) + 1
+    log(f"Sent {len(payouts)} payouts: " + ", ".join(f"{n} {result}" for result, n in sorted(counts.items())))
+    return counts
+
+
+def _failure_reason(response):
+    details = response.get('status_details') or {}
+    return details.get('description') or response.get('failure_reason') or ''
+
+
+def _reconcile_page(payouts, executor, limiter):
+    """Fetches one page of payouts concurrently and writes back what changed. Returns (updated, reversed)."""
+    def fetch(payout):
+        limiter.wait()
+        return fetch_payout(payout.razorpay_payout_id)
+
+    changed, reversals = [], []
+    for payout, response in zip(payouts, executor.map(fetch, payouts)):
+        status = (response or {}).get('status')
+        if not status or status == payout.status:
+            continue
+        if status in REVERSED_STATUSES:
+            reversals.append((payout, status, _failure_reason(response)))
+        else:
+            payout.status = status
+            changed.append(payout)
+
+    reversed_count = 0
+    with transaction.atomic():
+        Payout.objects.bulk_update(changed, ['status'], batch_size=500)
+        for payout, status, reason in reversals:
+            # Conditional on the status we saw, so a payout is only ever reversed once
+            if Payout.objects.filter(pk=payout.pk, status=payout.status).update(status=status):
+                reverse_payout_hold(payout, status, reason)
+                reversed_count += 1
+    return len(changed), reversed_count
+
+
+def _settle_unknown(limiter):
+    """
+    Looks up each 'unknown' payout by its reference_id. One RazorpayX has is
+    recorded like a normal answer; one it confirms it never created, once
+    STALE_SUBMISSION has passed, has its hold credited back. Payouts whose
+    lookup fails stay 'unknown' for the next run. Returns (updated, reversed).
+    """
+    updated = reversed_count = 0
+    cutoff = timezone.now() - STALE_SUBMISSION
+    for payout in Payout.objects.filter(status=UNKNOWN_STATUS).order_by('id'):
+        limiter.wait()
+        response = find_payout(_reference(payout))
+        if response is None:
+            continue
+        with transaction.atomic():
+            # Another reconcile run may have settled it meanwhile
+            if not Payout.objects.select_for_update().filter(pk=payout.pk, status=UNKNOWN_STATUS).exists():
+                continue
+            if response:
+                result = _apply_result(payout, response)
+            elif payout.submitted_at and payout.submitted_at < cutoff:
+                reverse_payout_hold(payout, 'failed', "RazorpayX has no record of the payout")
+                result = 'failed'
+            else:
+                continue
+        updated += 1
+        reversed_count += result == 'failed'
+    return updated, reversed_count
+
+
+def reconcile_payouts(page_size=500, workers=None, rate=None, log=print):
+    """
+    Polls RazorpayX for every submitted payout that isn't final yet and
+    records status changes in one transaction per page: a bulk UPDATE, plus
+    a credit for each payout that failed or was reversed. Pages by id, so each run visits
+    every open payout once; ``rate`` caps requests per second. Payouts whose
+    submission got no answer are settled first (see _settle_unknown).
+    Returns (checked, updated, reversed).
+    """
+    workers = workers or settings.PAYOUT_WORKERS
+    limiter = RateLimiter(settings.PAYOUT_RECONCILE_RATE if rate is None else rate)
+    updated, reversed_count = _settle_unknown(limiter)
+    if updated:
+        log(f"Settled {updated} unknown payouts: {reversed_count} reversed")
+    open_payouts = (
+        Payout.objects.filter(razorpay_payout_id__isnull=False)
+        .exclude(status__in=FINAL_STATUSES)
+        .only('id', 'user_id', 'amount', 'status', 'razorpay_payout_id', 'fees_charged')
+        .order_by('id')
+    )
+    checked = 0
+    last_id = 0
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while True:
+            page = list(open_payouts.filter(id__gt=last_id)[:page_size])
+            if not page:
+                break
+            last_id = page[-1].id
+            page_updated, page_reversed = _reconcile_page(page, executor, limiter)
+            checked += len(page)
+            updated += page_updated
+            reversed_count += page_reversed
+            log(f"Checked {checked} payouts: {updated} updated, {reversed_count} reversed")
+    return checked, updated, reversed_count
@@ -10,4 +10,11 @@ class WalletSerializer(serializers.ModelSerializer):
 class WalletTransactionSerializer(serializers.ModelSerializer):
     class Meta:
         model = WalletTransaction
-        fields = ['transaction_type', 'amount', 'description', 'timestamp']
\ No newline at end of file
+        fields = ['transaction_type', 'amount', 'description', 'timestamp']
+
+class WalletStatementEntrySerializer(serializers.ModelSerializer):
+    balance = serializers.DecimalField(max_digits=14, decimal_places=2, read_only=True)
+
+    class Meta:
+        model = WalletTransaction
+        fields = ['id', 'transaction_type', 'amount', 'description', 'order', 'timestamp', 'balance']
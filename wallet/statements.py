@@ -0,0 +1,151 @@
+import tempfile
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+from django.db.models import Max
+from django.utils import timezone
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfgen import canvas
+
+from admin_portal.utils import stream_csv
+from .ledger import CENT, ledger_balance
+from .models import WalletTransaction
+
+STATEMENT_CHUNK_SIZE = 2000
+STATEMENT_COLUMNS = ['id', 'date', 'type', 'description', 'order_id', 'credit', 'debit', 'balance']
+
+
+def _parse_date(value):
+    try:
+        return date.fromisoformat(value) if value else None
+    except ValueError:
+        return None
+
+
+def statement_filters(params):
+    """date_from / date_to (inclusive, YYYY-MM-DD) from a QueryDict; invalid values are dropped."""
+    filters = {}
+    for key in ('date_from', 'date_to'):
+        value = _parse_date((params.get(key) or '').strip())
+        if value:
+            filters[key] = value
+    return filters
+
+
+def _day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def statement(wallet, filters):
+    """
+    (opening balance, transactions) for a statement period, the queryset in
+    ledger (id) order. The opening balance comes from the nearest checkpoint
+    (wallet.ledger); running balances are added while the rows are read
+    (statement_rows, running_balances), so no query scans the whole history.
+    """
+    transactions = WalletTransaction.objects.filter(wallet=wallet)
+    opening = Decimal('0.00')
+    if 'date_from' in filters:
+        # Plain timestamp ranges (not __date) so the (wallet, timestamp) index is used
+        start = _day_start(filters['date_from'])
+        before = transactions.filter(timestamp__lt=start).aggregate(last=Max('id'))['last']
+        if before is not None:
+            opening = ledger_balance(wallet, upto_id=before)
+        transactions = transactions.filter(timestamp__gte=start)
+    if 'date_to' in filters:
+        transactions = transactions.filter(timestamp__lt=_day_start(filters['date_to'] + timedelta(days=1)))
+    return opening, transactions.order_by('id')
+
+
+def _signed(txn):
+    return txn.amount if txn.transaction_type == 'credit' else -txn.amount
+
+
+def closing_balance(wallet, opening, transactions):
+    """Balance after the period's last transaction, from the nearest checkpoint."""
+    last = transactions.aggregate(last=Max('id'))['last']
+    return opening if last is None else ledger_balance(wallet, upto_id=last)
+
+
+def running_balances(wallet, page):
+    """
+    Sets ``balance``, the balance right after it, on each transaction of
+    ``page`` (one page, oldest or newest first). The newest row's balance
+    comes from one ledger_balance() call; the others are worked back from it.
+    """
+    page = list(page)
+    if page:
+        newest_first = sorted(page, key=lambda txn: txn.id, reverse=True)
+        balance = ledger_balance(wallet, upto_id=newest_first[0].id)
+        for txn in newest_first:
+            txn.balance = balance
+            balance -= _signed(txn)
+    return page
+
+
+def statement_rows(transactions, opening):
+    balance = opening
+    for txn in transactions.iterator(chunk_size=STATEMENT_CHUNK_SIZE):
+        credit = txn.transaction_type == 'credit'
+        balance += _signed(txn)
+        yield [
+            txn.id,
+            txn.timestamp.isoformat(),
+            txn.transaction_type,
+            txn.description,
+            txn.order_id or '',
+            txn.amount if credit else '',
+            '' if credit else txn.amount,
+            balance.quantize(CENT),
+        ]
+
+
+def stream_statement_csv(transactions, opening):
+    return stream_csv(STATEMENT_COLUMNS, statement_rows(transactions, opening))
+
+
+def render_statement_pdf(wallet, filters, opening, transactions):
+    """
+    Writes the statement PDF page by page into a temporary file (rows are
+    streamed from the DB, never all in memory) and returns it, rewound.
+    """
+    output = tempfile.TemporaryFile()
+    height = A4[1]
+    margin, line = 40, 16
+    columns = (('Date', 40), ('Description', 130), ('Credit', 360), ('Debit', 430), ('Balance', 500))
+    p = canvas.Canvas(output, pagesize=A4)
+
+    def header():
+        y = height - margin
+        p.setFont("Helvetica-Bold", 14)
+        p.drawString(margin, y, f"Wallet statement: {wallet.user.email}")
+        y -= line * 1.5
+        p.setFont("Helvetica", 10)
+        period = f"{filters.get('date_from') or 'start'} to {filters.get('date_to') or 'today'}"
+        p.drawString(margin, y, f"Period: {period}    Opening balance: {opening:.2f}")
+        y -= line * 1.5
+        p.setFont("Helvetica-Bold", 10)
+        for title, x in columns:
+            p.drawString(x, y, title)
+        p.setFont("Helvetica", 9)
+        return y - line
+
+    y = header()
+    closing = opening
+    for _, timestamp, _, description, _, credit, debit, balance in statement_rows(transactions, opening):
+        if y < margin:
+            p.showPage()
+            y = header()
+        p.drawString(40, y, timestamp[:16].replace('T', ' '))
+        p.drawString(130, y, description[:45])
+        p.drawString(360, y, str(credit))
+        p.drawString(430, y, str(debit))
+        p.drawString(500, y, str(balance))
+        closing = balance
+        y -= line
+
+    p.setFont("Helvetica-Bold", 10)
+    p.drawString(margin, max(y - line, margin / 2), f"Closing balance: {closing:.2f}")
+    p.save()
+    output.seek(0)
+    return output
@@ -2,13 +2,14 @@ from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required
 from django.http import JsonResponse
 from django.contrib import messages
-from django.db import transaction
+from django.core.paginator import Paginator
 import uuid
 from decimal import Decimal
 
-from wallet.models import Wallet, WalletTransaction, Payout
+from wallet.models import Wallet, Payout
 from users.models import BankingDetails
-from users.utils.razorpay_x import initiate_payout
+from wallet.payouts import PayoutError, request_payout
+from wallet.statements import running_balances, statement
 
 
 # dyanamic fee+tax 
@@ -24,8 +25,11 @@ def wallet_transactions_view(request):
     except Wallet.DoesNotExist:
         return JsonResponse({"error": "Wallet not found."}, status=404)
 
-    transactions = WalletTransaction.objects.filter(wallet=wallet).order_by('-timestamp')
-    payouts = Payout.objects.filter(user=user).order_by('-created_at')
+    # Newest first, 50 per page, each with its running balance (seeded from the nearest checkpoint)
+    _, transactions = statement(wallet, {})
+    transactions = Paginator(transactions.order_by('-id'), 50).get_page(request.GET.get('page'))
+    transactions.object_list = running_balances(wallet, transactions.object_list)
+    payouts = Payout.objects.filter(user=user).order_by('-created_at')[:20]
 
     if request.method == 'POST':
         try:
@@ -42,62 +46,14 @@ def wallet_transactions_view(request):
             messages.warning(request, "This withdrawal request was already processed.")
             return redirect('wallet_transactions')
 
-        # ✅ Atomic DB transaction
-        with transaction.atomic():
-            wallet = Wallet.objects.select_for_update().get(user=user)
-
-            if wallet.balance < amount:
-                return JsonResponse({"error": "Insufficient wallet balance."}, status=400)
-
-            # ✅ Get banking details
-            try:
-                banking = BankingDetails.objects.get(user=user)
-            except BankingDetails.DoesNotExist:
-                return JsonResponse({"error": "Banking details not found."}, status=404)
-
-            # ✅ Initiate payout (for requested amount)
-            payout_response = initiate_payout(banking.razorpay_fund_account_id, float(amount))
-            if not payout_response or 'id' not in payout_response:
-                return JsonResponse({
-                    "error": f"Failed to initiate payout. Response: {payout_response}"
-                }, status=400)
-
-            # ✅ Extract fees + tax from Razorpay response (in paise)
-            fees_paise = payout_response.get("fees", 0)
-            tax_paise = payout_response.get("tax", 0)
-
-            fee = Decimal(fees_paise) / 100
-            tax = Decimal(tax_paise) / 100
-            total_deduction = amount + fee + tax
-
-            # ✅ Ensure wallet has enough for fees too
-            if wallet.balance < total_deduction:
-                return JsonResponse({"error": "Insufficient wallet balance for fees."}, status=400)
-
-            # ✅ Deduct total amount from wallet
-            wallet.balance -= total_deduction
-            wallet.save()
-
-            # ✅ Record wallet transaction
-            WalletTransaction.objects.create(
-                wallet=wallet,
-                transaction_type='debit',
-                amount=total_deduction,
-                description=f'Payout ₹{amount} + Fees ₹{fee} + Tax ₹{tax}'
-            )
-
-            # ✅ Save payout record
-            Payout.objects.create(
-                user=user,
-                amount=amount,
-                razorpay_payout_id=payout_response['id'],
-                status=payout_response.get('status', 'initiated'),
-                transaction_id=request_id
-            )
-
-        messages.success(request, f'Withdrawal of ₹{amount} initiated successfully. '
-                                  f'Fees ₹{fee} + Tax ₹{tax} applied. '
-                                  f'Total deducted: ₹{total_deduction}.')
+        # ✅ Hold the amount and queue the payout; `manage.py process_payouts` sends it
+        try:
+            request_payout(user, amount, request_id, charge_fees=True)
+        except PayoutError as e:
+            return JsonResponse({"error": str(e)}, status=e.status)
+
+        messages.success(request, f'Withdrawal of ₹{amount} requested. '
+                                  f'RazorpayX fees and tax are deducted once the payout is sent.')
 
         # ✅ Redirect to prevent duplicate form submission
         return redirect('wallet_transactions')